@@ -1,8 +1,19 @@
 from abc import ABC, abstractmethod
+from typing import Callable
 
-from core.models import Monitor, Window
+from core.index import WindowIndex
+from core.input import InputSource
+from core.layout import LayoutPlan
+from core.models import Monitor, Rect, Window
+from core.overview import OverviewChanges
+from core.scheduler import RefreshScheduler
 
 class Adapter(ABC):
+    # Coalesces refresh() calls; hold it to make a batch of operations cost one layout pass
+    scheduler: RefreshScheduler
+    # Set by whoever runs the window manager: called on the loop with the screen position of a click in the overview
+    on_overview_click: Callable[[int, int], None] | None = None
+    
     @abstractmethod
     async def initialize(self):
         pass
@@ -11,6 +22,11 @@ class Adapter(ABC):
     def get_monitors(self) -> list[Monitor]:
         pass
 
+    @abstractmethod
+    def get_window_index(self) -> WindowIndex:
+        "The index of every window on the adapter's monitors, kept in sync with the model"
+        pass
+
     @abstractmethod
     def focus_window(self, window: Window):
         pass
@@ -24,7 +40,30 @@ class Adapter(ABC):
         pass
 
     @abstractmethod
-    def refresh(self):
+    def refresh(self, monitor: int | None = None):
+        "Request a relayout of one monitor, or all of them. This may be deferred and coalesced with other requests."
+        pass
+    
+    @abstractmethod
+    def apply_layout(self, plan: LayoutPlan) -> LayoutPlan:
+        """
+        Commit a batch of placements in one go, so windows (and anything attached to them) move together.
+        Returns the placements that were actually applied.
+        """
+        pass
+    
+    @abstractmethod
+    def apply_overview(self, changes: OverviewChanges, screen: Rect | None):
+        """
+        Show, move and hide overview thumbnails. Cells that scroll out of view give their thumbnails back for reuse.
+        `screen` is the monitor the overview covers, with a backdrop behind the thumbnails, or None once it's closed.
+        Windows whose thumbnails are shown mustn't be left minimized, or there's nothing to draw.
+        """
+        pass
+    
+    @abstractmethod
+    def create_input_source(self) -> InputSource:
+        "Where the window manager gets cursor/monitor events from"
         pass
     
     @abstractmethod
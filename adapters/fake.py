@@ -1,9 +1,38 @@
-from core.models import Monitor, Workspace, Window
+from collections import Counter
+from dataclasses import dataclass
+
+from core.index import WindowIndex
+from core.input import ScriptedInputSource
+from core.layout import CommittedLayout, LayoutPlan, plan_layout
+from core.models import Monitor, Rect, Workspace, Window
+from core.overview import OverviewChanges, OverviewProxies
+from core.pool import ProxyBackend, ProxyPool
+from core.scheduler import RefreshScheduler
+from core.visibility import VisibilityBackend, VisibilityTracker, WindowState
 from adapters.base import Adapter
+from log import log_debug
 
 class FakeAdapter(Adapter):
-    def __init__(self):
-        self._monitors = [
+    # Every batch that would have been committed to the platform, in order
+    batches: list[LayoutPlan]
+    # Whether each window is shown, parked or minimized
+    visibility: VisibilityTracker
+    # What the overview is showing
+    overview: "OverviewProxies[FakeProxy]"
+    # Where the overview's backdrop is, while it's open
+    backdrop: Rect | None = None
+    # How many of each platform call the Windows adapter would have made (visibility changes are counted by its backend)
+    calls: Counter[str]
+
+    def __init__(self, gap_px: int = 0, monitors: list[Monitor] | None = None):
+        "Starts with two monitors and a handful of windows, unless given `monitors`"
+        self.gap_px = gap_px
+        self.batches = []
+        self.calls = Counter()
+        self._committed = CommittedLayout()
+        # Never bound to a loop, so every request flushes straight away unless it's held
+        self.scheduler = RefreshScheduler(self._flush_layout)
+        self._monitors = monitors if monitors is not None else [
             Monitor(
                 workspaces=[
                     Workspace(
@@ -19,19 +48,192 @@ class FakeAdapter(Adapter):
                             Window(22),
                         ]
                     )
-                ]
+                ],
+                rect=Rect(0, 0, 1920, 1080)
             ),
-            Monitor()
+            Monitor(rect=Rect(1920, 0, 3840, 1080))
         ]
+        self._index = WindowIndex(self._monitors)
+        self.visibility = VisibilityTracker(FakeVisibilityBackend())
+        self.overview = OverviewProxies(ProxyPool(FakeProxyBackend()))
+
+    async def initialize(self):
+        pass
 
     def get_monitors(self):
         return self._monitors
 
+    def get_window_index(self):
+        return self._index
+
     def focus_window(self, window):
-        print(f"[FAKE] Focus {window.id}")
+        log_debug("[FAKE] Focus %s", window.id)
+        self.calls["focus"] += 1
+        # Like the Windows adapter, only the window's own monitor is laid out again
+        location = self._index.locate(window.id)
+        self.refresh(location.monitor_index if location else None)
 
     def resize_window(self, window):
-        print(f"[FAKE] Resize {window.id} -> {window.width}")
+        log_debug("[FAKE] Resize %s -> %s", window.id, window.width)
+        location = self._index.locate(window.id)
+        self.refresh(location.monitor_index if location else None)
+
+    def close_window(self, window):
+        log_debug("[FAKE] Close %s", window.id)
+        self.calls["close"] += 1
+
+    def refresh(self, monitor=None):
+        self.scheduler.request(monitor)
+
+    def add_window(self, win: Window, monitor: int = 0):
+        "A window appeared on `monitor`; it goes into that monitor's current workspace"
+        if win.id in self._index:
+            return
+        mon = self._monitors[monitor]
+        ws = mon.current_workspace()
+        self._index.add(win)
+        ws.add_window(win)
+        mon.ensure_valid_workspaces()
+        ws.layout_windows()
+        self.refresh(monitor)
+
+    def remove_window(self, win_id: int):
+        "A window went away"
+        location = self._index.locate(win_id)
+        win = self._index.remove(win_id)
+        if win is None:
+            return
+        self._committed.forget(win_id)
+        self.visibility.forget(win_id)
+        if win.workspace is not None:
+            ws = win.workspace
+            ws.remove_window(win)
+            ws.scroll_to_focus()
+        self.refresh(location.monitor_index if location else None)
+
+    def window_moved(self, win_id: int, rect: Rect):
+        "Something other than us moved a window; unless it's where we put it, the next refresh puts it back"
+        committed = self._committed.get(win_id)
+        if committed and committed.visible and committed.rect != rect:
+            self._committed.forget(win_id)
+
+    def window_minimized(self, win_id: int):
+        if win_id in self._index:
+            self.visibility.observe(win_id, WindowState.MINIMIZED)
+
+    def window_restored(self, win_id: int):
+        committed = self._committed.get(win_id)
+        win = self._index.get(win_id)
+        if committed and not committed.visible and win is not None:
+            # Hidden windows aren't planned again unless their workspace is
+            self._committed.forget(win_id, win.workspace)
+        if win_id in self._index:
+            self.visibility.observe(win_id, WindowState.SHOWN)
+
+    def _flush_layout(self, monitors):
+        log_debug("[FAKE] Refresh layout")
+        plan = plan_layout(self._monitors, self.gap_px, monitors, self._committed)
+        changes = self._committed.diff(plan)
+        if len(changes) > 0:
+            # Like the Windows adapter: committed up front, and whatever couldn't be applied is forgotten again
+            self._committed.commit(changes)
+            applied = self.apply_layout(changes)
+            for p in changes:
+                if p.id not in applied:
+                    win = self._index.get(p.id)
+                    self._committed.forget(p.id, win.workspace if win else None)
+
+    def apply_layout(self, plan):
+        self.batches.append(plan)
+        self.calls["layout_batch"] += 1
+        applied = LayoutPlan()
+        for p in plan:
+            if self.visibility.transition(p):
+                applied.add(p)
+                if p.visible:
+                    self.calls["move"] += 1
+        return applied
+
+    def apply_overview(self, changes: OverviewChanges, screen: Rect | None):
+        self.calls["thumbnail"] += len(changes)
+        self.backdrop = screen
+        for cell in changes.shown:
+            self.visibility.park_minimized(cell.id)
+        self.overview.apply(changes)
+
+    def create_input_source(self):
+        return ScriptedInputSource()
+
+    def stop(self):
+        pass
+
+@dataclass
+class FakeProxy:
+    id: int
+    source: int = 0
+    src_rect: Rect | None = None
+    pos: tuple[int, int] | None = None
+    size: tuple[int, int] | None = None
+    visible: bool = False
+    alive: bool = True
+
+class FakeProxyBackend(ProxyBackend[FakeProxy]):
+    "Proxies that are just records, so pool behavior can be checked without a compositor"
+
+    # Every proxy ever created, in order
+    proxies: list[FakeProxy]
+
+    def __init__(self):
+        self.proxies = []
+
+    def create(self) -> FakeProxy:
+        proxy = FakeProxy(id=len(self.proxies) + 1)
+        self.proxies.append(proxy)
+        return proxy
+
+    def attach(self, proxy: FakeProxy, source: int, src_rect: Rect, pos: tuple[int, int], size: tuple[int, int] | None = None):
+        proxy.source = source
+        self.move(proxy, src_rect, pos, size)
+        proxy.visible = True
+
+    def move(self, proxy: FakeProxy, src_rect: Rect, pos: tuple[int, int], size: tuple[int, int] | None = None):
+        proxy.src_rect, proxy.pos, proxy.size = src_rect, pos, size
+
+    def park(self, proxy: FakeProxy):
+        proxy.source, proxy.src_rect, proxy.pos, proxy.size = 0, None, None, None
+        proxy.visible = False
+
+    def destroy(self, proxy: FakeProxy):
+        proxy.alive = False
+        proxy.visible = False
+
+    def alive(self, proxy: FakeProxy) -> bool:
+        return proxy.alive
+
+class FakeVisibilityBackend(VisibilityBackend):
+    "Keeps track of each window's state and every call that would have changed it"
+
+    # What the platform thinks; windows start out shown
+    states: dict[int, WindowState]
+    # (call, window) for every state change, in order
+    calls: list[tuple[str, int]]
+
+    def __init__(self):
+        self.states = {}
+        self.calls = []
+
+    def probe(self, win_id: int) -> WindowState:
+        return self.states.get(win_id, WindowState.SHOWN)
+
+    def restore(self, win_id: int):
+        self._call("restore", win_id, WindowState.SHOWN)
+
+    def park(self, win_id: int):
+        self._call("park", win_id, WindowState.PARKED)
+
+    def minimize(self, win_id: int):
+        self._call("minimize", win_id, WindowState.MINIMIZED)
 
-    def refresh(self):
-        print("[FAKE] Refresh layout")
+    def _call(self, name: str, win_id: int, state: WindowState):
+        self.calls.append((name, win_id))
+        self.states[win_id] = state
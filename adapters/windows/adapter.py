@@ -1,149 +1,406 @@
 # adapters/windows/adapter.py
+import asyncio
+import contextlib
 import threading
-import logging
-from typing import cast
+import time
+from typing import Callable, Iterator, cast
 import win32gui
 import win32con
 import win32api
 
 from adapters.base import Adapter
-from adapters.windows.models import WinMonitor, WinWindow
-from adapters.windows.print import print_ascii_layout
+from adapters.windows.backdrop import OverviewBackdrop
+from adapters.windows.models import LayoutFailed, OverviewClicked, ThumbnailReady, WinMonitor, WinWindow
 from adapters.windows.thumbnail.cloak import create_cloaking_thumbnail, remove_cloaking_thumbnail
+from adapters.windows.thumbnail.pool import ThumbnailBackend
+from adapters.windows.thumbnail.thumbnail_window import ThumbnailWindow, total_stats as thumbnail_stats
+from core.actor import Executor, Inbox
+from core.animation import DEFAULT_ANIMATION_DURATION, Animator
+from core.debug_view import DebugLayoutView
+from core.events import EventKind, EventQueue, WindowEvent
+from core.index import WindowIndex
+from core.layout import CommittedLayout, LayoutPlan, WindowPlacement, plan_layout, proxy_geometry
 from core.models import Monitor, Rect, Workspace, Window
+from core.overview import OverviewChanges, OverviewProxies
+from core.pool import ProxyPool
+from core.recorder import recorder
+from core.scheduler import DEFAULT_FRAME_INTERVAL, RefreshScheduler
+from core.trace import span, traced
+from core.visibility import VisibilityTracker, WindowState
 from adapters.windows.monitor_info import list_monitors
-from adapters.windows.enumerate import enumerate_top_level_windows, is_manageable
-from adapters.windows.layout import layout_workspace_windows
+from adapters.windows.enumerate import classifier, enumerate_manageable_windows, is_manageable
+from adapters.windows.layout import apply_placements
+from adapters.windows.metadata import load_metadata, load_metadata_from, refresh_styles, refresh_title
+from adapters.windows.mouse import MouseHookInputSource
+from adapters.windows.visibility import Win32Visibility
 from adapters.windows.watch import WinEventWatcher
-from log import log_error
+from log import log_debug, log_error, log_info
 
-log = logging.getLogger(__name__)
+def describe_window(window: Window) -> tuple[str, str]:
+    winwin = cast(WinWindow, window.data)
+    return winwin.title, winwin.class_name
 
 DEFAULT_GAP_PX = 12
+# Proxies created up front, so the first few new windows don't have to wait for one
+PREWARM_PROXIES = 4
 
 class WindowsAdapter(Adapter):
+    """
+    All of our state is owned by the asyncio loop (the main thread until the loop starts).
+    The watcher thread only ever queues events and posts messages back to us, and every call that
+    touches our proxy windows goes through `effects`, which runs it on the watcher thread.
+    """
+    
     _watcher: WinEventWatcher
-    # I'm not sure what all we need to lock here, so we just lock everything...
-    _lock: threading.RLock
     _monitors_info: list[WinMonitor]
-    _windows: dict[int, Window]
+    # Every managed window by hwnd, shared with the WindowManager
+    _windows: WindowIndex
+    # What we last told Windows, so refreshes only touch windows that changed
+    _committed: CommittedLayout
+    # Window events from the watcher thread, waiting for the asyncio loop
+    events: EventQueue
+    _event_handlers: dict[EventKind, Callable[[int], None]]
+    # Results coming back from the watcher thread
+    inbox: Inbox
+    # Win32 side effects, run in order on the watcher thread
+    effects: Executor
+    # Slides windows between layouts; every layout change goes out through it
+    _animator: Animator
+    # Proxy thumbnails that outlived their windows, for the next ones. Only used on the watcher thread.
+    _proxies: ProxyPool[ThumbnailWindow]
+    # The overview's thumbnails, drawn from the same pool. Only used on the watcher thread.
+    _overview: OverviewProxies[ThumbnailWindow]
+    # Behind the overview's thumbnails, made the first time it opens. Only used on the watcher thread.
+    _backdrop: OverviewBackdrop | None = None
+    # Whether each window is shown, parked or minimized. Only used on the watcher thread.
+    _visibility: VisibilityTracker
     
     _focused_monitor: int | None = None
+    # How long each phase of admitting the windows already open took, in ms
+    startup_phases: dict[str, float]
+    # Only set up when asked for
+    _debug_view: DebugLayoutView | None = None
     
-    def __init__(self, gap_px: int = DEFAULT_GAP_PX):
+    def __init__(self, gap_px: int = DEFAULT_GAP_PX, frame_interval: float = DEFAULT_FRAME_INTERVAL, debug_layout: bool = False,
+                 animation_duration: float = DEFAULT_ANIMATION_DURATION):
         # monitor data: list of dicts {hMonitor, monitor, work}
         self._monitors_info = list_monitors()
         # Create Monitor objects (1 workspace each by default)
-        self._monitors = [Monitor(workspaces=[Workspace()], rect=m.monitor) for m in self._monitors_info]
-        self._lock = threading.RLock()
+        self._monitors = [Monitor(workspaces=[Workspace()], rect=m.monitor, work_rect=m.work) for m in self._monitors_info]
+        if recorder.active:
+            recorder.monitors(self._monitors)
+        self._committed = CommittedLayout()
+        self._windows = WindowIndex(self._monitors)
         self.gap_px = gap_px
+        self.scheduler = RefreshScheduler(self._flush_layout, frame_interval)
+        self.events = EventQueue(self._handle_events, lambda hwnd: hwnd in self._windows)
+        self._event_handlers = {
+            EventKind.CREATED: self.on_window_created,
+            EventKind.DESTROYED: self.on_window_destroyed,
+            EventKind.MOVED: self.on_window_moved,
+            EventKind.FOREGROUND: self.on_foreground_changed,
+            EventKind.TITLE_CHANGED: self.on_window_title_changed,
+            EventKind.STYLE_CHANGED: self.on_window_style_changed,
+            EventKind.MINIMIZED: self.on_window_minimized,
+            EventKind.RESTORED: self.on_window_restored,
+        }
+        self.inbox = Inbox()
+        self.inbox.register(ThumbnailReady, self._on_thumbnail_ready)
+        self.inbox.register(LayoutFailed, self._on_layout_failed)
+        self.inbox.register(OverviewClicked, self._on_overview_clicked)
+        self._proxies = ProxyPool(ThumbnailBackend())
+        self._overview = OverviewProxies(self._proxies)
+        self._visibility = VisibilityTracker(Win32Visibility())
+        self._animator = Animator(self._submit_layout, animation_duration, frame_interval,
+                                  screens=[mon.rect for mon in self._monitors])
+        if debug_layout:
+            self._debug_view = DebugLayoutView(self._monitors, describe_window)
 
         # start the watcher
         self._watcher = WinEventWatcher(self)
+        self.effects = Executor(self._watcher.run_on_thread)
         self._watcher.start()
+        self.effects.submit(lambda: self._proxies.prewarm(PREWARM_PROXIES))
         
         # initial population
+        self.startup_phases = {}
         self._populate_initial_windows()
         
-        print_ascii_layout(self._monitors, self._focused_monitor)
-        
     async def initialize(self):
-        pass
+        # From here on, refreshes are coalesced to at most one per frame
+        self.scheduler.bind(asyncio.get_running_loop())
+        # Anything the watcher saw while we were starting up gets handled now
+        self.events.bind(asyncio.get_running_loop())
+        self.inbox.bind(asyncio.get_running_loop())
+        self._animator.bind(asyncio.get_running_loop())
+        self._schedule_proxy_eviction()
+        if self._debug_view:
+            self._debug_view.bind(asyncio.get_running_loop())
     
     # -------------------------
     # Adapter public API
     # -------------------------
 
     def get_monitors(self):
-        with self._lock:
-            return self._monitors
+        return self._monitors
+
+    def get_window_index(self):
+        return self._windows
 
+    @traced()
     def focus_window(self, window):
         hwnd = window.id
-        try:
-            win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-            win32gui.SetForegroundWindow(hwnd)
-        except Exception:
-            log.exception("focus_window failed for %s", hwnd)
+        def focus():
+            # On the watcher thread, like every other Win32 call, so a hung window can't stall the loop.
+            # Only a minimized window is restored (a maximized one stays maximized), and through the tracker so it knows.
+            self._visibility.transition(WindowPlacement(hwnd, None, True))
+            try:
+                win32gui.SetForegroundWindow(hwnd)
+            except Exception:
+                log_error("focus_window failed for %s", hwnd, exc_info=True)
+        self.effects.submit(focus)
         
-        # Temporary (?)
-        for i, mon in enumerate(self._monitors):
-            for ws in mon.workspaces:
-                for w in ws.windows:
-                    if w.id == hwnd:
-                        self._focused_monitor = i
-                        break
+        location = self._windows.locate(hwnd)
+        if location:
+            self._focused_monitor = location.monitor_index
         
-        self.refresh()
+        self.refresh(location.monitor_index if location else None)
 
     def resize_window(self, window):
-        # Just re-run layout for the workspace which contains this window
-        with self._lock:
-            self.refresh()
+        # Just re-run layout for the monitor which contains this window
+        location = self._windows.locate(window.id)
+        self.refresh(location.monitor_index if location else None)
 
+    @traced()
     def close_window(self, window):
         hwnd = window.id
-        try:
-            win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
-        except Exception:
-            log.exception("close_window failed for %s", hwnd)
+        def close():
+            try:
+                win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
+            except Exception:
+                log_error("close_window failed for %s", hwnd, exc_info=True)
+        self.effects.submit(close)
+
+    def refresh(self, monitor: int | None = None):
+        self.scheduler.request(monitor)
 
-    def refresh(self):
+    @traced()
+    def _flush_layout(self, monitors: set[int] | None):
         """
-        apply layout to the *active* workspace on each monitor.
+        apply layout to the *active* workspace on each dirty monitor.
         other workspaces' windows will be hidden.
+        only windows whose placement changed since the last refresh are touched.
         """
-        with self._lock:
-            for mi, mon in enumerate(self._monitors):
-                work_rect = self._monitors_info[mi].work
-                monitor_rect = self._monitors_info[mi].monitor
-                
-                # hide all windows not in active workspace
-                active_ws = mon.current_workspace()
-                
-                if not active_ws:
-                    continue
-                
-                # first minimize windows in other workspaces
-                for ws in mon.workspaces:
-                    if ws.id != mon._focused_workspace:
-                        for w in ws.windows:
-                            try:
-                                win32gui.ShowWindow(w.id, win32con.SW_MINIMIZE)
-                            except Exception:
-                                pass
-                
-                # layout active workspace
-                layout_workspace_windows(active_ws, work_rect, monitor_rect, self.gap_px)
-            
-            print_ascii_layout(self._monitors, self._focused_monitor)
+        plan = plan_layout(self._monitors, self.gap_px, monitors, self._committed)
+        changes = self._committed.diff(plan)
+        if len(changes) > 0:
+            # Committed up front so the next refresh diffs against it; anything Windows refuses
+            # comes back as LayoutFailed and is forgotten again
+            self._committed.commit(changes)
+            self._animator.retarget(changes)
+        
+        if self._debug_view:
+            self._debug_view.request(self._focused_monitor)
+
+    def apply_layout(self, plan: LayoutPlan, proxies: dict[int, ThumbnailWindow] | None = None) -> LayoutPlan:
+        "On the watcher thread, with each window's proxy as the loop knew it when the job was submitted"
+        return apply_placements(plan, (proxies or {}).get, self._visibility)
+
+    @traced()
+    def apply_overview(self, changes: OverviewChanges, screen: Rect | None):
+        def apply():
+            if screen is not None:
+                if self._backdrop is None:
+                    self._backdrop = OverviewBackdrop(lambda x, y: self.inbox.post(OverviewClicked(x, y)))
+                self._backdrop.show(screen)
+            # Other workspaces' windows are minimized, and DWM has no thumbnail of a minimized window.
+            # Parked, they stay out of sight but keep being drawn; they're left parked afterwards.
+            for cell in changes.shown:
+                self._visibility.park_minimized(cell.id)
+            for thumbnail in self._overview.apply(changes):
+                thumbnail.bring_to_front()
+            if screen is None and self._backdrop is not None:
+                self._backdrop.hide()
+        self.effects.submit(apply)
+
+    def _on_overview_clicked(self, message: OverviewClicked):
+        if self.on_overview_click is not None:
+            self.on_overview_click(message.x, message.y)
+
+    def _submit_layout(self, plan: LayoutPlan):
+        # Called by the animator with each frame (or straight away for changes it doesn't animate).
+        # Cloaking follows each frame, so a window sliding across a monitor edge only has a proxy while it crosses
+        uncloaks = self._update_cloaking(plan)
+        proxies = self._proxies_for(plan)
+        self.effects.submit(lambda: self._apply_and_report(plan, proxies))
+        for uncloak in uncloaks:
+            self.effects.submit(uncloak)
+
+    def _apply_and_report(self, changes: LayoutPlan, proxies: dict[int, ThumbnailWindow]):
+        # On the watcher thread
+        applied = self.apply_layout(changes, proxies)
+        if len(applied) < len(changes):
+            failed = LayoutPlan()
+            for p in changes:
+                if applied.get(p.id) != p:
+                    failed.add(p)
+            self.inbox.post(LayoutFailed(failed))
+
+    def _on_layout_failed(self, message: LayoutFailed):
+        for p in message.placements:
+            # Unless something newer has been committed since
+            if self._committed.get(p.id) == p:
+                win = self._windows.get(p.id)
+                self._committed.forget(p.id, win.workspace if win else None)
+
+    def _update_cloaking(self, changes: LayoutPlan) -> list[Callable[[], None]]:
+        """
+        Only windows that reach onto another monitor need a proxy; everything else is shown as is.
+        Proxies are attached and dropped as windows start and stop crossing monitor boundaries.
+        Every new proxy from one batch of changes is created in a single job on the watcher thread, before
+        the windows move. Dropping a proxy shows its window again, so those jobs are returned to be run after.
+        """
+        cloaks: list[Callable[[], None]] = []
+        uncloaks: list[Callable[[], None]] = []
+        for p in changes:
+            win = self._windows.get(p.id)
+            if win is None:
+                continue
+            winwin = cast(WinWindow, win.data)
+            if p.proxied and not winwin.cloaked:
+                winwin.cloaked = True
+                cloak = self._cloak(winwin, p)
+                if cloak is not None:
+                    cloaks.append(cloak)
+            elif not p.proxied and winwin.cloaked:
+                winwin.cloaked = False
+                uncloak = self._uncloak_job(winwin)
+                if uncloak is not None:
+                    uncloaks.append(uncloak)
+        if cloaks:
+            self.effects.submit(lambda: [cloak() for cloak in cloaks])
+        return uncloaks
+
+    def _cloak(self, winwin: WinWindow, p: WindowPlacement) -> Callable[[], None] | None:
+        "The job that gives a window its proxy, to be run on the watcher thread"
+        assert p.rect is not None and p.clip is not None
+        geometry = proxy_geometry(p.rect, p.clip)
+        if geometry is None:
+            return None
+        hwnd = winwin.id
+        def cloak():
+            # On the watcher thread, which owns every proxy window
+            log_debug("Cloaking window %s", hwnd, title=winwin.title)
+            thumbnail = create_cloaking_thumbnail(hwnd, *geometry, self._proxies)
+            if thumbnail is not None:
+                self.inbox.post(ThumbnailReady(hwnd, thumbnail))
+        return cloak
+
+    def _uncloak(self, winwin: WinWindow):
+        uncloak = self._uncloak_job(winwin)
+        if uncloak is not None:
+            self.effects.submit(uncloak)
+
+    def _uncloak_job(self, winwin: WinWindow) -> Callable[[], None] | None:
+        "Detach a window's proxy; the returned job gives it back on the watcher thread"
+        thumbnail = winwin.thumbnail
+        winwin.thumbnail = None
+        if thumbnail is None:
+            return None
+        return lambda: remove_cloaking_thumbnail(winwin.id, thumbnail, self._proxies)
+
+    def _on_thumbnail_ready(self, message: ThumbnailReady):
+        win = self._windows.get(message.hwnd)
+        if win is None:
+            # The window went away before its proxy was ready
+            self._release_proxy(message.thumbnail)
+            return
+        winwin = cast(WinWindow, win.data)
+        winwin.thumbnail = message.thumbnail
+        if not winwin.cloaked:
+            # It stopped crossing monitors before its proxy was ready
+            self._uncloak(winwin)
+
+    def _release_proxy(self, thumbnail: ThumbnailWindow):
+        self.effects.submit(lambda: self._proxies.release(thumbnail))
+
+    def _schedule_proxy_eviction(self):
+        def evict():
+            self.effects.submit(self._proxies.evict_idle)
+            self._schedule_proxy_eviction()
+        asyncio.get_running_loop().call_later(self._proxies.idle_timeout, evict)
 
     # -------------------------
     # Internal helpers
     # -------------------------
 
+    def _proxies_for(self, plan: LayoutPlan) -> dict[int, ThumbnailWindow]:
+        """
+        The proxies of the windows in `plan`, looked up on the loop, which owns them, to hand to a job.
+        Jobs run in order, so any proxy in here is still attached when the job runs.
+        """
+        proxies: dict[int, ThumbnailWindow] = {}
+        for p in plan:
+            win = self._windows.get(p.id)
+            thumbnail = cast(WinWindow, win.data).thumbnail if win is not None else None
+            if thumbnail is not None:
+                proxies[p.id] = thumbnail
+        return proxies
+
     def _populate_initial_windows(self):
         """
-        Enumerate current top-level windows and assign them to the monitor's current workspace.
+        Admit every window that's already open in one pass: classify them all, read what we need about each
+        (reusing what classifying already read), add them to their monitors' current workspaces in bulk,
+        then lay out once. Any proxies are created in a single job on the watcher thread.
         """
-        self._windows = {}
-        
-        hwnds = enumerate_top_level_windows()
-        with self._lock:
-            for hwnd in hwnds:
-                mi = self._monitor_index_for_hwnd(hwnd)
-                if mi is None:
-                    mi = 0
+        start = time.perf_counter()
+        with self._startup_phase("enumerate"):
+            probes = enumerate_manageable_windows()
+
+        with self._startup_phase("metadata"):
+            admitted: list[tuple[int, Window]] = []
+            process_names: dict[int, str] = {}
+            for probe in probes:
+                try:
+                    rect = Rect(*win32gui.GetWindowRect(probe.hwnd))
+                except Exception:
+                    # Gone already
+                    continue
+                winwin = WinWindow(id=probe.hwnd, title="", rect=rect)
+                load_metadata_from(winwin, probe, process_names)
+                mi = self._monitor_index_for_hwnd(probe.hwnd)
+                admitted.append((mi if mi is not None else 0, Window(id=probe.hwnd, data=winwin)))
+
+        with self._startup_phase("register"):
+            by_monitor: dict[int, list[Window]] = {}
+            for mi, win in admitted:
+                self._windows.add(win)
+                by_monitor.setdefault(mi, []).append(win)
+                if recorder.active:
+                    recorder.event(EventKind.CREATED, win.id, mi)
+            for mi, wins in by_monitor.items():
                 mon = self._monitors[mi]
                 ws = mon.current_workspace()
-                if not ws:
-                    continue
-                
-                self.init_window(hwnd, mon, ws, True)
-            
-            # after initial population, apply layout
+                ws.add_windows(wins)
+                mon.ensure_valid_workspaces()
+                ws.layout_windows()
+
+        with self._startup_phase("layout"):
             self.refresh()
 
+        total = (time.perf_counter() - start) * 1000
+        phases = ", ".join(f"{name} {ms:.1f}ms" for name, ms in self.startup_phases.items())
+        log_info(f"Admitted {len(admitted)} windows in {total:.1f}ms ({phases})")
+        # Runs after everything startup handed to the watcher thread: window moves and proxies
+        self.effects.submit(lambda: log_info(f"Startup layout applied after {(time.perf_counter() - start) * 1000:.1f}ms"))
+
+    @contextlib.contextmanager
+    def _startup_phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        with span("startup", name):
+            yield
+        self.startup_phases[name] = (time.perf_counter() - start) * 1000
+
     def _monitor_index_for_hwnd(self, hwnd):
         try:
             hMonitor = win32api.MonitorFromWindow(hwnd, win32con.MONITOR_DEFAULTTONEAREST)
@@ -154,160 +411,220 @@ class WindowsAdapter(Adapter):
             pass
         return None
 
-    # These are called from the watcher thread
+    def _handle_events(self, events: list[WindowEvent]):
+        for kind, hwnd in events:
+            try:
+                self._event_handlers[kind](hwnd)
+            except Exception as e:
+                # One bad window shouldn't drop the rest of the batch
+                log_error("Handling %s for window %s failed: %s", kind.name, hwnd, e)
+
+    # These are called on the asyncio loop, with events queued by the watcher thread
     def on_window_created(self, hwnd):
         "Add new window to the focused workspace of the monitor it belongs to."
-        # Filter again for manageability
+        # Only now, on the loop, do we look at the window (and most of the time the verdict is cached)
         try:
             if not is_manageable(hwnd):
                 return
         except Exception:
             return
         
-        with self._lock:
-            # avoid duplicates
-            if hwnd in self._windows:
-                return
-            
-            mi = self._monitor_index_for_hwnd(hwnd)
-            if mi is None:
-                mi = 0
-            mon = self._monitors[mi]
-            ws = mon.current_workspace()
-            if not ws:
-                return
-            
-            self.init_window(hwnd, mon, ws)
-            
-            log.debug("Added window %s to monitor %d workspace %d", hwnd, mi, mon._focused_workspace)
-            # Only the current monitor's active workspace should be visible; refresh that monitor's layout.
-            self.refresh()
-
-    def init_window(self, hwnd: int, mon: Monitor, ws: Workspace, initial: bool = False):
-        title = ""
-        try:
-            title = win32gui.GetWindowText(hwnd)
-        except Exception:
-            pass
+        # avoid duplicates
+        if hwnd in self._windows:
+            return
+        
+        mi = self._monitor_index_for_hwnd(hwnd)
+        if mi is None:
+            mi = 0
+        mon = self._monitors[mi]
+        ws = mon.current_workspace()
+        if not ws:
+            return
+        
+        self.init_window(hwnd, mi, ws)
         
+        log_debug("Added window %s to monitor %d workspace %d", hwnd, mi, mon._focused_workspace)
+        # Only the current monitor's active workspace should be visible; refresh that monitor's layout.
+        self.refresh(mi)
+
+    def init_window(self, hwnd: int, mi: int, ws: Workspace):
         rect = Rect(*win32gui.GetWindowRect(hwnd))
-        winwin = WinWindow(id=hwnd, title=title, rect=rect)
-        def cloak():
-            with self._lock:
-                print(f"Cloaking window {hwnd} ({title})")
-                thumbnail = create_cloaking_thumbnail(hwnd, rect)
-                winwin.thumbnail = thumbnail
-        self._watcher.run_on_thread(cloak)
+        winwin = WinWindow(id=hwnd, title="", rect=rect)
+        load_metadata(winwin)
+        title = winwin.title
+        # Whether it needs cloaking is decided when it's laid out
         win = Window(id=hwnd, data=winwin, workspace=ws)
-        self._windows[hwnd] = win
+        self._windows.add(win)
+        mon = self._monitors[mi]
         
-        print(f"Adding window {hwnd} ({title}) to workspace {mon._focused_workspace}")
-        ws.windows.append(win)
+        log_debug("Adding window %s to workspace %s", hwnd, mon._focused_workspace, title=title)
+        ws.add_window(win)
         mon.ensure_valid_workspaces()
         
         ws.layout_windows()
+        if recorder.active:
+            recorder.event(EventKind.CREATED, hwnd, mi)
 
     def on_window_destroyed(self, hwnd):
         "Remove window from any workspace it belongs to."
         
-        with self._lock:
-            if hwnd not in self._windows:
+        location = self._windows.locate(hwnd)
+        win = self._windows.remove(hwnd)
+        if win is None:
+            return
+        if recorder.active:
+            recorder.event(EventKind.DESTROYED, hwnd)
+        self._committed.forget(hwnd)
+        self._animator.forget(hwnd)
+        self.effects.submit(lambda: self._visibility.forget(hwnd))
+        if self._debug_view:
+            self._debug_view.forget(hwnd)
+        
+        winwin = cast(WinWindow, win.data)
+        if winwin.thumbnail:
+            self._release_proxy(winwin.thumbnail)
+            winwin.thumbnail = None
+        
+        log_debug("Removing window %s", hwnd)
+        
+        ws = win.workspace
+        if ws is not None:
+            ws.remove_window(win)
+            ws.scroll_to_focus()
+            log_debug("Removed window %s", hwnd)
+        
+        # re-layout the monitor it was on
+        self.refresh(location.monitor_index if location else None)
+
+    def on_window_moved(self, hwnd):
+        if hwnd in self._windows:
+            try:
+                rect = win32gui.GetWindowRect(hwnd)
+            except Exception:
+                title = cast(WinWindow, self._windows[hwnd].data).title
+                log_error("on_window_moved: failed to get rect for window %s (%s)", hwnd, title)
                 return
-            win = self._windows.pop(hwnd)
             
+            win = self._windows[hwnd]
             winwin = cast(WinWindow, win.data)
-            if winwin.thumbnail:
-                winwin.thumbnail.close()
+            log_debug("Window %s moved", hwnd, rect=rect)
+            if recorder.active:
+                recorder.event(EventKind.MOVED, hwnd, list(rect))
             
-            print(f"Removing window {hwnd}")
-        
-            for mon in self._monitors:
-                changed = False
-                for ws in mon.workspaces:
-                    for i, w in enumerate(list(ws.windows)):
-                        if w.id == hwnd:
-                            ws.windows.pop(i)
-                            ws.scroll_to_focus()
-                            changed = True
-                            break
-                    if changed:
-                        break
-                if changed:
-                    log.debug("Removed window %s", hwnd)
+            # If something other than us moved the window, the next refresh should put it back
+            # (while we're animating it, it's supposed to be somewhere else)
+            committed = self._committed.get(hwnd)
+            if committed and committed.visible and committed.rect != Rect(*rect) and not self._animator.is_animating(hwnd):
+                self._committed.forget(hwnd)
             
-            # re-layout active workspaces
-            self.refresh()
-
-    def on_window_moved(self, hwnd):
-        with self._lock:
-            if hwnd in self._windows:
-                try:
-                    rect = win32gui.GetWindowRect(hwnd)
-                except Exception:
-                    title = ""
-                    try:
-                        title = win32gui.GetWindowText(hwnd)
-                    except Exception:
-                        pass
-                    log_error(f"on_window_moved: failed to get rect for window {hwnd} ({title})")
-                    return
-                
-                win = self._windows[hwnd]
-                winwin = cast(WinWindow, win.data)
-                print(f"moved {winwin.title}")
-                
-                # Clamp the thumbnail to the window's workspace's monitor
-                if not win.workspace or not win.workspace.monitor:
-                    log_error(f"on_window_moved: no workspace/monitor for window {hwnd}")
-                    return
-                
-                win_pos = Rect(*rect)
-                monitor_rect = win.workspace.monitor.rect
-                mon_rect = monitor_rect
-                source = mon_rect.intersection(win_pos)
-                
-                if not source:
-                    return
-                
-                if winwin.thumbnail:
-                    winwin.thumbnail.update(source.relative_to(win_pos), monitor_rect.clamp_pos(rect[0], rect[1]))
+            # Clamp the thumbnail to the window's workspace's monitor
+            if not win.workspace or not win.workspace.monitor:
+                log_error("on_window_moved: no workspace/monitor for window %s", hwnd)
+                return
+            
+            geometry = proxy_geometry(Rect(*rect), win.workspace.monitor.rect)
+            if not geometry:
+                return
+            
+            thumbnail = winwin.thumbnail
+            if thumbnail:
+                self.effects.submit(lambda: thumbnail.update(*geometry))
 
     def on_window_title_changed(self, hwnd):
-        pass
+        win = self._windows.get(hwnd)
+        if win is None:
+            return
+        if not refresh_title(cast(WinWindow, win.data)):
+            return
+        if self._debug_view:
+            self._debug_view.forget(hwnd)
+            self._debug_view.request(self._focused_monitor)
+    
+    def on_window_style_changed(self, hwnd):
+        win = self._windows.get(hwnd)
+        if win is not None:
+            refresh_styles(cast(WinWindow, win.data))
     
     def on_window_minimized(self, hwnd):
-        with self._lock:
-            if hwnd in self._windows:
-                win = self._windows[hwnd]
-                winwin = cast(WinWindow, win.data)
-                if winwin.thumbnail:
-                    winwin.thumbnail.hide()
+        if hwnd in self._windows:
+            if recorder.active:
+                recorder.event(EventKind.MINIMIZED, hwnd)
+            # Whether we did it or not; either way it'll need restoring to be shown
+            self.effects.submit(lambda: self._visibility.observe(hwnd, WindowState.MINIMIZED))
+            win = self._windows[hwnd]
+            winwin = cast(WinWindow, win.data)
+            if winwin.thumbnail:
+                self.effects.submit(winwin.thumbnail.hide)
+
     def on_window_restored(self, hwnd):
-        with self._lock:
-            if hwnd in self._windows:
-                win = self._windows[hwnd]
-                winwin = cast(WinWindow, win.data)
-                if winwin.thumbnail:
-                    winwin.thumbnail.show()
+        # A window we hid was restored behind our back, so make sure the next refresh hides it again
+        committed = self._committed.get(hwnd)
+        win = self._windows.get(hwnd)
+        if committed and not committed.visible and win is not None:
+            # Hidden windows aren't planned again unless their workspace is
+            self._committed.forget(hwnd, win.workspace)
+        
+        if hwnd in self._windows:
+            if recorder.active:
+                recorder.event(EventKind.RESTORED, hwnd)
+            thumbnail = cast(WinWindow, self._windows[hwnd].data).thumbnail
+            def restored():
+                # Parking a minimized window restores it too, but it's still out of sight
+                if self._visibility.state(hwnd) is WindowState.PARKED:
+                    return
+                self._visibility.observe(hwnd, WindowState.SHOWN)
+                if thumbnail:
+                    thumbnail.show()
+            self.effects.submit(restored)
 
     def on_foreground_changed(self, hwnd):
-        print(f"Window {hwnd} reordered")
+        log_debug("Window %s reordered", hwnd)
         # For now, just refresh layout
-        with self._lock:
-            if hwnd in self._windows:
-                print(f"Fixing order for window {hwnd}")
-                win = self._windows[hwnd]
-                winwin = cast(WinWindow, win.data)
-                if winwin.thumbnail:
-                    winwin.thumbnail.fixorder()
+        if hwnd in self._windows:
+            log_debug("Fixing order for window %s", hwnd)
+            win = self._windows[hwnd]
+            winwin = cast(WinWindow, win.data)
+            if winwin.thumbnail:
+                self.effects.submit(winwin.thumbnail.fixorder)
+
+    def create_input_source(self):
+        return MouseHookInputSource()
 
     def stop(self):
-        for window in self._windows.values():
-            win = cast(WinWindow, window.data)
-            if win.thumbnail:
-                remove_cloaking_thumbnail(window.id, win.thumbnail)
+        # Read here, on the loop; the job below only gets the list
+        thumbnails = [(window.id, cast(WinWindow, window.data).thumbnail) for window in self._windows
+                      if cast(WinWindow, window.data).thumbnail is not None]
+        def uncloak():
+            for hwnd, thumbnail in thumbnails:
+                remove_cloaking_thumbnail(hwnd, thumbnail, self._proxies)
+            self._overview.apply(OverviewChanges(hidden=self._overview.ids()))
+            if self._backdrop is not None:
+                self._backdrop.close()
+            self._proxies.clear()
+        # The proxies belong to the watcher thread, so that's where they have to be destroyed
+        uncloaked = threading.Event()
+        self.effects.submit(uncloak)
+        self.effects.submit(uncloaked.set)
+        if not uncloaked.wait(timeout=2.0):
+            log_error("Timed out restoring windows")
         
-        print("Cleanly stopped WindowsAdapter.")
+        stats = self.scheduler.stats
+        log_info(f"Refreshes: {stats.requests} requested, {stats.flushes} laid out, {stats.coalesced} coalesced")
+        log_info(f"Window classification: {classifier.hits} cached, {classifier.misses} classified")
+        events = self.events.stats
+        log_info(f"Window events: {events.pushed} received, {events.delivered} handled, {events.max_depth} max queued")
+        inbox = self.inbox.stats
+        log_info(f"Messages from the watcher: {inbox.handled} handled, {inbox.max_depth} max queued, {inbox.max_wait * 1000:.1f}ms max wait")
+        effects = self.effects.stats
+        log_info(f"Side effects: {effects.completed} ran, {effects.failed} failed, {effects.max_depth} max queued")
+        proxies = self._proxies.stats
+        log_info(f"Proxy thumbnails: {proxies.created} created, {proxies.reused} reused, {proxies.destroyed} destroyed")
+        animation = self._animator.stats
+        log_info(f"Animation: {animation.frames} frames, {animation.dropped} dropped, {animation.max_frame_time * 1000:.1f}ms slowest")
+        log_info(f"Proxy updates: {thumbnail_stats.issued} sent, {thumbnail_stats.skipped} skipped as unchanged")
+        visibility = self._visibility.stats
+        log_info(f"Window states: {visibility.restored} restored, {visibility.parked} parked, {visibility.minimized} minimized, {visibility.unchanged} left alone")
+        log_info("Cleanly stopped WindowsAdapter.")
         
         try:
             self._watcher.stop()
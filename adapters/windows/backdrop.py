@@ -0,0 +1,107 @@
+# adapters/windows/backdrop.py
+import ctypes
+from typing import Callable
+import win32api
+import win32con
+import win32gui
+
+from core.models import Rect
+from log import log_error
+
+CLASS_NAME = "OverviewBackdropClass"
+BACKDROP_COLOR = win32api.RGB(24, 24, 24)
+# Above every normal window; the overview's thumbnails go on top of it
+SHOW_FLAGS = win32con.SWP_NOACTIVATE | win32con.SWP_SHOWWINDOW
+
+# Called on the watcher thread with the screen position of a click
+ClickCallback = Callable[[int, int], None]
+
+_backdrops: dict[int, "OverviewBackdrop"] = {}
+
+class_registered = False
+def register_class_if_needed():
+    global class_registered
+    if class_registered:
+        return
+
+    wc = win32gui.WNDCLASS()
+    wc.hInstance = win32gui.GetModuleHandle(None) # type: ignore
+    wc.lpszClassName = CLASS_NAME # type: ignore
+    wc.hbrBackground = win32gui.CreateSolidBrush(BACKDROP_COLOR) # type: ignore
+    wc.hCursor = win32gui.LoadCursor(0, win32con.IDC_ARROW) # type: ignore
+    wc.lpfnWndProc = { # type: ignore
+        win32con.WM_LBUTTONDOWN: on_click,
+        win32con.WM_DESTROY: on_destroy,
+    }
+    win32gui.RegisterClass(wc)
+
+    class_registered = True
+
+def on_click(hwnd, msg, wparam, lparam):
+    backdrop = _backdrops.get(hwnd)
+    if backdrop is not None:
+        # Client coordinates, signed
+        x = ctypes.c_short(lparam & 0xFFFF).value
+        y = ctypes.c_short((lparam >> 16) & 0xFFFF).value
+        backdrop.on_click(*win32gui.ClientToScreen(hwnd, (x, y)))
+    return 0
+
+def on_destroy(hwnd, msg, wparam, lparam):
+    backdrop = _backdrops.pop(hwnd, None)
+    if backdrop is not None:
+        backdrop.hwnd = 0
+    return 0
+
+class OverviewBackdrop:
+    """
+    A plain window covering the monitor behind the overview's thumbnails, so the windows
+    underneath don't show through the gaps. It takes every click in the overview (thumbnails let
+    clicks through to it) and hands their screen position to `on_click`.
+    Created, shown and hidden on the watcher thread, like the thumbnails.
+    """
+
+    hwnd: int
+    on_click: ClickCallback
+    # Where it's covering, if it's shown
+    rect: Rect | None
+
+    def __init__(self, on_click: ClickCallback):
+        self.on_click = on_click
+        self.rect = None
+
+        register_class_if_needed()
+        self.hwnd = win32gui.CreateWindowEx(
+            win32con.WS_EX_TOOLWINDOW | win32con.WS_EX_TOPMOST,
+            CLASS_NAME,
+            "Overview",
+            win32con.WS_POPUP,
+            0, 0, 1, 1,
+            0,
+            0,
+            win32gui.GetModuleHandle(None),
+            None
+        )
+        _backdrops[self.hwnd] = self
+
+    def show(self, rect: Rect):
+        if self.hwnd == 0 or rect == self.rect:
+            return
+        try:
+            win32gui.SetWindowPos(self.hwnd, win32con.HWND_TOPMOST, *rect.sized(), SHOW_FLAGS)
+            self.rect = rect
+        except Exception as e:
+            log_error("Failed to show the overview backdrop: %s", e)
+
+    def hide(self):
+        if self.hwnd == 0 or self.rect is None:
+            return
+        win32gui.ShowWindow(self.hwnd, win32con.SW_HIDE)
+        self.rect = None
+
+    def close(self):
+        if self.hwnd != 0:
+            try:
+                win32gui.DestroyWindow(self.hwnd)
+            except Exception as e:
+                log_error("Failed to destroy the overview backdrop: %s", e)
+            self.hwnd = 0
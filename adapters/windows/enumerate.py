@@ -1,106 +1,92 @@
 # adapters/windows/enumerator.py
 import ctypes
-from typing import Tuple
+from functools import cached_property
 import win32gui
 import win32process
 import win32api
 import win32con
 
-# This is all very hacky, but the best I could come up with for now
-BLACKLISTED_WINDOWS: list[Tuple[str, str]] = [
-    ("Windows.UI.Core.CoreWindow", "Cortana"),
-    ("ApplicationFrameWindow", "Cortana"),
-    ("Windows.UI.Core.CoreWindow", "Media Player"),
-    ("ApplicationFrameWindow", "Media Player"),
-    ("Windows.UI.Core.CoreWindow", "Microsoft Text Input Application"),
-    ("Windows.UI.Core.CoreWindow", "News and interests"),
-    ("Windows.UI.Core.CoreWindow", "Widgets"),
-    ("Windows.UI.Core.CoreWindow", "Windows Shell Experience Host"),
-    
-    ("Progman", "Program Manager"),
-    ("Shell_TrayWnd", "Taskbar"),
-    ("Button", "Start"),
-    ("DV2ControlHost", "SearchBox"),
-    
-]
+from adapters.windows.metadata import get_window_title
+from adapters.windows.rules import BLACKLISTED_WINDOWS, ClassificationCache, compile_rules
+from log import log_warning
+
+DWMWA_CLOAKED = 14
 
 current_pid = win32api.GetCurrentProcessId()
 
-def is_manageable(hwnd: int) -> bool:
-    # Basic checks for top-level visible windows with titles
-    try:
-        if not win32gui.IsWindow(hwnd):
-            return False
-        
-        # Ignore hidden windows
-        if not win32gui.IsWindowVisible(hwnd):
-            return False
-        
-        if win32gui.GetWindow(hwnd, win32con.GW_OWNER) != 0:
-            return False
-        
-        style = win32gui.GetWindowLong(hwnd, win32con.GWL_STYLE)
-        ex_style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
+class WindowProbe:
+    "A window's attributes, each fetched from Win32 the first time a rule asks for it"
 
-        # Only standard top-level windows
-        if not (style & win32con.WS_OVERLAPPEDWINDOW):
-            return False
-        # Exclude non-app windows
-        if ex_style & win32con.WS_EX_TOOLWINDOW:
-            return False
+    def __init__(self, hwnd: int):
+        self.hwnd = hwnd
 
-        # Ignore this process' windows
-        _, window_pid = win32process.GetWindowThreadProcessId(hwnd)
-        if window_pid == current_pid:
-            return False
-        
-        # Ignore child windows
-        if win32gui.GetParent(hwnd):
-            return False
-        
-        # Ignore cloaked windows
+    @cached_property
+    def exists(self) -> bool:
+        return bool(win32gui.IsWindow(self.hwnd))
+
+    @cached_property
+    def visible(self) -> bool:
+        return bool(win32gui.IsWindowVisible(self.hwnd))
+
+    @cached_property
+    def owner(self) -> int:
+        return win32gui.GetWindow(self.hwnd, win32con.GW_OWNER)
+
+    @cached_property
+    def parent(self) -> int:
+        return win32gui.GetParent(self.hwnd)
+
+    @cached_property
+    def style(self) -> int:
+        return win32gui.GetWindowLong(self.hwnd, win32con.GWL_STYLE)
+
+    @cached_property
+    def ex_style(self) -> int:
+        return win32gui.GetWindowLong(self.hwnd, win32con.GWL_EXSTYLE)
+
+    @cached_property
+    def pid(self) -> int:
+        _, window_pid = win32process.GetWindowThreadProcessId(self.hwnd)
+        return window_pid
+
+    @cached_property
+    def class_name(self) -> str:
+        return win32gui.GetClassName(self.hwnd) or ""
+
+    @cached_property
+    def title(self) -> str:
+        return get_window_title(self.hwnd)
+
+    @cached_property
+    def cloaked(self) -> bool:
         try:
             cloaked = ctypes.c_int()
-            dwm_attr_size = ctypes.sizeof(cloaked)
-            DWMWA_CLOAKED = 14
             res = ctypes.windll.dwmapi.DwmGetWindowAttribute(
-                ctypes.c_void_p(hwnd),
+                ctypes.c_void_p(self.hwnd),
                 ctypes.c_uint(DWMWA_CLOAKED),
                 ctypes.byref(cloaked),
-                ctypes.c_uint(dwm_attr_size)
+                ctypes.c_uint(ctypes.sizeof(cloaked))
             )
-            if res == 0 and cloaked.value != 0:
-                return False
+            return res == 0 and cloaked.value != 0
         except Exception:
-            print("Failed to get DWM attribute")
-            pass
-        
-        style = win32gui.GetWindowLong(hwnd, win32con.GWL_STYLE)
-        if style & win32con.WS_CHILD:
+            log_warning("Failed to get DWM attribute", hwnd=self.hwnd)
             return False
-        
-        # Ignore always-on-top windows
-        ex_style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-        if ex_style & win32con.WS_EX_TOPMOST:
-            return False
-        
-        title = win32gui.GetWindowText(hwnd) or ""
-        class_name = win32gui.GetClassName(hwnd) or ""
-        
-        if (class_name, title) in BLACKLISTED_WINDOWS:
-            return False
-        
-        # ignore empty/titleless utility windows
-        return bool(title.strip())
-    except Exception:
-        return False
-
-def enumerate_top_level_windows() -> list[int]:
-    "Return a list of HWNDs for manageable windows"
+
+classifier = ClassificationCache(compile_rules(current_pid, BLACKLISTED_WINDOWS), WindowProbe)
+
+def is_manageable(hwnd: int) -> bool:
+    return classifier.is_manageable(hwnd)
+
+def enumerate_manageable_windows() -> list[WindowProbe]:
+    """
+    Every manageable top-level window, with the probe it was classified with.
+    Whatever the rules read is cached on the probe, so callers can use it instead of asking again.
+    """
     result = []
     def _cb(hwnd, lparam):
-        if is_manageable(hwnd):
-            result.append(hwnd)
+        probe = WindowProbe(hwnd)
+        if classifier.classify(hwnd, probe).manageable:
+            result.append(probe)
         return True
     win32gui.EnumWindows(_cb, None)
     return result
@@ -1,68 +1,82 @@
 # adapters/windows/layout.py
-import ctypes
-from ctypes.wintypes import RECT
-from typing import cast
+from typing import Callable
 import win32gui
 import win32con
-import math
 
 from log import log_error
 
-from .models import Rect
-from core.models import Workspace
+from adapters.windows.thumbnail.thumbnail_window import ThumbnailWindow
+from core.layout import LayoutPlan, WindowPlacement, proxy_geometry
+from core.trace import span, traced
+from core.visibility import VisibilityTracker
 
-def layout_workspace_windows(workspace: Workspace, work_rect: Rect, monitor_rect: Rect, gap_px: int):
-    """
-    Layout windows in `workspace` within `work_rect` (left,top,right,bottom).
-    Each window carries .width (float) meaning relative fraction of the workspace width.
-    We'll normalize widths to sum to 1. If only a single window, it gets the whole space.
+# Showing is the visibility tracker's job, so this only moves
+LAYOUT_FLAGS = win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE
+
+ProxyLookup = Callable[[int], ThumbnailWindow | None]
 
-    We respect `gap_px` around the edges and between windows.
+@traced()
+def apply_placements(changes: LayoutPlan, proxy_for: ProxyLookup, visibility: VisibilityTracker) -> LayoutPlan:
+    """
+    Send a set of changed placements to Windows.
+    Windows are first restored, parked or minimized if (and only if) their state has to change.
+    Visible windows and their proxy thumbnails are then moved in a single DeferWindowPos batch,
+    so there's one repaint instead of one per window. If the batch fails, we fall back
+    to moving them one at a time.
+    Returns the placements that were actually applied, so failed ones get retried on the next refresh.
     """
-    if not workspace.windows:
-        return
-    
-    workspace.layout_windows()
+    applied = LayoutPlan()
+    moves: list[WindowPlacement] = []
+    for p in changes:
+        # State changes can't be deferred
+        if not visibility.transition(p):
+            continue
+        if p.visible and p.rect is not None:
+            moves.append(p)
+        else:
+            applied.add(p)
 
-    # compute available rectangle (apply outer gap)
-    avail_w = work_rect.width() - 2 * gap_px
-    avail_h = work_rect.height() - 2 * gap_px
-    if avail_w <= 0 or avail_h <= 0:
-        return
+    if not moves:
+        return applied
 
-    # place windows left-to-right with inner gaps
-    screen_x = work_rect.left() + gap_px - int(avail_w * workspace.scroll_offset)
-    screen_y = work_rect.top() + gap_px
-    for idx, win in enumerate(workspace.windows):
-        w = math.floor(avail_w * win.width)
-        x = int(avail_w * win.x)
-        
-        rect = Rect(screen_x + x, screen_y, screen_x + x + w, screen_y + avail_h)
-        
-        # If the rectangle is totally outside of the monitor, hide the window
-        if not monitor_rect.intersects(rect):
-            
-            print(monitor_rect, rect)
-            try:
-                win32gui.ShowWindow(win.id, win32con.SW_MINIMIZE)
-            except Exception:
-                pass
-            continue
-        
-        try:
-            # # MoveWindow expects (hwnd, x, y, width, height, repaint)
-            # win32gui.MoveWindow(win.id, *rect.sized(), True)
-            # # ensure it's not minimized / hidden by us
-            # win32gui.ShowWindow(win.id, win32con.SW_RESTORE)
-            win32gui.SetWindowPos(
-                win.id,
-                win32con.HWND_TOP,
-                rect.left(),
-                rect.top(),
-                rect.width(),
-                rect.height(),
-                win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE | win32con.SWP_SHOWWINDOW
-            )
-        except Exception as e:
-            # ignore problematic windows for now
-            log_error(f"Failed to layout window {win.id}: {e}")
+    try:
+        # Room for every window plus its proxy
+        hdwp = win32gui.BeginDeferWindowPos(len(moves) * 2)
+        for p in moves:
+            assert p.rect is not None
+            hdwp = win32gui.DeferWindowPos(hdwp, p.id, win32con.HWND_TOP, *p.rect.sized(), LAYOUT_FLAGS)
+            hdwp = _defer_proxy(hdwp, p, proxy_for(p.id))
+        with span("EndDeferWindowPos"):
+            win32gui.EndDeferWindowPos(hdwp)
+        for p in moves:
+            applied.add(p)
+    except Exception as e:
+        log_error("Batched layout failed, moving windows one at a time: %s", e)
+        for p in moves:
+            if _apply_single(p, proxy_for(p.id)):
+                applied.add(p)
+
+    return applied
+
+def _defer_proxy(hdwp, p: WindowPlacement, proxy: ThumbnailWindow | None):
+    if proxy is None or p.rect is None or p.clip is None:
+        return hdwp
+    geometry = proxy_geometry(p.rect, p.clip)
+    if geometry is None:
+        return hdwp
+    return proxy.defer_update(hdwp, *geometry)
+
+def _apply_single(p: WindowPlacement, proxy: ThumbnailWindow | None) -> bool:
+    assert p.rect is not None
+    try:
+        win32gui.SetWindowPos(p.id, win32con.HWND_TOP, *p.rect.sized(), LAYOUT_FLAGS)
+    except Exception as e:
+        # ignore problematic windows for now
+        log_error("Failed to layout window %s: %s", p.id, e)
+        return False
+
+    if proxy is not None and p.clip is not None:
+        geometry = proxy_geometry(p.rect, p.clip)
+        if geometry is not None:
+            proxy.update(*geometry)
+    return True
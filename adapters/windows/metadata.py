@@ -0,0 +1,106 @@
+# adapters/windows/metadata.py
+import ctypes
+import ctypes.wintypes
+import os
+import win32con
+import win32gui
+import win32process
+
+from adapters.windows.models import WinWindow
+from adapters.windows.rules import WindowAttributes
+
+user32 = ctypes.windll.user32
+kernel32 = ctypes.windll.kernel32
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+MAX_TITLE = 512
+
+user32.InternalGetWindowText.argtypes = [ctypes.wintypes.HWND, ctypes.wintypes.LPWSTR, ctypes.c_int]
+user32.InternalGetWindowText.restype = ctypes.c_int
+
+def get_window_title(hwnd: int) -> str:
+    """
+    Read a window's title without sending it WM_GETTEXT.
+    GetWindowText waits on the target's message queue for windows owned by other processes,
+    so a hung application would stall whichever thread asked.
+    """
+    buf = ctypes.create_unicode_buffer(MAX_TITLE)
+    length = user32.InternalGetWindowText(hwnd, buf, MAX_TITLE)
+    return buf.value[:length]
+
+def get_process_name(pid: int) -> str:
+    "The executable name for a process, or an empty string if we aren't allowed to see it"
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return ""
+    try:
+        buf = ctypes.create_unicode_buffer(1024)
+        size = ctypes.wintypes.DWORD(len(buf))
+        if not kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+            return ""
+        return os.path.basename(buf.value)
+    finally:
+        kernel32.CloseHandle(handle)
+
+def read_styles(hwnd: int) -> tuple[int, int]:
+    "(style, ex_style)"
+    return (win32gui.GetWindowLong(hwnd, win32con.GWL_STYLE),
+            win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE))
+
+def load_metadata(winwin: WinWindow):
+    """
+    Fill in everything we cache about a window. Called once when we start managing it;
+    after that the cache is kept current by `refresh_title` and `refresh_styles` from window events.
+    """
+    hwnd = winwin.id
+    try:
+        winwin.class_name = win32gui.GetClassName(hwnd) or ""
+    except Exception:
+        pass
+    try:
+        _, winwin.pid = win32process.GetWindowThreadProcessId(hwnd)
+        winwin.process_name = get_process_name(winwin.pid)
+    except Exception:
+        pass
+    refresh_title(winwin)
+    refresh_styles(winwin)
+
+def load_metadata_from(winwin: WinWindow, attrs: WindowAttributes, process_names: dict[int, str]):
+    """
+    Like `load_metadata`, but from attributes already read while classifying the window.
+    `process_names` caches executable names by pid across calls, since most processes own several windows.
+    """
+    winwin.class_name = attrs.class_name
+    winwin.pid = attrs.pid
+    winwin.title = attrs.title
+    winwin.style, winwin.ex_style = attrs.style, attrs.ex_style
+    name = process_names.get(winwin.pid)
+    if name is None:
+        try:
+            name = get_process_name(winwin.pid)
+        except Exception:
+            name = ""
+        process_names[winwin.pid] = name
+    winwin.process_name = name
+
+def refresh_title(winwin: WinWindow) -> bool:
+    "Re-read the title after a NAMECHANGE. Returns whether it changed."
+    try:
+        title = get_window_title(winwin.id)
+    except Exception:
+        return False
+    if title == winwin.title:
+        return False
+    winwin.title = title
+    return True
+
+def refresh_styles(winwin: WinWindow) -> bool:
+    "Re-read the window styles after a state change. Returns whether they changed."
+    try:
+        styles = read_styles(winwin.id)
+    except Exception:
+        return False
+    if styles == (winwin.style, winwin.ex_style):
+        return False
+    winwin.style, winwin.ex_style = styles
+    return True
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from adapters.windows.thumbnail.thumbnail_window import ThumbnailWindow
+from core.layout import LayoutPlan
 from core.models import Rect
 
 @dataclass
@@ -17,4 +18,33 @@ class WinWindow:
     title: str
     rect: Rect
     
-    thumbnail: ThumbnailWindow | None = None
\ No newline at end of file
+    # Cached when we start managing the window and kept up to date from window events,
+    # so nothing has to ask the owning process (which may be hung) during a refresh
+    class_name: str = ""
+    pid: int = 0
+    process_name: str = ""
+    style: int = 0
+    ex_style: int = 0
+    
+    # Whether we want the window shown through a proxy; the proxy itself arrives a little later
+    cloaked: bool = False
+    thumbnail: ThumbnailWindow | None = None
+
+# Messages from the watcher thread to the asyncio loop
+
+@dataclass
+class ThumbnailReady:
+    "A window's proxy thumbnail was created"
+    hwnd: int
+    thumbnail: ThumbnailWindow
+
+@dataclass
+class OverviewClicked:
+    "The user clicked somewhere in the overview"
+    x: int
+    y: int
+
+@dataclass
+class LayoutFailed:
+    "Placements we committed to but Windows refused; they'll be retried on the next refresh"
+    placements: LayoutPlan
\ No newline at end of file
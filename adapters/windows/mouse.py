@@ -0,0 +1,87 @@
+# adapters/windows/mouse.py
+import asyncio
+import threading
+import ctypes
+import ctypes.wintypes
+
+from core.input import CrossingTracker, InputSource, MonitorCallback, MonitorSpatialIndex
+from log import log_error
+
+user32 = ctypes.windll.user32
+kernel32 = ctypes.windll.kernel32
+
+WH_MOUSE_LL = 14
+WM_MOUSEMOVE = 0x0200
+WM_QUIT = 0x0012
+
+class MSLLHOOKSTRUCT(ctypes.Structure):
+    _fields_ = [
+        ("pt", ctypes.wintypes.POINT),
+        ("mouseData", ctypes.wintypes.DWORD),
+        ("flags", ctypes.wintypes.DWORD),
+        ("time", ctypes.wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_void_p),
+    ]
+
+LowLevelMouseProc = ctypes.WINFUNCTYPE(
+    ctypes.wintypes.LPARAM,
+    ctypes.c_int,
+    ctypes.wintypes.WPARAM,
+    ctypes.wintypes.LPARAM
+)
+
+user32.CallNextHookEx.argtypes = [ctypes.wintypes.HHOOK, ctypes.c_int, ctypes.wintypes.WPARAM, ctypes.wintypes.LPARAM]
+user32.CallNextHookEx.restype = ctypes.wintypes.LPARAM
+user32.SetWindowsHookExW.argtypes = [ctypes.c_int, LowLevelMouseProc, ctypes.wintypes.HINSTANCE, ctypes.wintypes.DWORD]
+user32.SetWindowsHookExW.restype = ctypes.wintypes.HHOOK
+
+class MouseHookInputSource(InputSource):
+    """
+    Watches the cursor with a low-level mouse hook on its own thread.
+    The hook only does a spatial-index lookup per move and posts to the asyncio loop
+    when the cursor crosses onto another monitor; the hook has to return quickly
+    or Windows starts dropping it.
+    """
+
+    _thread: threading.Thread | None = None
+    _thread_id: int | None = None
+
+    def start(self, monitors: MonitorSpatialIndex, on_monitor_entered: MonitorCallback):
+        loop = asyncio.get_running_loop()
+        tracker = CrossingTracker(monitors)
+        started = threading.Event()
+
+        def run():
+            self._thread_id = kernel32.GetCurrentThreadId()
+
+            def proc(n_code, w_param, l_param):
+                if n_code >= 0 and w_param == WM_MOUSEMOVE:
+                    info = ctypes.cast(l_param, ctypes.POINTER(MSLLHOOKSTRUCT)).contents
+                    monitor = tracker.feed(info.pt.x, info.pt.y)
+                    if monitor is not None:
+                        loop.call_soon_threadsafe(on_monitor_entered, monitor)
+                return user32.CallNextHookEx(None, n_code, w_param, l_param)
+
+            # Keep a reference so the callback isn't garbage collected while hooked
+            self._proc = LowLevelMouseProc(proc)
+            hook = user32.SetWindowsHookExW(WH_MOUSE_LL, self._proc, kernel32.GetModuleHandleW(None), 0)
+            started.set()
+            if not hook:
+                log_error("Failed to install low-level mouse hook")
+                return
+
+            msg = ctypes.wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+
+            user32.UnhookWindowsHookEx(hook)
+
+        self._thread = threading.Thread(target=run, name="MouseHook", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self):
+        if self._thread_id is not None:
+            user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread_id = None
@@ -0,0 +1,154 @@
+# adapters/windows/rules.py
+# Deciding which top-level windows we manage. Nothing in here talks to Win32 directly:
+# rules read attributes off any object that has them (a live probe, or a recorded fixture),
+# so the rules can be tested anywhere.
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Protocol
+
+# From win32con, duplicated so this module doesn't need pywin32
+WS_OVERLAPPEDWINDOW = 0x00CF0000
+WS_CHILD = 0x40000000
+WS_EX_TOOLWINDOW = 0x00000080
+WS_EX_TOPMOST = 0x00000008
+
+# This is all very hacky, but the best I could come up with for now
+BLACKLISTED_WINDOWS: frozenset[tuple[str, str]] = frozenset([
+    ("Windows.UI.Core.CoreWindow", "Cortana"),
+    ("ApplicationFrameWindow", "Cortana"),
+    ("Windows.UI.Core.CoreWindow", "Media Player"),
+    ("ApplicationFrameWindow", "Media Player"),
+    ("Windows.UI.Core.CoreWindow", "Microsoft Text Input Application"),
+    ("Windows.UI.Core.CoreWindow", "News and interests"),
+    ("Windows.UI.Core.CoreWindow", "Widgets"),
+    ("Windows.UI.Core.CoreWindow", "Windows Shell Experience Host"),
+
+    ("Progman", "Program Manager"),
+    ("Shell_TrayWnd", "Taskbar"),
+    ("Button", "Start"),
+    ("DV2ControlHost", "SearchBox"),
+])
+
+class WindowAttributes(Protocol):
+    "Everything the rules may look at. A live probe fetches each one only when a rule first reads it."
+    exists: bool
+    visible: bool
+    owner: int
+    parent: int
+    style: int
+    ex_style: int
+    pid: int
+    class_name: str
+    title: str
+    cloaked: bool
+
+@dataclass(frozen=True)
+class RecordedWindow:
+    "A snapshot of a window's attributes, for fixtures and replay"
+    exists: bool = True
+    visible: bool = True
+    owner: int = 0
+    parent: int = 0
+    style: int = WS_OVERLAPPEDWINDOW
+    ex_style: int = 0
+    pid: int = 1
+    class_name: str = ""
+    title: str = ""
+    cloaked: bool = False
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    # True if a window should be rejected
+    rejects: Callable[[WindowAttributes], bool]
+    # Rough relative cost of the attributes it reads; cheaper rules run first
+    cost: int
+
+@dataclass(frozen=True)
+class Verdict:
+    manageable: bool
+    # The rule that rejected the window, if any
+    rule: Optional[str] = None
+
+MANAGEABLE = Verdict(True)
+
+class RuleSet:
+    "An ordered list of rules. The first one that rejects a window decides."
+
+    rules: list[Rule]
+
+    def __init__(self, rules: Iterable[Rule]):
+        # Stable, so equal-cost rules keep the order they were written in
+        self.rules = sorted(rules, key=lambda rule: rule.cost)
+
+    def classify(self, attrs: WindowAttributes) -> Verdict:
+        for rule in self.rules:
+            if rule.rejects(attrs):
+                return Verdict(False, rule.name)
+        return MANAGEABLE
+
+def compile_rules(own_pid: int, blacklist: Iterable[tuple[str, str]] = BLACKLISTED_WINDOWS) -> RuleSet:
+    blacklisted = frozenset(blacklist)
+    return RuleSet([
+        # Reading our own window data (no cross-process calls)
+        Rule("gone", lambda w: not w.exists, cost=0),
+        Rule("hidden", lambda w: not w.visible, cost=1),
+        # Only standard top-level windows
+        Rule("not_overlapped", lambda w: not (w.style & WS_OVERLAPPEDWINDOW), cost=1),
+        Rule("child", lambda w: bool(w.style & WS_CHILD), cost=1),
+        # Exclude non-app windows
+        Rule("tool_window", lambda w: bool(w.ex_style & WS_EX_TOOLWINDOW), cost=1),
+        # Ignore always-on-top windows
+        Rule("topmost", lambda w: bool(w.ex_style & WS_EX_TOPMOST), cost=1),
+        Rule("owned", lambda w: w.owner != 0, cost=2),
+        Rule("has_parent", lambda w: w.parent != 0, cost=2),
+        # Ignore this process' windows
+        Rule("own_process", lambda w: w.pid == own_pid, cost=2),
+        # Strings have to be copied out
+        Rule("blacklisted", lambda w: (w.class_name, w.title) in blacklisted, cost=3),
+        # Ignore empty/titleless utility windows
+        Rule("untitled", lambda w: not w.title.strip(), cost=3),
+        # A round trip to DWM
+        Rule("cloaked", lambda w: w.cloaked, cost=5),
+    ])
+
+class ClassificationCache:
+    """
+    Verdicts per hwnd, so a window that fires CREATE, SHOW and then our own re-check
+    is only classified once. Whatever can change a verdict (style, visibility, cloaking, title)
+    must call `invalidate`.
+    """
+
+    hits: int
+    misses: int
+    _verdicts: dict[int, Verdict]
+
+    def __init__(self, rules: RuleSet, probe: Callable[[int], WindowAttributes]):
+        self.rules = rules
+        self._probe = probe
+        self._verdicts = {}
+        self.hits = 0
+        self.misses = 0
+
+    def classify(self, hwnd: int, attrs: Optional[WindowAttributes] = None) -> Verdict:
+        "Pass `attrs` to classify with (and keep) a probe of your own instead of a fresh one"
+        verdict = self._verdicts.get(hwnd)
+        if verdict is not None:
+            self.hits += 1
+            return verdict
+        self.misses += 1
+        try:
+            verdict = self.rules.classify(attrs if attrs is not None else self._probe(hwnd))
+        except Exception:
+            # Most likely the window went away while we were looking at it; don't remember that
+            return Verdict(False, "error")
+        self._verdicts[hwnd] = verdict
+        return verdict
+
+    def is_manageable(self, hwnd: int) -> bool:
+        return self.classify(hwnd).manageable
+
+    def invalidate(self, hwnd: int):
+        self._verdicts.pop(hwnd, None)
+
+    def clear(self):
+        self._verdicts.clear()
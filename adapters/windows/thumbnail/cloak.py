@@ -4,12 +4,16 @@ import win32con
 from adapters.windows.models import WinWindow
 from adapters.windows.thumbnail.thumbnail_window import ThumbnailWindow
 from core.models import Rect
+from core.pool import ProxyPool
 from log import log_error
 
-def create_cloaking_thumbnail(hwnd: int, rect: Rect) -> ThumbnailWindow:
-    # Create thumbnail
-    src_rect = Rect(0, 0, rect[2] - rect[0], rect[3] - rect[1])
-    thumbnail = ThumbnailWindow(hwnd, src_rect, (rect[0], rect[1]))
+def create_cloaking_thumbnail(hwnd: int, src_rect: Rect, pos: tuple[int, int], pool: ProxyPool[ThumbnailWindow]) -> ThumbnailWindow | None:
+    # Get a thumbnail showing `src_rect` of the window at `pos`, reusing a pooled one if we can
+    thumbnail = pool.acquire(hwnd, src_rect, pos)
+    if thumbnail is None:
+        # Too many proxies already; leave this window as it is
+        log_error("No proxy available for window %s, not cloaking it", hwnd)
+        return None
     
     try:
         # Hide the original but maintain mouse interactivity by settings its opacity to 0 and making it layered
@@ -18,20 +22,25 @@ def create_cloaking_thumbnail(hwnd: int, rect: Rect) -> ThumbnailWindow:
         alpha = 1
         win32gui.SetLayeredWindowAttributes(hwnd, 0, alpha, win32con.LWA_ALPHA)
     except Exception as e:
-        thumbnail.close()
-        log_error(f"Failed to cloak window {hwnd}: {e}")
+        pool.release(thumbnail)
+        log_error("Failed to cloak window %s: %s", hwnd, e)
+        return None
     
     return thumbnail
 
-def remove_cloaking_thumbnail(hwnd: int, thumbnail: ThumbnailWindow):
+def remove_cloaking_thumbnail(hwnd: int, thumbnail: ThumbnailWindow, pool: ProxyPool[ThumbnailWindow]):
     # Restore original window opacity and remove thumbnail
     alpha = 255
     try:
         win32gui.SetLayeredWindowAttributes(hwnd, 0, alpha, win32con.LWA_ALPHA)
     except Exception as e:
-        log_error(f"Failed to restore window {hwnd} opacity: {e}")
+        log_error("Failed to restore window %s opacity: %s", hwnd, e)
     
-    exstyle = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
-    win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, exstyle & ~win32con.WS_EX_LAYERED)
-    
-    thumbnail.close()
\ No newline at end of file
+    try:
+        exstyle = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
+        win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, exstyle & ~win32con.WS_EX_LAYERED)
+    except Exception as e:
+        log_error("Failed to restore window %s style: %s", hwnd, e)
+    finally:
+        # Whatever happened to the window, or the pool would count the proxy as in use forever
+        pool.release(thumbnail)
\ No newline at end of file
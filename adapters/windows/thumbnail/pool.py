@@ -0,0 +1,24 @@
+from adapters.windows.thumbnail.thumbnail_window import ThumbnailWindow
+from core.models import Rect
+from core.pool import ProxyBackend
+
+class ThumbnailBackend(ProxyBackend[ThumbnailWindow]):
+    "DWM thumbnail windows. Everything here has to run on the thread that owns them (the watcher)."
+
+    def create(self) -> ThumbnailWindow:
+        return ThumbnailWindow(0, Rect(0, 0, 1, 1), (0, 0))
+
+    def attach(self, proxy: ThumbnailWindow, source: int, src_rect: Rect, pos: tuple[int, int], size: tuple[int, int] | None = None):
+        proxy.attach(source, src_rect, pos, size)
+
+    def move(self, proxy: ThumbnailWindow, src_rect: Rect, pos: tuple[int, int], size: tuple[int, int] | None = None):
+        proxy.update(src_rect, pos, size)
+
+    def park(self, proxy: ThumbnailWindow):
+        proxy.park()
+
+    def destroy(self, proxy: ThumbnailWindow):
+        proxy.close()
+
+    def alive(self, proxy: ThumbnailWindow) -> bool:
+        return proxy.hwnd != 0
@@ -2,8 +2,10 @@ import win32gui
 import win32con
 import ctypes
 from ctypes.wintypes import RECT
+from dataclasses import dataclass
 
 from core.models import Rect
+from core.trace import traced
 from log import log_error
 
 user32 = ctypes.windll.user32
@@ -24,6 +26,8 @@ class DWM_THUMBNAIL_PROPERTIES(ctypes.Structure):
     ]
     
 CLASS_NAME = "ThumbnailWindowClass"
+# Flags for moving the thumbnail along with its source window
+POSITION_FLAGS = win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE | win32con.SWP_NOREDRAW | win32con.SWP_NOOWNERZORDER | win32con.SWP_NOSENDCHANGING
 # No border/window decorations
 WINDOW_STYLE = win32con.WS_VISIBLE | win32con.WS_POPUP
 
@@ -40,7 +44,8 @@ def register_class_if_needed():
     wc.lpszClassName = CLASS_NAME # type: ignore
     wc.style = win32con.CS_HREDRAW | win32con.CS_VREDRAW # type: ignore
     message_map = {
-        win32con.WM_DESTROY: on_destroy
+        win32con.WM_DESTROY: on_destroy,
+        win32con.WM_NCHITTEST: on_hit_test,
     }
     wc.lpfnWndProc = message_map # type: ignore
     win32gui.RegisterClass(wc)
@@ -49,6 +54,26 @@ def register_class_if_needed():
 
 thumbnail_windows: dict[int, "ThumbnailWindow"] = {}
 
+@dataclass
+class ThumbnailStats:
+    # DWM property updates and window moves we actually sent
+    issued: int = 0
+    # ...and the ones we didn't, because nothing had changed
+    skipped: int = 0
+
+    def count(self, issued: bool):
+        if issued:
+            self.issued += 1
+        else:
+            self.skipped += 1
+
+# Across every thumbnail, including ones that have been destroyed
+total_stats = ThumbnailStats()
+
+def on_hit_test(hwnd, msg, wparam, lparam):
+    # Never take clicks ourselves. In the overview they go through to the backdrop, which is on the same thread.
+    return win32con.HTTRANSPARENT
+
 def on_destroy(hwnd, msg, wparam, lparam):
     if hwnd in thumbnail_windows:
         thumbnail_windows[hwnd].on_destroy()
@@ -61,11 +86,16 @@ class ThumbnailWindow:
     """
     A wrapper for a win32 DWM thumbnail window.
     opens a window that displays a section of another window's content.
+    With no source window it starts out hidden, waiting to be attached to one (see `ProxyPool`).
     """
     
     hwnd_src: int
+    # What DWM and the window were last told, so updates can skip whatever didn't change
     src_rect: Rect
     self_pos: tuple[int, int]
+    # How big to draw it; the source's own size unless it's being scaled (e.g. in the overview)
+    dest_size: tuple[int, int] | None = None
+    stats: ThumbnailStats
     
     thumbnail_id: ctypes.c_void_p | None = None
     hwnd: int
@@ -74,10 +104,12 @@ class ThumbnailWindow:
         self.hwnd_src = hwnd_src
         self.src_rect = src_rect
         self.self_pos = self_pos
+        self.stats = ThumbnailStats()
         
         self.create_window()
-        self.register_thumbnail()
-        self.fixorder()
+        if hwnd_src:
+            self.register_thumbnail()
+            self.fixorder()
     
     def create_window(self):
         # Create a simple window to host the thumbnail
@@ -90,7 +122,7 @@ class ThumbnailWindow:
             win32con.WS_EX_TOOLWINDOW,
             CLASS_NAME,
             "Thumbnail Window",
-            WINDOW_STYLE,
+            WINDOW_STYLE if self.hwnd_src else WINDOW_STYLE & ~win32con.WS_VISIBLE,
             self.self_pos[0],
             self.self_pos[1],
             self.src_rect.width(),
@@ -101,7 +133,8 @@ class ThumbnailWindow:
             None
         )
         
-        win32gui.ShowWindow(self.hwnd, win32con.SW_SHOW)
+        if self.hwnd_src:
+            win32gui.ShowWindow(self.hwnd, win32con.SW_SHOW)
         
         thumbnail_windows[self.hwnd] = self
     
@@ -114,7 +147,7 @@ class ThumbnailWindow:
             ctypes.c_void_p(self.hwnd_src),
             ctypes.byref(self.thumbnail_id)
         )
-        dest_rect = RECT(0, 0, self.src_rect.width(), self.src_rect.height())
+        dest_rect = RECT(0, 0, *self.size)
         source_rect = RECT(*self.src_rect)
         
         properties = DWM_THUMBNAIL_PROPERTIES()
@@ -134,29 +167,48 @@ class ThumbnailWindow:
             ctypes.byref(properties)
         )
     
-    def update(self, new_src: Rect, new_pos: tuple[int, int]):
-        self.src_rect = new_src
+    def unregister_thumbnail(self):
+        if self.thumbnail_id:
+            dwmapi.DwmUnregisterThumbnail(self.thumbnail_id)
+            self.thumbnail_id = None
+    
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.dest_size or (self.src_rect.width(), self.src_rect.height())
+    
+    @traced()
+    def attach(self, hwnd_src: int, src_rect: Rect, self_pos: tuple[int, int], dest_size: tuple[int, int] | None = None):
+        "Show a different source window, reusing this window instead of creating a new one"
+        self.unregister_thumbnail()
+        self.hwnd_src = hwnd_src
+        self.src_rect = src_rect
+        self.self_pos = self_pos
+        self.dest_size = dest_size
         
-        if self.hwnd == 0:
-            log_error("Thumbnail window handle is invalid.")
+        win32gui.SetWindowPos(
+            self.hwnd,
+            0,
+            self_pos[0],
+            self_pos[1],
+            *self.size,
+            POSITION_FLAGS
+        )
+        self.register_thumbnail()
+        self.show()
+        self.fixorder()
+    
+    def park(self):
+        "Hide and let go of the source window"
+        self.hide()
+        self.unregister_thumbnail()
+        self.hwnd_src = 0
+    
+    @traced()
+    def update(self, new_src: Rect, new_pos: tuple[int, int], dest_size: tuple[int, int] | None = None):
+        flags = self._update_properties(new_src, new_pos, dest_size)
+        if flags is None:
             return
         
-        if self.thumbnail_id:
-            dest_rect = RECT(0, 0, self.src_rect.width(), self.src_rect.height())
-            source_rect = RECT(*self.src_rect)
-            
-            properties = DWM_THUMBNAIL_PROPERTIES()
-            properties.dwFlags = (
-                DWM_TNP_RECTDESTINATION |
-                DWM_TNP_RECTSOURCE
-            )
-            properties.rcDestination = dest_rect
-            properties.rcSource = source_rect
-            dwmapi.DwmUpdateThumbnailProperties(
-                self.thumbnail_id,
-                ctypes.byref(properties)
-            )
-        
         # Adjust window size
         try:
             win32gui.SetWindowPos(
@@ -164,12 +216,80 @@ class ThumbnailWindow:
                 0,
                 new_pos[0],
                 new_pos[1],
-                self.src_rect.width(),
-                self.src_rect.height(),
-                win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE | win32con.SWP_NOREDRAW | win32con.SWP_NOOWNERZORDER | win32con.SWP_NOSENDCHANGING
+                *self.size,
+                flags
             )
         except Exception as e:
-            log_error(f"Failed to update thumbnail window position/size: {e}")
+            log_error("Failed to update thumbnail window position/size: %s", e)
+    
+    @traced()
+    def defer_update(self, hdwp, new_src: Rect, new_pos: tuple[int, int]):
+        """
+        Like `update`, but adds the window move to a BeginDeferWindowPos batch so it happens
+        together with the source window. Returns the new batch handle.
+        """
+        flags = self._update_properties(new_src, new_pos)
+        if flags is None:
+            return hdwp
+        
+        return win32gui.DeferWindowPos(
+            hdwp,
+            self.hwnd,
+            0,
+            new_pos[0],
+            new_pos[1],
+            *self.size,
+            flags
+        )
+    
+    def _update_properties(self, new_src: Rect, new_pos: tuple[int, int], dest_size: tuple[int, int] | None = None) -> int | None:
+        """
+        Send DWM only the thumbnail properties that changed.
+        Returns the SetWindowPos flags for moving/resizing the window, or None if it can stay where it is.
+        """
+        if self.hwnd == 0:
+            log_error("Thumbnail window handle is invalid.")
+            return None
+        
+        new_size = dest_size or (new_src.width(), new_src.height())
+        resized = new_size != self.size
+        moved = new_pos != self.self_pos
+        
+        dw_flags = 0
+        if resized:
+            dw_flags |= DWM_TNP_RECTDESTINATION
+        if new_src != self.src_rect:
+            dw_flags |= DWM_TNP_RECTSOURCE
+        
+        self.src_rect = new_src
+        self.self_pos = new_pos
+        self.dest_size = dest_size
+        
+        if self.thumbnail_id:
+            self._count(dw_flags != 0)
+            if dw_flags:
+                properties = DWM_THUMBNAIL_PROPERTIES()
+                properties.dwFlags = dw_flags
+                properties.rcDestination = RECT(0, 0, *new_size)
+                properties.rcSource = RECT(*new_src)
+                dwmapi.DwmUpdateThumbnailProperties(
+                    self.thumbnail_id,
+                    ctypes.byref(properties)
+                )
+        
+        self._count(resized or moved)
+        if not (resized or moved):
+            return None
+        flags = POSITION_FLAGS
+        if not resized:
+            flags |= win32con.SWP_NOSIZE
+        if not moved:
+            flags |= win32con.SWP_NOMOVE
+        return flags
+    
+    def _count(self, issued: bool):
+        self.stats.count(issued)
+        total_stats.count(issued)
     
     def fixorder(self):
         if self.hwnd != 0:
@@ -182,6 +302,16 @@ class ThumbnailWindow:
             )
             pass
     
+    def bring_to_front(self):
+        if self.hwnd != 0:
+            # Above every normal window, e.g. for the overview. The next fixorder() undoes this.
+            win32gui.SetWindowPos(
+                self.hwnd,
+                win32con.HWND_TOPMOST,
+                0, 0, 0, 0,
+                win32con.SWP_NOMOVE | win32con.SWP_NOSIZE | win32con.SWP_NOACTIVATE
+            )
+    
     def hide(self):
         if self.hwnd != 0:
             win32gui.ShowWindow(self.hwnd, win32con.SW_HIDE)
@@ -194,11 +324,9 @@ class ThumbnailWindow:
             try:
                 win32gui.DestroyWindow(self.hwnd)
             except Exception as e:
-                log_error(f"Failed to destroy thumbnail window: {e}")
+                log_error("Failed to destroy thumbnail window: %s", e)
             self.hwnd = 0
     
     def on_destroy(self):
-        if self.thumbnail_id:
-            dwmapi.DwmUnregisterThumbnail(self.thumbnail_id)
-            self.thumbnail_id = None
-            self.hwnd = 0
\ No newline at end of file
+        self.unregister_thumbnail()
+        self.hwnd = 0
\ No newline at end of file
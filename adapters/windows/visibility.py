@@ -0,0 +1,36 @@
+# adapters/windows/visibility.py
+import win32gui
+import win32con
+
+from core.trace import traced
+from core.visibility import VisibilityBackend, WindowState
+
+# Where parked windows go: the same place Windows puts minimized ones, off every monitor
+PARK_POSITION = (-32000, -32000)
+PARK_FLAGS = win32con.SWP_NOSIZE | win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE | win32con.SWP_NOOWNERZORDER
+
+class Win32Visibility(VisibilityBackend):
+    def probe(self, win_id: int) -> WindowState:
+        return WindowState.MINIMIZED if win32gui.IsIconic(win_id) else WindowState.SHOWN
+
+    @traced()
+    def restore(self, win_id: int):
+        win32gui.ShowWindow(win_id, win32con.SW_SHOWNOACTIVATE)
+
+    @traced()
+    def park(self, win_id: int):
+        if win32gui.IsIconic(win_id):
+            # Restore it with its normal position already out of sight, so it never shows up on screen
+            flags, _, min_pos, max_pos, normal = win32gui.GetWindowPlacement(win_id)
+            left, top = PARK_POSITION
+            parked = (left, top, left + normal[2] - normal[0], top + normal[3] - normal[1])
+            win32gui.SetWindowPlacement(win_id, (flags & ~win32con.WPF_RESTORETOMAXIMIZED, win32con.SW_SHOWNOACTIVATE,
+                                                 min_pos, max_pos, parked))
+            return
+        # Just a move, so the window doesn't repaint
+        win32gui.SetWindowPos(win_id, 0, *PARK_POSITION, 0, 0, PARK_FLAGS)
+
+    @traced()
+    def minimize(self, win_id: int):
+        # Unlike SW_MINIMIZE, this doesn't activate some other window on the way
+        win32gui.ShowWindow(win_id, win32con.SW_SHOWMINNOACTIVE)
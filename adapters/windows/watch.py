@@ -6,12 +6,12 @@ import win32api
 import win32con
 import ctypes
 import ctypes.wintypes
-import logging
 import queue
 
 import typing
 
-from adapters.windows.enumerate import is_manageable
+from adapters.windows.enumerate import classifier
+from core.events import EventKind
 if typing.TYPE_CHECKING:
     from adapters.windows.adapter import WindowsAdapter
 
@@ -75,6 +75,9 @@ EVENT_OBJECT_SHOW = 0x8002
 EVENT_OBJECT_HIDE = 0x8003
 EVENT_OBJECT_LOCATIONCHANGE = 0x800B
 EVENT_OBJECT_NAMECHANGE = 0x800C
+EVENT_OBJECT_STATECHANGE = 0x800A
+EVENT_OBJECT_CLOAKED = 0x8017
+EVENT_OBJECT_UNCLOAKED = 0x8018
 EVENT_OBJECT_REORDER = 0x8004
 EVENT_OBJECT_FOCUS = 0x8005
 
@@ -82,15 +85,36 @@ EVENT_SYSTEM_FOREGROUND = 0x0003
 EVENT_SYSTEM_MINIMIZESTART = 0x0016
 EVENT_SYSTEM_MINIMIZEEND = 0x0017
 
+INVALIDATING_EVENTS = frozenset([
+    EVENT_OBJECT_DESTROY,
+    EVENT_OBJECT_SHOW,
+    EVENT_OBJECT_HIDE,
+    EVENT_OBJECT_NAMECHANGE,
+    EVENT_OBJECT_STATECHANGE,
+    EVENT_OBJECT_CLOAKED,
+    EVENT_OBJECT_UNCLOAKED,
+])
+
+EVENT_KINDS = {
+    EVENT_OBJECT_CREATE: EventKind.CREATED,
+    EVENT_OBJECT_SHOW: EventKind.CREATED,
+    EVENT_OBJECT_DESTROY: EventKind.DESTROYED,
+    EVENT_OBJECT_HIDE: EventKind.DESTROYED,
+    EVENT_OBJECT_LOCATIONCHANGE: EventKind.MOVED,
+    EVENT_SYSTEM_FOREGROUND: EventKind.FOREGROUND,
+    EVENT_OBJECT_NAMECHANGE: EventKind.TITLE_CHANGED,
+    EVENT_OBJECT_STATECHANGE: EventKind.STYLE_CHANGED,
+    EVENT_SYSTEM_MINIMIZESTART: EventKind.MINIMIZED,
+    EVENT_SYSTEM_MINIMIZEEND: EventKind.RESTORED,
+}
+
 WINEVENT_OUTOFCONTEXT = 0x0000
 WINEVENT_SKIPOWNPROCESS = 0x0002
 
-log = logging.getLogger(__name__)
-
 class WinEventWatcher(threading.Thread):
     """
     runs a message loop and installs SetWinEventHook to observe window creation/show/destroy/hide.
-    calls callbacks on adapter when relevant top-level windows appear/disappear.
+    queues events for the adapter, which handles them on the asyncio loop.
     """
     
     adapter: "WindowsAdapter"
@@ -123,23 +147,13 @@ class WinEventWatcher(threading.Thread):
                 return
             if idObject != 0 or idChild != 0:
                 return
-            if event in (EVENT_OBJECT_CREATE, EVENT_OBJECT_SHOW):
-                if is_manageable(hwnd):
-                    log.debug(f"WinEventWatcher: Detected manageable window created/shown: {hwnd}")
-                    self.adapter.on_window_created(hwnd)
-            elif event in (EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE):
-                log.debug(f"WinEventWatcher: Detected window destroyed/hidden: {hwnd}")
-                self.adapter.on_window_destroyed(hwnd)
-            elif event == EVENT_OBJECT_LOCATIONCHANGE:
-                self.adapter.on_window_moved(hwnd)
-            elif event == EVENT_SYSTEM_FOREGROUND:
-                self.adapter.on_foreground_changed(hwnd)
-            elif event == EVENT_OBJECT_NAMECHANGE:
-                self.adapter.on_window_title_changed(hwnd)
-            elif event == EVENT_SYSTEM_MINIMIZESTART:
-                self.adapter.on_window_minimized(hwnd)
-            elif event == EVENT_SYSTEM_MINIMIZEEND:
-                self.adapter.on_window_restored(hwnd)
+            if event in INVALIDATING_EVENTS:
+                # Anything that could change whether we'd manage this window
+                classifier.invalidate(hwnd)
+            # The system waits for us to return, so all we do here is queue the event for the asyncio loop
+            kind = EVENT_KINDS.get(event)
+            if kind is not None:
+                self.adapter.events.push(kind, hwnd)
 
         # Set hooks for relevant events
         def listen(event: int):
@@ -151,12 +165,18 @@ class WinEventWatcher(threading.Thread):
         listen(EVENT_OBJECT_HIDE)
         listen(EVENT_OBJECT_LOCATIONCHANGE)
         listen(EVENT_OBJECT_NAMECHANGE)
+        listen(EVENT_OBJECT_STATECHANGE)
+        listen(EVENT_OBJECT_CLOAKED)
+        listen(EVENT_OBJECT_UNCLOAKED)
         # listen(EVENT_OBJECT_REORDER)
         # listen(EVENT_OBJECT_FOCUS)
         listen(EVENT_SYSTEM_FOREGROUND)
         listen(EVENT_SYSTEM_MINIMIZESTART)
         listen(EVENT_SYSTEM_MINIMIZEEND)
 
+        # Anything queued before we had a thread id never got a wakeup message
+        self._run_queued()
+
         # Message loop
         msg = ctypes.wintypes.MSG()
         while self._running.is_set():
@@ -167,12 +187,7 @@ class WinEventWatcher(threading.Thread):
                 break
             else:
                 if msg.message == win32con.WM_USER + 1:
-                    while self._call_queue.qsize() > 0:
-                        try:
-                            func = self._call_queue.get_nowait()
-                            func()
-                        except queue.Empty:
-                            break
+                    self._run_queued()
                 else:
                     user32.TranslateMessage(ctypes.byref(msg))
                     user32.DispatchMessageW(ctypes.byref(msg))
@@ -182,13 +197,23 @@ class WinEventWatcher(threading.Thread):
             UnhookWinEvent(hook)
         self.hooks.clear()
 
+    def _run_queued(self):
+        while self._call_queue.qsize() > 0:
+            try:
+                func = self._call_queue.get_nowait()
+                func()
+            except queue.Empty:
+                break
+
     def stop(self):
-        # Post a quit message to the thread's message loop
+        self._running.clear()
+        # Quit the watcher's message loop. (PostQuitMessage would quit the loop of whichever thread called this.)
+        if self._thread_id is None:
+            return
         try:
-            win32gui.PostQuitMessage(0)
+            win32gui.PostThreadMessage(self._thread_id, win32con.WM_QUIT, 0, 0)
         except Exception:
             pass
-        self._running.clear()
 
     def run_on_thread(self, func: Callable):
         """
@@ -0,0 +1,74 @@
+"""
+Times every window manager operation on synthetic desktops of increasing size, through the fake adapter,
+so it runs anywhere (no pywin32 needed).
+
+    python -m bench                      # run, write bench_output.json and compare against bench/baseline.json
+    python -m bench --quick              # fewer repeats, no huge desktop
+    python -m bench --save-baseline      # make this run the new baseline
+    python -m bench --trace trace.json   # also record spans, for a breakdown of where the time goes
+"""
+import argparse
+import os
+import sys
+
+from bench.desktop import DESKTOPS
+from bench.suite import OPERATIONS, compare, load, report, run, save
+from core.trace import tracer
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Window manager benchmarks")
+    parser.add_argument("--out", default="bench_output.json", help="Where to write the results")
+    parser.add_argument("--baseline", default=BASELINE, help="Results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline too")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per operation per desktop")
+    parser.add_argument("--quick", action="store_true", help="50 calls each and skip the largest desktop")
+    parser.add_argument("--only", default="", help="Comma separated operations to run")
+    parser.add_argument("--trace", metavar="PATH", help="Record spans and write a Chrome trace to PATH (slows everything down)")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="How many times slower than the baseline counts as a regression")
+    args = parser.parse_args()
+
+    desktops = DESKTOPS[:-1] if args.quick else DESKTOPS
+    repeat = 50 if args.quick else args.repeat
+    operations = OPERATIONS
+    if args.only:
+        wanted = set(args.only.split(","))
+        unknown = wanted - {op.name for op in OPERATIONS}
+        if unknown:
+            parser.error(f"Unknown operations: {', '.join(sorted(unknown))}")
+        operations = [op for op in OPERATIONS if op.name in wanted]
+
+    if args.trace:
+        tracer.enable()
+    results = run(desktops, operations, repeat, progress=lambda line: print(line, file=sys.stderr))
+    save(results, args.out)
+    report(results)
+    print(f"Results written to {args.out}")
+    if args.trace:
+        tracer.write_chrome_trace(args.trace)
+        print(tracer.summary())
+        print(f"Trace written to {args.trace}")
+        # Traced timings aren't comparable with anything
+        return 0
+
+    if args.save_baseline:
+        save(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to make one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"No regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from itertools import cycle
+
+from core.models import Monitor, Rect, Window, Workspace
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+# The widths people actually use, so strips aren't uniform
+WIDTHS = [0.5, 0.4, 0.6, 1.0, 0.5, 0.3]
+
+@dataclass(frozen=True)
+class Desktop:
+    "The shape of a synthetic desktop"
+    name: str
+    monitors: int
+    # Per monitor
+    workspaces: int
+    # In total, spread evenly over every workspace
+    windows: int
+
+    def build(self) -> list[Monitor]:
+        """
+        Monitors side by side, each with `workspaces` workspaces. Window ids start at 1 and go up
+        in workspace order. Every monitor is focused on its middle workspace, on its middle window,
+        so operations in either direction have room to move.
+        """
+        widths = cycle(WIDTHS)
+        total_workspaces = self.monitors * self.workspaces
+        next_id = 1
+        monitors = []
+        for mi in range(self.monitors):
+            workspaces = []
+            for wi in range(self.workspaces):
+                # Spread the remainder over the first few workspaces
+                n = self.windows // total_workspaces + (1 if mi * self.workspaces + wi < self.windows % total_workspaces else 0)
+                windows = [Window(next_id + i, width=next(widths)) for i in range(n)]
+                next_id += n
+                workspaces.append(Workspace(windows=windows))
+
+            left = mi * SCREEN_WIDTH
+            mon = Monitor(workspaces=workspaces, rect=Rect(left, 0, left + SCREEN_WIDTH, SCREEN_HEIGHT))
+            mid = workspaces[len(workspaces) // 2]
+            mon._focused_workspace = mid.id
+            if mid.windows:
+                mid.focus_position(len(mid.windows) // 2)
+            monitors.append(mon)
+        return monitors
+
+# Smallest to largest; growth between consecutive sizes is what catches superlinear operations
+DESKTOPS = [
+    Desktop("tiny", monitors=1, workspaces=3, windows=12),
+    Desktop("small", monitors=2, workspaces=6, windows=120),
+    Desktop("medium", monitors=4, workspaces=12, windows=500),
+    Desktop("large", monitors=6, workspaces=24, windows=2000),
+    Desktop("huge", monitors=8, workspaces=48, windows=8000),
+]
@@ -0,0 +1,160 @@
+"""
+Feeds a capture recorded with `main.py --record` back through the window manager on the fake adapter,
+so it runs anywhere (no pywin32 needed), and reports what each event and command cost.
+
+    python -m bench.replay capture.jsonl.gz                # as fast as possible
+    python -m bench.replay capture.jsonl.gz --realtime     # with the gaps between entries as recorded
+    python -m bench.replay capture.jsonl.gz --realtime --speed 4
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable
+
+from adapters.fake import FakeAdapter
+from core.events import EventKind
+from core.manager import WindowManager
+from core.models import Rect, Window
+from core.recorder import Capture, load_capture
+from core.trace import Histogram
+from ipc.commands import COMMANDS, Command, dispatch
+
+# Commands that reach outside the window manager, or would end the replay
+SKIPPED_COMMANDS = {"open", "exit", "restart_wm"}
+
+@dataclass
+class ReplayReport:
+    events: int = 0
+    commands: int = 0
+    # Entries that couldn't be replayed (unknown or skipped commands, events we don't replay)
+    skipped: int = 0
+    wall_time: float = 0.0
+    # Processing time per event kind ("event:MOVED"), per command ("command:focus_right"),
+    # and of the refresh at the end of each command batch ("refresh")
+    costs: dict[str, Histogram] = field(default_factory=dict)
+    # Platform calls the Windows adapter would have made, by call
+    platform_calls: Counter[str] = field(default_factory=Counter)
+
+    def summary(self) -> str:
+        rows = sorted(self.costs.items(), key=lambda item: item[1].total_ns, reverse=True)
+        width = max([len("entry")] + [len(key) for key, _ in rows])
+        lines = [
+            f"Replayed {self.events} events and {self.commands} commands in {self.wall_time:.3f}s ({self.skipped} skipped)",
+            f"{'entry':<{width}} {'count':>8} {'total ms':>10} {'mean us':>10} {'p95 us':>10} {'max us':>10}",
+        ]
+        for key, hist in rows:
+            lines.append(
+                f"{key:<{width}} {hist.count:>8} {hist.total_ns / 1e6:>10.2f} {hist.mean_ns / 1e3:>10.1f} "
+                f"{hist.percentile(95) / 1e3:>10.1f} {hist.max_ns / 1e3:>10.1f}"
+            )
+        total = sum(self.platform_calls.values())
+        calls = ", ".join(f"{name} {count}" for name, count in self.platform_calls.most_common())
+        lines.append(f"Platform calls: {total} ({calls})" if total else "Platform calls: none")
+        return "\n".join(lines)
+
+class Replayer:
+    """
+    Replays a capture into a fresh WindowManager. The fake adapter lays out on every refresh rather than
+    once per frame, so costs here are an upper bound on what the same sequence costs live.
+    """
+
+    capture: Capture
+    adapter: FakeAdapter
+    wm: WindowManager
+    _handlers: dict[str, Callable[[int, object], None]]
+
+    def __init__(self, capture: Capture):
+        self.capture = capture
+        self.adapter = FakeAdapter(monitors=capture.build_monitors())
+        self.wm = WindowManager(self.adapter)
+        # The same handling as the Windows adapter, minus the proxies
+        self._handlers = {
+            EventKind.CREATED.name: lambda hwnd, monitor: self.adapter.add_window(Window(hwnd), monitor or 0),
+            EventKind.DESTROYED.name: lambda hwnd, _: self.adapter.remove_window(hwnd),
+            EventKind.MOVED.name: lambda hwnd, rect: self.adapter.window_moved(hwnd, Rect(*rect)),
+            EventKind.MINIMIZED.name: lambda hwnd, _: self.adapter.window_minimized(hwnd),
+            EventKind.RESTORED.name: lambda hwnd, _: self.adapter.window_restored(hwnd),
+        }
+
+    def run(self, realtime: bool = False, speed: float = 1.0) -> ReplayReport:
+        "Replay every entry, as fast as possible or spaced out like they were recorded (`speed` times faster)"
+        report = ReplayReport()
+        start = time.perf_counter()
+        for entry in self.capture.entries:
+            if realtime:
+                delay = entry[1] / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            if entry[0] == "e":
+                self._replay_event(entry, report)
+            elif entry[0] == "c":
+                self._replay_commands(entry, report)
+            elif entry[0] == "m":
+                self._replay_monitor_entered(entry, report)
+            else:
+                report.skipped += 1
+        report.wall_time = time.perf_counter() - start
+        report.platform_calls.update(self.adapter.calls)
+        report.platform_calls.update(name for name, _ in self.adapter.visibility.backend.calls)
+        return report
+
+    def _replay_event(self, entry: list, report: ReplayReport):
+        _, _, kind, hwnd, data = entry
+        handler = self._handlers.get(kind)
+        if handler is None:
+            report.skipped += 1
+            return
+        begin = time.perf_counter_ns()
+        handler(hwnd, data)
+        _cost(report, f"event:{kind}", time.perf_counter_ns() - begin)
+        report.events += 1
+
+    def _replay_monitor_entered(self, entry: list, report: ReplayReport):
+        # So commands after it run against the monitor they did live
+        begin = time.perf_counter_ns()
+        self.wm.on_monitor_entered(entry[2])
+        _cost(report, "event:MONITOR_ENTERED", time.perf_counter_ns() - begin)
+        report.events += 1
+
+    def _replay_commands(self, entry: list, report: ReplayReport):
+        commands = []
+        for name, args, repeat in entry[2]:
+            if name in SKIPPED_COMMANDS or name not in COMMANDS:
+                report.skipped += 1
+                continue
+            commands.append(Command(name, args, repeat))
+        if not commands:
+            return
+        # Like run_batch, but each command is timed on its own, and the single refresh at the end separately
+        with self.adapter.scheduler.hold():
+            for cmd in commands:
+                begin = time.perf_counter_ns()
+                dispatch(self.wm, cmd)
+                _cost(report, f"command:{cmd.name}", time.perf_counter_ns() - begin)
+                report.commands += 1
+            begin = time.perf_counter_ns()
+        _cost(report, "refresh", time.perf_counter_ns() - begin)
+
+def _cost(report: ReplayReport, key: str, ns: int):
+    hist = report.costs.get(key)
+    if hist is None:
+        hist = report.costs[key] = Histogram()
+    hist.add(ns)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.replay", description="Replay a recorded capture")
+    parser.add_argument("capture", help="A capture written by main.py --record")
+    parser.add_argument("--realtime", action="store_true", help="Keep the gaps between entries instead of going as fast as possible")
+    parser.add_argument("--speed", type=float, default=1.0, help="With --realtime, how many times faster than recorded")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed has to be positive")
+
+    report = Replayer(load_capture(args.capture)).run(args.realtime, args.speed)
+    print(report.summary())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
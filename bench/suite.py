@@ -0,0 +1,192 @@
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from adapters.fake import FakeAdapter
+from bench.desktop import DESKTOPS, Desktop
+from core.manager import WindowManager
+from core.models import Window
+
+RESULTS_VERSION = 1
+# How many windows appear (and then go away again) in one add/remove storm
+STORM_SIZE = 50
+# Stop timing an operation after this long, however many calls that was, but never with fewer than MIN_CALLS
+TIME_BUDGET = 1.0
+MIN_CALLS = 10
+
+@dataclass(frozen=True)
+class Operation:
+    name: str
+    # Called with the manager and the iteration number; alternate directions on odd and even
+    # iterations so the desktop ends up where it started
+    run: Callable[[WindowManager, int], None]
+
+def _alternate(i: int) -> int:
+    return 1 if i % 2 == 0 else -1
+
+def _storm(wm: WindowManager, i: int):
+    adapter = wm.adapter
+    assert isinstance(adapter, FakeAdapter)
+    # Ids well above anything the desktop was built with
+    base = 10_000_000 + (i % 2) * STORM_SIZE
+    monitor = i % len(wm.monitors)
+    for k in range(STORM_SIZE):
+        adapter.add_window(Window(base + k, width=0.5), monitor)
+    for k in range(STORM_SIZE):
+        adapter.remove_window(base + k)
+
+OPERATIONS = [
+    Operation("focus_horizontal", lambda wm, i: wm.move_focus_horizontal(_alternate(i))),
+    Operation("focus_position", lambda wm, i: wm.focus_position(0 if i % 2 == 0 else -1)),
+    Operation("workspace_focus", lambda wm, i: wm.move_workspace_focus(_alternate(i))),
+    Operation("monitor_focus", lambda wm, i: wm.move_monitor_focus(_alternate(i))),
+    Operation("resize", lambda wm, i: wm.resize_window(0.1 * _alternate(i))),
+    Operation("maximize_toggle", lambda wm, i: wm.toggle_maximize_focused_window()),
+    Operation("preset_width_toggle", lambda wm, i: wm.toggle_preset_width_focused_window()),
+    Operation("move_horizontal", lambda wm, i: wm.move_window_horizontal(_alternate(i))),
+    Operation("move_vertical", lambda wm, i: wm.move_window_vertical(_alternate(i))),
+    Operation("move_to_position", lambda wm, i: wm.move_window_to_position(0 if i % 2 == 0 else -1)),
+    Operation("move_to_monitor", lambda wm, i: wm.move_window_to_monitor(_alternate(i))),
+    Operation("update_workspaces", lambda wm, i: wm.update_workspaces()),
+    Operation("overview_toggle", lambda wm, i: wm.toggle_overview()),
+    Operation("add_remove_storm", _storm),
+]
+
+def build(desktop: Desktop) -> WindowManager:
+    adapter = FakeAdapter(monitors=desktop.build())
+    wm = WindowManager(adapter)
+    # Start from a settled layout, like a running window manager would
+    adapter.refresh()
+    adapter.batches.clear()
+    return wm
+
+def time_operation(desktop: Desktop, op: Operation, repeat: int, budget: float = TIME_BUDGET) -> dict:
+    "Per-call timings of `op` on a fresh copy of `desktop`, in microseconds"
+    wm = build(desktop)
+    # Warm up, and make sure an even number of calls has run so we start from the original state
+    for i in range(2):
+        op.run(wm, i)
+
+    samples = []
+    deadline = time.perf_counter() + budget
+    for i in range(repeat):
+        if i >= MIN_CALLS and time.perf_counter() > deadline:
+            break
+        start = time.perf_counter_ns()
+        op.run(wm, i)
+        samples.append((time.perf_counter_ns() - start) / 1000)
+        # The fake adapter keeps every batch; don't let that grow with the repeat count
+        wm.adapter.batches.clear() # type: ignore[attr-defined]
+
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "median_us": round(statistics.median(samples), 2),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "min_us": round(samples[0], 2),
+    }
+
+def scaling(results: dict) -> dict:
+    """
+    How each operation's median grows with the number of windows between the two largest desktops,
+    as an exponent: about 0 for constant time, 1 for linear, 2 for quadratic.
+    """
+    names = list(results["desktops"])
+    if len(names) < 2:
+        return {}
+    small, large = (results["desktops"][name] for name in names[-2:])
+    growth = math.log(large["windows"] / small["windows"])
+    exponents = {}
+    for op, timing in large["operations"].items():
+        before = small["operations"].get(op)
+        if before is None or before["median_us"] <= 0 or timing["median_us"] <= 0:
+            continue
+        exponents[op] = round(math.log(timing["median_us"] / before["median_us"]) / growth, 2)
+    return {"from": names[-2], "to": names[-1], "exponents": exponents}
+
+def run(desktops: Iterable[Desktop] = DESKTOPS, operations: Iterable[Operation] = OPERATIONS,
+        repeat: int = 200, progress: Optional[Callable[[str], None]] = None) -> dict:
+    results: dict = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "desktops": {},
+    }
+    operations = list(operations)
+    for desktop in desktops:
+        timings = {}
+        for op in operations:
+            timings[op.name] = time_operation(desktop, op, repeat)
+            if progress:
+                progress(f"{desktop.name:>8} {op.name:<20} {timings[op.name]['median_us']:>10.1f}us")
+        results["desktops"][desktop.name] = {
+            "monitors": desktop.monitors,
+            "workspaces": desktop.workspaces,
+            "windows": desktop.windows,
+            "operations": timings,
+        }
+    results["scaling"] = scaling(results)
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float = 2.0, max_exponent_increase: float = 0.5,
+            noise_floor_us: float = 20.0) -> list[str]:
+    """
+    Regressions against a baseline, as readable lines.
+    Absolute times are only flagged if they're more than `tolerance` times slower, since the baseline
+    may come from a different machine. Growth exponents don't depend on the machine, so those are held
+    to a tighter standard; that's what catches an O(n) operation turning O(n^2).
+    Anything faster than `noise_floor_us` is too noisy to judge either way.
+    """
+    regressions = []
+    for name, desktop in results["desktops"].items():
+        before = baseline.get("desktops", {}).get(name)
+        if before is None:
+            continue
+        for op, timing in desktop["operations"].items():
+            old = before["operations"].get(op)
+            if old is None or timing["median_us"] < noise_floor_us:
+                continue
+            if timing["median_us"] > old["median_us"] * tolerance:
+                regressions.append(f"{name}/{op}: {timing['median_us']:.1f}us, was {old['median_us']:.1f}us")
+
+    growth, old_growth = results.get("scaling", {}), baseline.get("scaling", {})
+    if (growth.get("from"), growth.get("to")) != (old_growth.get("from"), old_growth.get("to")):
+        # Measured between different desktops, e.g. a --quick run
+        return regressions
+    exponents, old_exponents = growth.get("exponents", {}), old_growth.get("exponents", {})
+    largest = results["desktops"][growth["to"]]["operations"]
+    for op, exponent in exponents.items():
+        old = old_exponents.get(op)
+        if old is None or largest.get(op, {}).get("median_us", 0) < noise_floor_us:
+            continue
+        if exponent > old + max_exponent_increase:
+            regressions.append(f"{op}: grows as n^{exponent}, was n^{old}")
+    return regressions
+
+def load(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+def report(results: dict, out=sys.stdout):
+    names = list(results["desktops"])
+    ops = list(results["desktops"][names[0]]["operations"]) if names else []
+    print(f"{'median us':<20}" + "".join(f"{name:>12}" for name in names) + f"{'growth':>10}", file=out)
+    exponents = results.get("scaling", {}).get("exponents", {})
+    for op in ops:
+        row = "".join(f"{results['desktops'][name]['operations'][op]['median_us']:>12.1f}" for name in names)
+        growth = f"n^{exponents[op]:.2f}" if op in exponents else ""
+        print(f"{op:<20}{row}{growth:>10}", file=out)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+from core.trace import traced
+from log import log_error
+
+# The window manager's state (monitors, workspaces, the window index, committed layout) has one owner:
+# the asyncio loop. Other threads never touch it; they post messages to an Inbox, and the loop
+# hands Win32 calls that have to happen elsewhere to an Executor.
+
+M = TypeVar("M")
+
+@dataclass
+class InboxStats:
+    posted: int = 0
+    handled: int = 0
+    drains: int = 0
+    # Most messages waiting at once
+    max_depth: int = 0
+    # Longest a message waited between being posted and handled, in seconds
+    max_wait: float = 0.0
+
+class Inbox:
+    """
+    Messages for the loop from other threads. Each message type has one handler,
+    and handlers run on the loop in the order messages were posted.
+    Until a loop is bound messages queue up; binding delivers them.
+    """
+
+    stats: InboxStats
+
+    _handlers: dict[type, Callable[[Any], None]]
+    _queue: deque[tuple[float, object]]
+    _clock: Callable[[], float]
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _wakeup_pending: bool = False
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.stats = InboxStats()
+        self._handlers = {}
+        self._queue = deque()
+        self._clock = clock
+
+    def register(self, message_type: type[M], handler: Callable[[M], None]):
+        self._handlers[message_type] = handler
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._wakeup_pending = True
+        loop.call_soon(self.drain)
+
+    def post(self, message: object):
+        "Safe to call from any thread"
+        if type(message) not in self._handlers:
+            raise TypeError(f"No handler for {type(message).__name__}")
+        self._queue.append((self._clock(), message))
+        self.stats.posted += 1
+        if self._wakeup_pending or self._loop is None:
+            return
+        self._wakeup_pending = True
+        try:
+            self._loop.call_soon_threadsafe(self.drain)
+        except RuntimeError:
+            # The loop is closed; we're shutting down
+            pass
+
+    def drain(self) -> int:
+        "Handle everything posted so far. Returns how many messages were handled."
+        self._wakeup_pending = False
+        depth = len(self._queue)
+        if depth == 0:
+            return 0
+        self.stats.drains += 1
+        self.stats.max_depth = max(self.stats.max_depth, depth)
+
+        handled = 0
+        now = self._clock()
+        while self._queue:
+            posted_at, message = self._queue.popleft()
+            self.stats.max_wait = max(self.stats.max_wait, now - posted_at)
+            self._handlers[type(message)](message)
+            handled += 1
+        self.stats.handled += handled
+        return handled
+
+@dataclass
+class ExecutorStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    # Most side effects waiting at once
+    max_depth: int = 0
+
+    @property
+    def depth(self) -> int:
+        return self.submitted - self.completed - self.failed
+
+class Executor:
+    """
+    Runs side effects (Win32 calls) somewhere other than the loop, in the order they were submitted.
+    `post` is whatever runs a function on the thread that should do the work;
+    the default runs it right away, which is what the fake adapter and tests want.
+    Results come back, if at all, as messages to an Inbox.
+    """
+
+    stats: ExecutorStats
+    _post: Callable[[Callable[[], None]], None]
+    _lock: threading.Lock
+
+    def __init__(self, post: Optional[Callable[[Callable[[], None]], None]] = None):
+        self.stats = ExecutorStats()
+        self._post = post or (lambda fn: fn())
+        # Only guards the counters, which both sides update
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[], None]):
+        with self._lock:
+            self.stats.submitted += 1
+            self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+        self._post(lambda: self._run(fn))
+
+    @traced()
+    def _run(self, fn: Callable[[], None]):
+        try:
+            fn()
+        except Exception as e:
+            # The thread doing the work (e.g. the watcher's message loop) has to survive this
+            log_error("Side effect failed: %s", e)
+            with self._lock:
+                self.stats.failed += 1
+            return
+        with self._lock:
+            self.stats.completed += 1
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from array import array
+from dataclasses import dataclass, replace
+from typing import Callable, Optional, Sequence
+
+from core.layout import LayoutPlan, WindowPlacement, needs_proxy
+from core.models import Rect, WindowID
+from core.trace import traced
+
+DEFAULT_ANIMATION_DURATION = 0.15
+
+Easing = Callable[[float], float]
+
+def linear(t: float) -> float:
+    return t
+
+def ease_out_cubic(t: float) -> float:
+    u = 1.0 - t
+    return 1.0 - u * u * u
+
+@dataclass
+class AnimationStats:
+    frames: int = 0
+    # Frames we skipped rather than fall behind
+    dropped: int = 0
+    # Longest it took to compute and commit a frame, in seconds
+    max_frame_time: float = 0.0
+
+class Animator:
+    """
+    Slides windows from where they are to where the latest plan wants them.
+
+    Every change goes through `retarget`. Windows that are on screen and staying on screen are animated;
+    everything else (appearing, hiding) is committed straight away. Retargeting a window mid-animation
+    starts the new animation from wherever it currently is, so interrupted scrolls don't jump.
+
+    Frames are computed for the clock's current time, not counted, so a late frame just
+    lands further along; if a frame takes longer than the frame interval, the next one is skipped.
+    Each frame is handed to `commit` as a single plan. Whether a window needs a proxy is worked out
+    again for each frame from where it is at that point (against `screens`), not taken from where it's going.
+
+    Animations that are running are kept as flat arrays (from, to, start time per window)
+    so each frame is one pass over plain numbers.
+    """
+
+    duration: float
+    frame_interval: float
+    easing: Easing
+    stats: AnimationStats
+
+    _commit: Callable[[LayoutPlan], None]
+    _screens: Sequence[Rect]
+    _clock: Callable[[], float]
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _scheduled: bool = False
+    _last_frame: Optional[float] = None
+
+    # Where each visible window was last put
+    _current: dict[WindowID, Rect]
+    # Running animations; slot i is window _ids[i], with 4 coordinates per window in _from/_to
+    _ids: list[WindowID]
+    _targets: list[WindowPlacement]
+    _from: array
+    _to: array
+    _start: array
+    _slots: dict[WindowID, int]
+
+    def __init__(self, commit: Callable[[LayoutPlan], None], duration: float = DEFAULT_ANIMATION_DURATION,
+                 frame_interval: float = 1 / 60, easing: Easing = ease_out_cubic,
+                 clock: Callable[[], float] = time.perf_counter, screens: Sequence[Rect] = ()):
+        self.duration = duration
+        self.frame_interval = frame_interval
+        self.easing = easing
+        self.stats = AnimationStats()
+        self._commit = commit
+        self._clock = clock
+        self._screens = screens
+        self._current = {}
+        self._ids = []
+        self._targets = []
+        self._from = array("d")
+        self._to = array("d")
+        self._start = array("d")
+        self._slots = {}
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        "Until a loop is bound, nothing is animated"
+        self._loop = loop
+
+    @property
+    def active(self) -> bool:
+        return bool(self._ids)
+
+    def is_animating(self, win_id: WindowID) -> bool:
+        return win_id in self._slots
+
+    def forget(self, win_id: WindowID):
+        "Drop a window, e.g. because it was destroyed"
+        self._current.pop(win_id, None)
+        if win_id in self._slots:
+            self._compact({win_id})
+
+    def retarget(self, changes: LayoutPlan):
+        "Start moving towards `changes`, committing anything that shouldn't animate straight away"
+        now = self._clock()
+        immediate = LayoutPlan()
+        animate = self._loop is not None and self.duration > 0
+        # Compacted once at the end; until then every slot stays where it is
+        stopped: set[WindowID] = set()
+
+        for p in changes:
+            start = self._rect_at(p.id, now)
+            if not (animate and p.visible and p.rect is not None and start is not None and start != p.rect):
+                if p.id in self._slots:
+                    stopped.add(p.id)
+                immediate.add(p)
+                self._set_current(p)
+                continue
+
+            slot = self._slots.get(p.id)
+            if slot is None:
+                slot = len(self._ids)
+                self._slots[p.id] = slot
+                self._ids.append(p.id)
+                self._targets.append(p)
+                self._from.extend(start)
+                self._to.extend(p.rect)
+                self._start.append(now)
+            else:
+                self._targets[slot] = p
+                self._from[4 * slot:4 * slot + 4] = array("d", start)
+                self._to[4 * slot:4 * slot + 4] = array("d", p.rect)
+                self._start[slot] = now
+
+        if stopped:
+            self._compact(stopped)
+        if len(immediate) > 0:
+            self._commit(immediate)
+        if self._ids:
+            self._schedule(self.frame_interval)
+
+    @traced()
+    def frame(self) -> LayoutPlan:
+        "Compute and commit the frame for now. Called by the loop; call it yourself if there's no loop."
+        self._scheduled = False
+        now = self._clock()
+        if self._last_frame is not None:
+            late = now - self._last_frame - self.frame_interval
+            if late >= self.frame_interval:
+                self.stats.dropped += int(late / self.frame_interval)
+        self._last_frame = now
+
+        plan = LayoutPlan()
+        done: set[WindowID] = set()
+        ease, duration = self.easing, self.duration
+        src, dst, starts, targets = self._from, self._to, self._start, self._targets
+        for i, win_id in enumerate(self._ids):
+            t = (now - starts[i]) / duration
+            if t >= 1.0:
+                target = targets[i]
+                done.add(win_id)
+            else:
+                e = ease(t)
+                b = 4 * i
+                rect = Rect(
+                    round(src[b] + (dst[b] - src[b]) * e),
+                    round(src[b + 1] + (dst[b + 1] - src[b + 1]) * e),
+                    round(src[b + 2] + (dst[b + 2] - src[b + 2]) * e),
+                    round(src[b + 3] + (dst[b + 3] - src[b + 3]) * e),
+                )
+                target = targets[i]
+                proxied = target.clip is not None and needs_proxy(rect, target.clip, self._screens)
+                target = replace(target, rect=rect, proxied=proxied)
+            plan.add(target)
+            self._set_current(target)
+
+        if done:
+            self._compact(done)
+        self.stats.frames += 1
+        if len(plan) > 0:
+            self._commit(plan)
+
+        frame_time = self._clock() - now
+        self.stats.max_frame_time = max(self.stats.max_frame_time, frame_time)
+        if self._ids:
+            if frame_time > self.frame_interval:
+                # Over budget: skip a frame instead of queueing up behind ourselves
+                self.stats.dropped += 1
+                self._schedule(2 * self.frame_interval)
+            else:
+                self._schedule(self.frame_interval)
+        else:
+            self._last_frame = None
+        return plan
+
+    def _schedule(self, delay: float):
+        if self._scheduled or self._loop is None:
+            return
+        self._scheduled = True
+        self._loop.call_later(delay, self.frame)
+
+    def _set_current(self, p: WindowPlacement):
+        if p.visible and p.rect is not None:
+            self._current[p.id] = p.rect
+        else:
+            self._current.pop(p.id, None)
+
+    def _rect_at(self, win_id: WindowID, now: float) -> Optional[Rect]:
+        "Where a window is at `now`, including partway through an animation"
+        slot = self._slots.get(win_id)
+        if slot is None:
+            return self._current.get(win_id)
+        e = self.easing(min(1.0, (now - self._start[slot]) / self.duration))
+        b = 4 * slot
+        return Rect(*(round(self._from[b + k] + (self._to[b + k] - self._from[b + k]) * e) for k in range(4)))
+
+    def _compact(self, remove: set[WindowID]):
+        keep = [i for i, win_id in enumerate(self._ids) if win_id not in remove]
+        self._ids = [self._ids[i] for i in keep]
+        self._targets = [self._targets[i] for i in keep]
+        self._from = array("d", (self._from[4 * i + k] for i in keep for k in range(4)))
+        self._to = array("d", (self._to[4 * i + k] for i in keep for k in range(4)))
+        self._start = array("d", (self._start[i] for i in keep))
+        self._slots = {win_id: i for i, win_id in enumerate(self._ids)}
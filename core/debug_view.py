@@ -0,0 +1,182 @@
+import asyncio
+import re
+import sys
+import time
+from typing import Callable, Optional
+
+from core.models import Monitor, Window, WindowID
+
+# Returns (title, class name) for a window
+DescribeWindow = Callable[[Window], tuple[str, str]]
+
+ANSI_ESCAPE = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
+ANSI_SPLIT = re.compile(r'(\x1B\[[0-?]*[ -/]*[@-~])')
+ANSI_RESET = "\033[0m"
+
+BOX_CHARS = {
+    'ascii': [
+        '/-\\',
+        '| |',
+        '\\-/'
+    ],
+    'single': [
+        '┌─┐',
+        '│ │',
+        '└─┘'
+    ],
+    'double': [
+        '╔═╗',
+        '║ ║',
+        '╚═╝'
+    ],
+}
+
+def len_without_ansi(s: str) -> int:
+    return len(ANSI_ESCAPE.sub('', s))
+
+def ansi_ljust(s: str, width: int) -> str:
+    parts = ANSI_SPLIT.split(s)
+    visible_length = sum(len(part) for i, part in enumerate(parts) if i % 2 == 0)
+    padding = width - visible_length
+    if padding > 0:
+        return s + ' ' * padding
+    return s
+
+def add_rect(text: str, title: str | None, buf: list[str], style: str, ansi_col: str | None = None):
+    "Draw a box around `text` and append it to the right of whatever is already in `buf`"
+    chars = BOX_CHARS[style]
+
+    title = f" {title} " if title else None
+
+    lines = text.splitlines()
+    max_line_length = max(len_without_ansi(line) for line in lines) if lines else 0
+
+    height = len(lines) + 2
+    length = max(max_line_length + 4, len(title) + 4 if title else 0)
+
+    if not buf:
+        buf.append("")
+    while len(buf) < height:
+        buf.append(" " * len_without_ansi(buf[0]))
+
+    if len(buf[0]) > 0:
+        for i in range(len(buf)):
+            buf[i] += " "
+
+    ansi_set = ansi_col or ""
+    ansi_reset = ANSI_RESET if ansi_col else ""
+
+    # Header
+    if title:
+        buf[0] += f"{ansi_set}{chars[0][0]}{chars[0][1]}{title.center(length - 4, chars[0][1])}{chars[0][1]}{chars[0][2]}{ansi_reset}"
+    else:
+        buf[0] += f"{ansi_set}{chars[0][0]}{chars[0][1] * (length - 2)}{chars[0][2]}{ansi_reset}"
+
+    # Content
+    for i in range(1, height - 1):
+        buf[i] += f"{ansi_set}{chars[1][0]}{ansi_reset} {ansi_ljust(lines[i - 1], length - 4)} {ansi_set}{chars[1][2]}{ansi_reset}"
+
+    # Footer
+    buf[height - 1] += f"{ansi_set}{chars[2][0]}{chars[2][1] * (length - 2)}{chars[2][2]}{ansi_reset}"
+
+    # Pad buf to height
+    if len(buf) > height:
+        for i in range(height, len(buf)):
+            buf[i] += " " * length
+
+def _truncate(s: str) -> str:
+    return s[:47] + "..." if len(s) > 50 else s
+
+def render_layout(monitors: list[Monitor], focused_monitor: int | None, describe: DescribeWindow) -> str:
+    outer_buf: list[str] = []
+    for mi, mon in enumerate(monitors):
+        monitor_buf = []
+
+        for ws in mon.workspaces:
+            ws_buf: list[str] = []
+            focused = ws.focused_window()
+            for win in ws.windows:
+                name, win_class = describe(win)
+                is_focused = focused is not None and win.id == focused.id
+                add_rect(f"{_truncate(name)}\n{_truncate(win_class)}", f"Win {win.id}", ws_buf, 'double' if is_focused else 'single', '\033[92m' if win.id == ws._focused_id else None)
+
+            temp_buf: list[str] = []
+            add_rect("\n".join(ws_buf), f"Workspace {ws.id}", temp_buf, 'single', '\033[94m' if ws.id == mon._focused_workspace else None)
+            monitor_buf.extend(temp_buf) # Add vertically
+
+        add_rect("\n".join(monitor_buf), f"Monitor {mi} (ws {mon.current_workspace().id})", outer_buf, 'double', '\033[96m' if mi == focused_monitor else None)
+
+    return "\n".join(outer_buf)
+
+class DebugLayoutView:
+    """
+    An opt-in ascii view of every monitor/workspace/window, for debugging.
+    Renders are throttled to `max_fps` and happen in their own loop callback rather than
+    inside the refresh that asked for them. Titles and classes are cached per window,
+    so `describe` is only called for windows we haven't seen (or that were invalidated).
+    """
+
+    monitors: list[Monitor]
+    max_fps: float
+    renders: int
+
+    _describe: DescribeWindow
+    _write: Callable[[str], object]
+    _clock: Callable[[], float]
+    _names: dict[WindowID, tuple[str, str]]
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _focused_monitor: int | None = None
+    _dirty: bool = False
+    _scheduled: bool = False
+    _last_render: float = float("-inf")
+
+    def __init__(self, monitors: list[Monitor], describe: DescribeWindow, max_fps: float = 4.0,
+                 write: Optional[Callable[[str], object]] = None, clock: Callable[[], float] = time.perf_counter):
+        self.monitors = monitors
+        self.max_fps = max_fps
+        self.renders = 0
+        self._describe = describe
+        self._write = write or sys.stdout.write
+        self._clock = clock
+        self._names = {}
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def forget(self, win_id: WindowID):
+        "Drop a window's cached title/class, e.g. because it changed"
+        self._names.pop(win_id, None)
+
+    def request(self, focused_monitor: int | None):
+        "Ask for a render at the next allowed time. Cheap enough to call from every refresh."
+        self._focused_monitor = focused_monitor
+        self._dirty = True
+        if self._scheduled:
+            return
+
+        delay = self._last_render + 1.0 / self.max_fps - self._clock()
+        if self._loop is not None:
+            self._scheduled = True
+            self._loop.call_later(max(0.0, delay), self._render)
+        elif delay <= 0:
+            # No loop yet (startup, tests): render right away, but still throttled
+            self._render()
+
+    def _cached_describe(self, win: Window) -> tuple[str, str]:
+        names = self._names.get(win.id)
+        if names is None:
+            names = self._describe(win)
+            self._names[win.id] = names
+        return names
+
+    def _render(self):
+        self._scheduled = False
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._last_render = self._clock()
+        self.renders += 1
+
+        text = render_layout(self.monitors, self._focused_monitor, self._cached_describe)
+        # One write for the whole frame
+        self._write("\n" * 2 + text + "\n")
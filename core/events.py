@@ -0,0 +1,131 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from core.models import WindowID
+
+class EventKind(IntEnum):
+    CREATED = 0
+    DESTROYED = 1
+    MOVED = 2
+    FOREGROUND = 3
+    TITLE_CHANGED = 4
+    STYLE_CHANGED = 5
+    MINIMIZED = 6
+    RESTORED = 7
+
+class WindowEvent(NamedTuple):
+    kind: EventKind
+    window: WindowID
+
+def coalesce_events(events: Iterable[WindowEvent], is_known: Callable[[WindowID], bool]) -> list[WindowEvent]:
+    """
+    Shrink a batch of events without changing what it means:
+    - only the last MOVED per window is kept, since handlers read the current position anyway
+    - a window we don't manage yet that's CREATED and then DESTROYED in the same batch never happened
+    - repeated CREATEDs (create, then show) for such a window collapse into one
+    Everything else keeps its order.
+    """
+    out: list[Optional[WindowEvent]] = []
+    last_move: dict[WindowID, int] = {}
+    # Where the CREATED for a not-yet-managed window is in `out`
+    created_at: dict[WindowID, int] = {}
+
+    for event in events:
+        kind, window = event
+        if kind == EventKind.MOVED:
+            prev = last_move.get(window)
+            if prev is not None:
+                out[prev] = None
+            last_move[window] = len(out)
+        elif kind == EventKind.CREATED:
+            if window in created_at:
+                continue
+            if not is_known(window):
+                created_at[window] = len(out)
+        elif kind == EventKind.DESTROYED and window in created_at:
+            start = created_at.pop(window)
+            for i in range(start, len(out)):
+                other = out[i]
+                if other is not None and other.window == window:
+                    out[i] = None
+            last_move.pop(window, None)
+            continue
+        out.append(event)
+
+    return [event for event in out if event is not None]
+
+@dataclass
+class EventQueueStats:
+    pushed: int = 0
+    delivered: int = 0
+    drains: int = 0
+    # Most events waiting at once
+    max_depth: int = 0
+
+    @property
+    def coalesced(self) -> int:
+        return self.pushed - self.delivered
+
+class EventQueue:
+    """
+    Hands window events from a hook thread to the asyncio loop.
+    `push` is all the hook thread does: append to a deque (atomic, no lock) and, if no drain
+    is pending yet, wake the loop. The loop then drains everything that queued up since,
+    coalesces it, and hands it to `handle` in one go.
+
+    Until a loop is bound events just queue up; binding drains them.
+    """
+
+    stats: EventQueueStats
+
+    _handle: Callable[[list[WindowEvent]], None]
+    _is_known: Callable[[WindowID], bool]
+    _queue: deque[WindowEvent]
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _wakeup_pending: bool = False
+
+    def __init__(self, handle: Callable[[list[WindowEvent]], None], is_known: Callable[[WindowID], bool]):
+        self.stats = EventQueueStats()
+        self._handle = handle
+        self._is_known = is_known
+        self._queue = deque()
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._wakeup_pending = True
+        loop.call_soon(self.drain)
+
+    def push(self, kind: EventKind, window: WindowID):
+        "Safe to call from any thread, and cheap enough for a hook callback"
+        self._queue.append(WindowEvent(kind, window))
+        self.stats.pushed += 1
+        if self._wakeup_pending or self._loop is None:
+            return
+        self._wakeup_pending = True
+        try:
+            self._loop.call_soon_threadsafe(self.drain)
+        except RuntimeError:
+            # The loop is closed; we're shutting down
+            pass
+
+    def drain(self) -> int:
+        "Handle everything queued so far. Returns how many events were delivered."
+        # Cleared before popping, so an event pushed while we drain always gets a wakeup
+        self._wakeup_pending = False
+        depth = len(self._queue)
+        if depth == 0:
+            return 0
+        self.stats.max_depth = max(self.stats.max_depth, depth)
+
+        batch = []
+        while self._queue:
+            batch.append(self._queue.popleft())
+
+        events = coalesce_events(batch, self._is_known)
+        self.stats.drains += 1
+        self.stats.delivered += len(events)
+        self._handle(events)
+        return len(events)
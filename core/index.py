@@ -0,0 +1,115 @@
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from core.models import Monitor, Window, WindowID, Workspace
+
+class WindowLocation(NamedTuple):
+    monitor_index: int
+    monitor: Monitor
+    workspace: Workspace
+    position: int
+
+class WindowIndex:
+    """
+    Every managed window, by id.
+    Locations aren't stored separately: they're derived from `Window.workspace`, `Workspace.monitor`
+    and the workspace's position index, which the strip mutations in `core.models` already keep up to date.
+    That way moving a window around never has to touch this index, and a lookup is a handful of dict hits.
+    Windows only have to be added here when they're first managed and removed when they go away.
+    """
+
+    monitors: List[Monitor]
+    _windows: Dict[WindowID, Window]
+    _monitor_indices: Dict[Monitor, int]
+
+    def __init__(self, monitors: List[Monitor]):
+        self.monitors = monitors
+        self._windows = {}
+        self._monitor_indices = {mon: i for i, mon in enumerate(monitors)}
+
+        # Pick up anything the monitors were created with
+        for mon in monitors:
+            for ws in mon.workspaces:
+                for win in ws.windows:
+                    self.add(win)
+
+    def add(self, win: Window):
+        self._windows[win.id] = win
+
+    def remove(self, win_id: WindowID) -> Optional[Window]:
+        return self._windows.pop(win_id, None)
+
+    def get(self, win_id: WindowID) -> Optional[Window]:
+        return self._windows.get(win_id)
+
+    def __getitem__(self, win_id: WindowID) -> Window:
+        return self._windows[win_id]
+
+    def __contains__(self, win_id: WindowID) -> bool:
+        return win_id in self._windows
+
+    def __iter__(self) -> Iterator[Window]:
+        return iter(self._windows.values())
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def locate(self, win_id: WindowID) -> Optional[WindowLocation]:
+        win = self._windows.get(win_id)
+        if win is None or win.workspace is None or win.workspace.monitor is None:
+            return None
+        ws = win.workspace
+        mon = ws.monitor
+        assert mon is not None
+        monitor_index = self._monitor_indices.get(mon)
+        position = ws.index_of(win_id)
+        if monitor_index is None or position is None:
+            return None
+        return WindowLocation(monitor_index, mon, ws, position)
+
+    def check_consistency(self) -> List[str]:
+        """
+        Walk the whole model and report anything the index or the strip indices disagree with.
+        This is the slow path on purpose; it's for tests and debugging, not for lookups.
+        """
+        errors = []
+        seen = set()
+        for mi, mon in enumerate(self.monitors):
+            for wsi, ws in enumerate(mon.workspaces):
+                if ws.monitor is not mon:
+                    errors.append(f"workspace {ws.id} doesn't point back at monitor {mi}")
+                if mon.index_of(ws) != wsi:
+                    errors.append(f"workspace {ws.id} is at {wsi} but indexed at {mon.index_of(ws)}")
+                errors.extend(_check_workspace(ws))
+
+                for pos, win in enumerate(ws.windows):
+                    if win.id in seen:
+                        errors.append(f"window {win.id} is in more than one place")
+                    seen.add(win.id)
+
+                    if self._windows.get(win.id) is not win:
+                        errors.append(f"window {win.id} isn't indexed")
+                        continue
+                    if self.locate(win.id) != (mi, mon, ws, pos):
+                        errors.append(f"window {win.id} located at {self.locate(win.id)}, expected ({mi}, {ws.id}, {pos})")
+
+        for win_id in self._windows:
+            if win_id not in seen:
+                errors.append(f"window {win_id} is indexed but not in any workspace")
+        return errors
+
+def _check_workspace(ws: Workspace) -> List[str]:
+    errors = []
+    if len(ws._positions) != len(ws.windows):
+        errors.append(f"workspace {ws.id} indexes {len(ws._positions)} windows but has {len(ws.windows)}")
+    x = 0.0
+    for pos, win in enumerate(ws.windows):
+        if win.workspace is not ws:
+            errors.append(f"window {win.id} doesn't point back at workspace {ws.id}")
+        if ws.index_of(win.id) != pos:
+            errors.append(f"window {win.id} is at {pos} but indexed at {ws.index_of(win.id)}")
+        if abs(win.x - x) > 1e-9:
+            errors.append(f"window {win.id} has x {win.x}, expected {x}")
+        x += win.width
+    if abs(ws.total_width() - x) > 1e-9:
+        errors.append(f"workspace {ws.id} has total width {ws.total_width()}, expected {x}")
+    return errors
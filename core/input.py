@@ -0,0 +1,98 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from core.models import Rect
+
+class MonitorSpatialIndex:
+    """
+    Precomputed point -> monitor lookup.
+    The desktop is cut into vertical slabs at every monitor edge; within a slab the monitors
+    are sorted by their top edge, so a lookup is two bisects no matter how many monitors there are.
+    """
+
+    _xs: List[int]
+    # For each slab: sorted tops, and the (bottom, monitor index) that goes with each top
+    _slabs: List[Tuple[List[int], List[Tuple[int, int]]]]
+
+    def __init__(self, rects: List[Rect]):
+        self._xs = sorted({x for r in rects for x in (r.left(), r.right())})
+        self._slabs = []
+        for left, right in zip(self._xs, self._xs[1:]):
+            covering = sorted(
+                (r.top(), r.bottom(), i) for i, r in enumerate(rects)
+                if r.left() <= left and r.right() >= right and r.width() > 0 and r.height() > 0
+            )
+            self._slabs.append(([top for top, _, _ in covering], [(bottom, i) for _, bottom, i in covering]))
+
+    def monitor_at(self, x: int, y: int) -> Optional[int]:
+        slab = bisect_right(self._xs, x) - 1
+        if slab < 0 or slab >= len(self._slabs):
+            return None
+        tops, entries = self._slabs[slab]
+        j = bisect_right(tops, y) - 1
+        if j < 0:
+            return None
+        bottom, monitor = entries[j]
+        return monitor if y < bottom else None
+
+class CrossingTracker:
+    "Turns a stream of cursor positions into monitor-boundary crossings"
+
+    index: MonitorSpatialIndex
+    current: Optional[int]
+
+    def __init__(self, index: MonitorSpatialIndex):
+        self.index = index
+        self.current = None
+
+    def feed(self, x: int, y: int) -> Optional[int]:
+        "Returns the monitor the cursor just entered, or None if it didn't cross a boundary"
+        monitor = self.index.monitor_at(x, y)
+        if monitor is None or monitor == self.current:
+            return None
+        self.current = monitor
+        return monitor
+
+# Called on the asyncio loop with the index of the monitor the cursor moved onto
+MonitorCallback = Callable[[int], None]
+
+class InputSource(ABC):
+    """
+    Pushes input events to the window manager, instead of the manager polling for them.
+    Only monitor-boundary crossings are reported, so ordinary mouse movement costs us nothing.
+    """
+
+    @abstractmethod
+    def start(self, monitors: MonitorSpatialIndex, on_monitor_entered: MonitorCallback):
+        "Start delivering events. Called from the asyncio loop the callback should run on."
+        pass
+
+    @abstractmethod
+    def stop(self):
+        pass
+
+class ScriptedInputSource(InputSource):
+    "An input source driven by hand (or by a list of positions), for tests and non-Windows platforms"
+
+    _tracker: Optional[CrossingTracker] = None
+    _callback: Optional[MonitorCallback] = None
+
+    def start(self, monitors: MonitorSpatialIndex, on_monitor_entered: MonitorCallback):
+        self._tracker = CrossingTracker(monitors)
+        self._callback = on_monitor_entered
+
+    def stop(self):
+        self._tracker = None
+        self._callback = None
+
+    def move_to(self, x: int, y: int):
+        if self._tracker is None or self._callback is None:
+            return
+        monitor = self._tracker.feed(x, y)
+        if monitor is not None:
+            self._callback(monitor)
+
+    def play(self, positions: Iterable[Tuple[int, int]]):
+        for x, y in positions:
+            self.move_to(x, y)
@@ -0,0 +1,221 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from core.models import Monitor, Rect, Window, WindowID, Workspace, WorkspaceID
+from core.trace import traced
+
+@dataclass(frozen=True)
+class WindowPlacement:
+    "Where a window should be on screen. Hidden windows don't have a rect."
+    id: WindowID
+    rect: Optional[Rect]
+    visible: bool
+    # The monitor the window is laid out on; anything outside of it shouldn't be seen
+    clip: Optional[Rect] = None
+    # Whether the window would bleed onto another monitor, so it has to be shown through a clipped proxy
+    proxied: bool = False
+    # For hidden windows: just scrolled out of view, so it can be moved out of sight instead of minimized.
+    # Not compared: a window that's already out of sight doesn't need touching either way.
+    parked: bool = field(default=False, compare=False)
+
+class LayoutPlan:
+    """
+    A set of target placements, keyed by window.
+    Plans are produced by `plan_layout` and are completely platform-neutral;
+    adapters are only ever handed the difference against what they last committed.
+    """
+
+    placements: Dict[WindowID, WindowPlacement]
+
+    def __init__(self, placements: Optional[List[WindowPlacement]] = None):
+        self.placements = {}
+        for p in placements or []:
+            self.add(p)
+
+    def add(self, placement: WindowPlacement):
+        self.placements[placement.id] = placement
+
+    def get(self, win_id: WindowID) -> Optional[WindowPlacement]:
+        return self.placements.get(win_id)
+
+    def __iter__(self) -> Iterator[WindowPlacement]:
+        return iter(self.placements.values())
+
+    def __len__(self) -> int:
+        return len(self.placements)
+
+    def __contains__(self, win_id: WindowID) -> bool:
+        return win_id in self.placements
+
+def _hidden(win: Window, parked: bool = False) -> WindowPlacement:
+    return WindowPlacement(win.id, None, False, parked=parked)
+
+def needs_proxy(rect: Rect, monitor_rect: Rect, screens: Sequence[Rect]) -> bool:
+    "Whether a window at `rect`, laid out on `monitor_rect`, would show up on any other screen"
+    if monitor_rect.contains_rect(rect):
+        return False
+    return any(screen != monitor_rect and screen.intersects(rect) for screen in screens)
+
+@traced()
+def plan_workspace(plan: LayoutPlan, workspace: Workspace, work_rect: Rect, monitor_rect: Rect, gap_px: int,
+                   screens: Sequence[Rect] = (), committed: Optional["CommittedLayout"] = None):
+    """
+    Place the windows of an active workspace within `work_rect`.
+    Each window's x and width are in screen-widths, so the strip is scaled to the work area
+    (minus `gap_px` around the edges) and shifted by the workspace's scroll offset.
+    Windows that don't intersect the monitor are parked, and windows that reach onto
+    any of the other `screens` are marked as needing a proxy.
+    With `committed`, windows it already has parked aren't planned again.
+    """
+    if not workspace.windows:
+        if committed is not None:
+            committed.planned(workspace, set())
+        return
+
+    workspace.layout_windows()
+
+    # compute available rectangle (apply outer gap)
+    avail_w = work_rect.width() - 2 * gap_px
+    avail_h = work_rect.height() - 2 * gap_px
+    if avail_w <= 0 or avail_h <= 0:
+        return
+
+    # Rounded rather than truncated, so float drift in the prefix sums can't move a window by a pixel
+    screen_x = work_rect.left() + gap_px - round(avail_w * workspace.scroll_offset)
+    screen_y = work_rect.top() + gap_px
+
+    # Only windows near the monitor can be visible; one pixel of slack covers rounding
+    view_start = (monitor_rect.left() - screen_x - 1) / avail_w
+    view_width = (monitor_rect.width() + 2) / avail_w
+    candidates = workspace.windows_in_view(view_start, view_width)
+
+    visible_ids = set()
+    for win in candidates:
+        w = math.floor(avail_w * win.width)
+        x = round(avail_w * win.x)
+        rect = Rect(screen_x + x, screen_y, screen_x + x + w, screen_y + avail_h)
+        if monitor_rect.intersects(rect):
+            plan.add(WindowPlacement(win.id, rect, True, monitor_rect, needs_proxy(rect, monitor_rect, screens)))
+            visible_ids.add(win.id)
+
+    if committed is not None and committed.settled(workspace):
+        # Everything else was parked before; only the windows that just left the view need parking
+        for win_id in committed.shown(workspace) - visible_ids:
+            if workspace.index_of(win_id) is not None:
+                plan.add(WindowPlacement(win_id, None, False, parked=True))
+    else:
+        for win in workspace.windows:
+            if win.id not in visible_ids:
+                plan.add(_hidden(win, parked=True))
+    if committed is not None:
+        committed.planned(workspace, visible_ids)
+
+def plan_monitor(plan: LayoutPlan, monitor: Monitor, gap_px: int, screens: Sequence[Rect] = (),
+                 committed: Optional["CommittedLayout"] = None):
+    """
+    Lay out the monitor's active workspace and hide every window in its other workspaces.
+    With `committed`, inactive workspaces whose windows it already has hidden are skipped.
+    """
+    active_ws = monitor.current_workspace()
+    for ws in monitor.workspaces:
+        if ws is active_ws:
+            continue
+        if committed is not None and committed.settled(ws):
+            # Only what it had on screen (if it was just switched away from) needs hiding
+            for win_id in committed.shown(ws):
+                if ws.index_of(win_id) is not None:
+                    plan.add(WindowPlacement(win_id, None, False))
+        else:
+            for win in ws.windows:
+                plan.add(_hidden(win))
+        if committed is not None:
+            committed.planned(ws, set())
+
+    plan_workspace(plan, active_ws, monitor.work_rect, monitor.rect, gap_px, screens, committed)
+
+@traced()
+def plan_layout(monitors: List[Monitor], gap_px: int, only: Optional[Iterable[int]] = None,
+                committed: Optional["CommittedLayout"] = None) -> LayoutPlan:
+    """
+    Plan every monitor, or just the monitor indices in `only`.
+    Without `committed` every window is planned. With it, windows whose placement can't have changed since
+    its last plan are left out, so a refresh costs what's on screen rather than every window on the monitor.
+    The plan is assumed to be committed.
+    """
+    plan = LayoutPlan()
+    screens = [mon.rect for mon in monitors]
+    indices = range(len(monitors)) if only is None else sorted(only)
+    for mi in indices:
+        if 0 <= mi < len(monitors):
+            plan_monitor(plan, monitors[mi], gap_px, screens, committed)
+    return plan
+
+def proxy_geometry(win_rect: Rect, clip: Rect) -> Optional[Tuple[Rect, Tuple[int, int]]]:
+    """
+    Work out what a window's proxy thumbnail should show when the window is at `win_rect`:
+    the part of the window inside `clip` (relative to the window) and where to put it on screen.
+    Returns None if none of the window is inside `clip`.
+    """
+    source = clip.intersection(win_rect)
+    if not source:
+        return None
+    return source.relative_to(win_rect), clip.clamp_pos(win_rect.left(), win_rect.top())
+
+class CommittedLayout:
+    """
+    The placements we last sent to the platform.
+    Diffing a new plan against this means a refresh only touches windows whose
+    rect or visibility actually changed.
+
+    It also remembers, per workspace, which windows the last plan put on screen, and the workspace's
+    version when every other window was planned hidden. Until a window joins the workspace (or
+    a placement in it is forgotten), `plan_layout` only has to plan the windows in view and those that
+    were on screen before.
+    """
+
+    _placements: Dict[WindowID, WindowPlacement]
+    # Workspace id -> the windows it last had on screen
+    _shown: Dict[WorkspaceID, Set[WindowID]]
+    # Workspace id -> its version when the rest of its windows were planned hidden
+    _settled: Dict[WorkspaceID, int]
+
+    def __init__(self):
+        self._placements = {}
+        self._shown = {}
+        self._settled = {}
+
+    def settled(self, workspace: Workspace) -> bool:
+        "Whether every window of `workspace` not in `shown` is already planned hidden"
+        return self._settled.get(workspace.id) == workspace.version
+
+    def shown(self, workspace: Workspace) -> Set[WindowID]:
+        return self._shown.get(workspace.id, set())
+
+    def planned(self, workspace: Workspace, shown: Set[WindowID]):
+        "Every window of `workspace` has been planned, and `shown` are the ones on screen"
+        self._shown[workspace.id] = shown
+        self._settled[workspace.id] = workspace.version
+
+    def diff(self, plan: LayoutPlan) -> LayoutPlan:
+        "Return the placements in `plan` that differ from what was last committed"
+        changes = LayoutPlan()
+        for p in plan:
+            if self._placements.get(p.id) != p:
+                changes.add(p)
+        return changes
+
+    def commit(self, plan: LayoutPlan):
+        self._placements.update(plan.placements)
+
+    def get(self, win_id: WindowID) -> Optional[WindowPlacement]:
+        return self._placements.get(win_id)
+
+    def forget(self, win_id: WindowID, workspace: Optional[Workspace] = None):
+        """
+        Drop a window's committed placement, e.g. because it was destroyed or moved behind our back.
+        Pass the workspace it's still in to have it placed again by the next plan.
+        """
+        self._placements.pop(win_id, None)
+        if workspace is not None:
+            self._settled.pop(workspace.id, None)
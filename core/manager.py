@@ -1,20 +1,32 @@
 import asyncio
-from time import time
-import win32api
-import win32gui
 from adapters.base import Adapter
+from core.index import WindowIndex
+from core.input import InputSource, MonitorSpatialIndex
 from core.models import Monitor, Workspace
+from core.overview import Overview
+from core.recorder import recorder
+from core.trace import traced
 import signal
 
 class WindowManager:
     adapter: Adapter
     monitors: list[Monitor]
+    # Where every window lives, shared with the adapter
+    windows: WindowIndex
     focused_monitor: int
     running: bool
+    input: InputSource
+    # Open on one monitor at a time, if at all
+    overview: Overview | None = None
+    
+    _loop: asyncio.AbstractEventLoop | None = None
+    _stopped: asyncio.Event | None = None
     
     def __init__(self, adapter: Adapter):
         self.adapter = adapter
         self.monitors = adapter.get_monitors()
+        self.windows = adapter.get_window_index()
+        self.input = adapter.create_input_source()
         self.focused_monitor = 0
         self.running = True
         
@@ -28,17 +40,22 @@ class WindowManager:
             self.adapter.focus_window(first_win)
     
     async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        
         await self.adapter.initialize()
         
         # Intercept termination signals and stop running cleanly
         signal.signal(signal.SIGINT, lambda s, f: self.exit())
         signal.signal(signal.SIGTERM, lambda s, f: self.exit())
         
-        while self.running:
-            self.check_mouse_move()
-
-            await asyncio.sleep(0.05)
+        self.input.start(MonitorSpatialIndex([mon.rect for mon in self.monitors]), self.on_monitor_entered)
         
+        # Everything else is event driven, so just sleep until we're told to stop
+        if self.running:
+            await self._stopped.wait()
+        
+        self.input.stop()
         self.adapter.stop()
 
     def current_monitor(self) -> Monitor:
@@ -48,6 +65,7 @@ class WindowManager:
     ### Focus changes
     ####################################
 
+    @traced()
     def move_focus_horizontal(self, delta):
         ws = self.current_monitor().current_workspace()
         if not ws.windows:
@@ -61,6 +79,7 @@ class WindowManager:
             if focused:
                 self.adapter.focus_window(focused)
 
+    @traced()
     def focus_position(self, position: int):
         ws = self.current_monitor().current_workspace()
         if not ws.windows:
@@ -75,11 +94,12 @@ class WindowManager:
             if focused:
                 self.adapter.focus_window(focused)        
     
+    @traced()
     def move_workspace_focus(self, delta):
         m = self.current_monitor()
         prev_focus = m._focused_workspace
         ws = m.current_workspace()
-        target_index = m.workspaces.index(ws) + delta
+        target_index = (m.index_of(ws) or 0) + delta
         if target_index < 0 or target_index >= len(m.workspaces):
             return
         m._focused_workspace = m.workspaces[target_index].id
@@ -91,8 +111,9 @@ class WindowManager:
             if focused_win:
                 self.adapter.focus_window(focused_win)
         
-            self.adapter.refresh()
+            self.adapter.refresh(self.focused_monitor)
 
+    @traced()
     def move_monitor_focus(self, delta):
         target_index = self.focused_monitor + delta
         if target_index < 0 or target_index >= len(self.monitors):
@@ -108,27 +129,30 @@ class WindowManager:
     ### Window/workspace manipulation
     ####################################
 
+    @traced()
     def resize_window(self, delta):
         ws = self.current_monitor().current_workspace()
         win = ws.focused_window()
         if not win:
             return
-        win.width = max(0.1, win.width + delta)
+        ws.set_window_width(win, max(0.1, win.width + delta))
         ws.layout_windows()
         self.adapter.resize_window(win)
 
+    @traced()
     def toggle_maximize_focused_window(self):
         ws = self.current_monitor().current_workspace()
         win = ws.focused_window()
         if not win:
             return
         if win.width < 0.99:
-            win.width = 1.0
+            ws.set_window_width(win, 1.0)
         else:
-            win.width = 0.5
+            ws.set_window_width(win, 0.5)
         ws.layout_windows()
         self.adapter.resize_window(win)
     
+    @traced()
     def toggle_preset_width_focused_window(self):
         preset_widths = [0.4, 0.5, 0.6, 1.0]
         ws = self.current_monitor().current_workspace()
@@ -140,27 +164,25 @@ class WindowManager:
             new_index = (current_index + 1) % len(preset_widths)
         except ValueError:
             new_index = 0
-        win.width = preset_widths[new_index]
+        ws.set_window_width(win, preset_widths[new_index])
         ws.layout_windows()
         self.adapter.resize_window(win)
         
         self.update_workspaces()
     
+    @traced()
     def move_window_horizontal(self, delta):
         ws = self.current_monitor().current_workspace()
         win = ws.focused_window()
         if not win:
             return
-        indices = {w.id: i for i, w in enumerate(ws.windows)}
-        current_index = indices.get(win.id, 0)
-        new_index = max(0, min(current_index + delta, len(ws.windows) - 1))
-        if new_index == current_index:
+        current_index = ws.index_of(win.id) or 0
+        if not ws.move_window(win, current_index + delta):
             return
-        ws.windows.pop(current_index)
-        ws.windows.insert(new_index, win)
         ws.layout_windows()
-        self.adapter.refresh()
+        self.adapter.refresh(self.focused_monitor)
     
+    @traced()
     def move_window_vertical(self, delta):
         "Move the window between workspaces on the current monitor"
         current_mon = self.current_monitor()
@@ -168,16 +190,15 @@ class WindowManager:
         win = ws.focused_window()
         if not win:
             return
-        target_ws_index = current_mon.workspaces.index(ws) + delta
+        target_ws_index = (current_mon.index_of(ws) or 0) + delta
         if target_ws_index < 0 or target_ws_index >= len(current_mon.workspaces):
             return
         target_ws = current_mon.workspaces[target_ws_index]
         # Remove from current workspace
-        ws.windows.remove(win)
+        ws.remove_window(win)
         ws.layout_windows()
         # Add to target workspace
-        target_ws.windows.append(win)
-        win.workspace = target_ws
+        target_ws.add_window(win)
         target_ws.layout_windows()
         # Focus the moved window
         target_ws._focused_id = win.id
@@ -188,23 +209,20 @@ class WindowManager:
         
         self.update_workspaces()
 
+    @traced()
     def move_window_to_position(self, position: int):
         ws = self.current_monitor().current_workspace()
         win = ws.focused_window()
         if not win:
             return
-        indices = {w.id: i for i, w in enumerate(ws.windows)}
-        current_index = indices.get(win.id, 0)
         if position < 0:
             position = len(ws.windows) + position
-        position = max(0, min(position, len(ws.windows) - 1))
-        if position == current_index:
+        if not ws.move_window(win, position):
             return
-        ws.windows.pop(current_index)
-        ws.windows.insert(position, win)
         ws.layout_windows()
-        self.adapter.refresh()
+        self.adapter.refresh(self.focused_monitor)
     
+    @traced()
     def move_window_to_monitor(self, delta: int):
         current_mon = self.current_monitor()
         ws = current_mon.current_workspace()
@@ -215,16 +233,16 @@ class WindowManager:
         target_mon_index = self.focused_monitor + delta
         if target_mon_index < 0 or target_mon_index >= len(self.monitors):
             return
+        source_mon_index = self.focused_monitor
         target_mon = self.monitors[target_mon_index]
         target_ws = target_mon.current_workspace()
         
         # Remove from current workspace
-        ws.windows.remove(win)
+        ws.remove_window(win)
         ws.layout_windows()
         
         # Add to target workspace
-        target_ws.windows.append(win)
-        win.workspace = target_ws
+        target_ws.add_window(win)
         target_ws.layout_windows()
         
         # Update focused monitor
@@ -235,7 +253,53 @@ class WindowManager:
         self.adapter.focus_window(win)
         
         self.update_workspaces()
+        # Focusing only lays out the window's new monitor; close the gap it left on the old one
+        self.adapter.refresh(source_mon_index)
     
+    ####################################
+    ### Overview
+    ####################################
+
+    @traced()
+    def toggle_overview(self):
+        if self.overview and self.overview.active:
+            self.adapter.apply_overview(self.overview.exit(), None)
+            self.overview = None
+            return
+        self.overview = Overview(self.current_monitor())
+        self.adapter.apply_overview(self.overview.enter(), self.overview.monitor.rect)
+
+    @traced()
+    def scroll_overview(self, rows: int):
+        if not (self.overview and self.overview.active):
+            return
+        pitch = self.overview.row_height + self.overview.gap_px
+        changes = self.overview.scroll_by(rows * pitch)
+        if len(changes) > 0:
+            self.adapter.apply_overview(changes, self.overview.monitor.rect)
+
+    @traced()
+    def select_in_overview(self, x: int, y: int):
+        "Close the overview and focus the window under the point, if there is one; clicking the backdrop just closes it"
+        if not (self.overview and self.overview.active):
+            return
+        cell = self.overview.cell_at(x, y)
+        monitor = self.overview.monitor
+        self.toggle_overview()
+        if cell is None:
+            return
+
+        ws = monitor.workspaces[cell.row]
+        index = ws.index_of(cell.id)
+        if index is None:
+            return
+        self.focused_monitor = self.monitors.index(monitor)
+        monitor._focused_workspace = ws.id
+        ws._focused_id = cell.id
+        # Which lays out its monitor, now with the window's workspace active
+        self.adapter.focus_window(ws.windows[index])
+
+    @traced()
     def update_workspaces(self):
         "Makes sure that every monitor has at least one workspace and there are free workspaces on the top and bottom of each monitor with windows."
         for mon in self.monitors:
@@ -245,6 +309,7 @@ class WindowManager:
     ### Other interactions
     ####################################
 
+    @traced()
     def close_focused_window(self):
         ws = self.current_monitor().current_workspace()
         if not ws:
@@ -255,26 +320,24 @@ class WindowManager:
             return
         self.adapter.close_window(win)
 
-    def mouse_move(self, pos: list[float]):
-        for i, mon in enumerate(self.monitors):
-            if mon.contains_point(int(pos[0]), int(pos[1])):
-                if i == self.focused_monitor:
-                    break
-                self.focused_monitor = i
-                
-                win = mon.current_workspace().focused_window()
-                if win:
-                    self.adapter.focus_window(win)
-    
-    last_mouse_pos: tuple[int, int] | None = None
-    def check_mouse_move(self):
-        x, y = win32api.GetCursorPos()
-        if self.last_mouse_pos != (x, y):
-            self.last_mouse_pos = (x, y)
-            self.mouse_move([x, y])
+    @traced()
+    def on_monitor_entered(self, index: int):
+        "The cursor moved onto another monitor, so focus follows it"
+        if index == self.focused_monitor or not 0 <= index < len(self.monitors):
+            return
+        if recorder.active:
+            recorder.monitor_entered(index)
+        self.focused_monitor = index
+        
+        win = self.monitors[index].current_workspace().focused_window()
+        if win:
+            self.adapter.focus_window(win)
 
     def exit(self, restart: bool = False):
         self.running = False
+        # This can be called from a signal handler, so wake the loop up safely
+        if self._loop and self._stopped:
+            self._loop.call_soon_threadsafe(self._stopped.set)
         
         if restart:
             # Open a new process after a short delay
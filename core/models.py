@@ -1,5 +1,9 @@
-from dataclasses import dataclass, field
-from typing import Any, List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.trace import traced
+from log import log_debug
 
 WindowID = int
 
@@ -11,9 +15,16 @@ class Window:
     data: Any = None
     
     # in screen-widths
-    x: float = 0.0
-    # in screen-widths
+    # Only change this through Workspace.set_window_width so the strip stays in sync
     width: float = 1.0
+    
+    # in screen-widths
+    @property
+    def x(self) -> float:
+        "Derived from the workspace's prefix sums, so it's never stale"
+        if self.workspace is None:
+            return 0.0
+        return self.workspace.window_x(self)
 
 WorkspaceID = int
 workspace_id_autoinc: WorkspaceID = 0
@@ -23,11 +34,28 @@ def _get_next_workspace_id() -> WorkspaceID:
     return workspace_id_autoinc
 
 class Workspace:
+    """
+    A horizontal strip of windows.
+    `windows` is kept for iteration, but should only be mutated through the methods
+    here so the position index and prefix sums stay correct.
+    """
+    
     id: WorkspaceID
     windows: List[Window]
     monitor: Optional["Monitor"] = None
     _focused_id: Optional[WindowID] = None
     scroll_offset: float = 0.0
+    # Bumped whenever windows join, so layouts know every window has to be placed again
+    version: int = 0
+    
+    # window id -> index in `windows`
+    _positions: Dict[WindowID, int]
+    # _prefix[i] is the sum of the widths of windows[:i], i.e. the x of windows[i].
+    # Only the first _prefix_valid entries are up to date; the rest are recomputed on demand,
+    # so a mutation in the middle of the strip doesn't cost a full pass until something past it is queried.
+    _prefix: List[float]
+    _prefix_valid: int
+    _total_width: float
     
     def __init__(self, windows: Optional[List[Window]] = None):
         self.id = _get_next_workspace_id()
@@ -35,6 +63,140 @@ class Workspace:
         self.windows = windows if windows is not None else []
         for win in self.windows:
             win.workspace = self
+        
+        self._positions = {}
+        self._reindex(0)
+        self._prefix = [0.0] * (len(self.windows) + 1)
+        self._prefix_valid = 1
+        self._total_width = sum(win.width for win in self.windows)
+    
+    ####################################
+    ### Strip index
+    ####################################
+    
+    def _reindex(self, start: int, stop: Optional[int] = None):
+        if stop is None:
+            stop = len(self.windows)
+        for i in range(start, stop):
+            self._positions[self.windows[i].id] = i
+    
+    def _invalidate_prefix(self, index: int):
+        "Mark the prefix sums after windows[index] as stale"
+        self._prefix_valid = min(self._prefix_valid, index + 1)
+    
+    def _x_at(self, index: int) -> float:
+        while self._prefix_valid <= index:
+            self._extend_prefix()
+        return self._prefix[index]
+    
+    def _extend_prefix(self):
+        i = self._prefix_valid
+        self._prefix[i] = self._prefix[i - 1] + self.windows[i - 1].width
+        self._prefix_valid += 1
+        if i == len(self.windows):
+            # Resync the running total so float drift doesn't accumulate
+            self._total_width = self._prefix[i]
+    
+    def index_of(self, win_id: WindowID) -> Optional[int]:
+        return self._positions.get(win_id)
+    
+    def window_x(self, win: Window) -> float:
+        index = self._positions.get(win.id)
+        if index is None:
+            return 0.0
+        return self._x_at(index)
+    
+    def total_width(self) -> float:
+        return self._total_width
+    
+    def windows_in_view(self, offset: Optional[float] = None, view_width: float = 1.0) -> List[Window]:
+        "Return the windows intersecting [offset, offset + view_width) in strip order"
+        if offset is None:
+            offset = self.scroll_offset
+        n = len(self.windows)
+        view_end = offset + view_width
+        
+        # Only extend the prefix sums as far as the end of the viewport
+        while self._prefix_valid <= n and self._prefix[self._prefix_valid - 1] < view_end:
+            self._extend_prefix()
+        valid = self._prefix_valid
+        
+        # windows[i] spans [_prefix[i], _prefix[i + 1])
+        start = bisect_right(self._prefix, offset, 1, valid) - 1
+        end = min(bisect_left(self._prefix, view_end, 0, valid), n)
+        return self.windows[start:end]
+    
+    ####################################
+    ### Mutations
+    ####################################
+    
+    def add_window(self, win: Window, position: Optional[int] = None):
+        if position is None or position >= len(self.windows):
+            position = len(self.windows)
+        position = max(0, position)
+        
+        self.windows.insert(position, win)
+        # Entries past _prefix_valid are scratch space, so we only need the length to match
+        self._prefix.append(0.0)
+        self._invalidate_prefix(position)
+        self._reindex(position)
+        self._total_width += win.width
+        self.version += 1
+        win.workspace = self
+
+    def add_windows(self, wins: List[Window]):
+        "Append many windows at once, reindexing only the new ones"
+        start = len(self.windows)
+        self.windows.extend(wins)
+        self._prefix.extend([0.0] * len(wins))
+        self._invalidate_prefix(start)
+        self._reindex(start)
+        self.version += 1
+        for win in wins:
+            self._total_width += win.width
+            win.workspace = self
+
+    def remove_window(self, win: Window) -> bool:
+        index = self._positions.pop(win.id, None)
+        if index is None:
+            return False
+        
+        self.windows.pop(index)
+        self._prefix.pop()
+        self._invalidate_prefix(index)
+        self._reindex(index)
+        self._total_width -= win.width
+        if win.workspace is self:
+            win.workspace = None
+        return True
+    
+    def move_window(self, win: Window, position: int) -> bool:
+        "Move a window to another position in the strip. Returns whether anything changed."
+        current = self._positions.get(win.id)
+        if current is None:
+            return False
+        position = max(0, min(position, len(self.windows) - 1))
+        if position == current:
+            return False
+        
+        self.windows.pop(current)
+        self.windows.insert(position, win)
+        lo, hi = min(current, position), max(current, position)
+        # Only the windows between the two positions shifted
+        self._reindex(lo, hi + 1)
+        self._invalidate_prefix(lo)
+        return True
+    
+    def set_window_width(self, win: Window, width: float):
+        index = self._positions.get(win.id)
+        if index is not None:
+            self._total_width += width - win.width
+            self._invalidate_prefix(index)
+        win.width = width
+    
+    ####################################
+    ### Focus and scrolling
+    ####################################
 
     def focused_window(self):
         if not self._focused_id and len(self.windows) > 0:
@@ -42,14 +204,12 @@ class Workspace:
         
         if not self.windows:
             return None
-        return next((w for w in self.windows if w.id == self._focused_id), self.windows[0])
+        index = self._positions.get(self._focused_id) if self._focused_id else None
+        return self.windows[index] if index is not None else self.windows[0]
     
+    @traced()
     def layout_windows(self):
-        x = 0
-        for win in self.windows:
-            win.x = x
-            x += win.width
-        
+        "Window positions are derived from the prefix sums, so this only has to fix up the scroll offset"
         self.scroll_to_focus()
     
     def focus_position(self, position: int):
@@ -61,10 +221,9 @@ class Workspace:
         position = max(0, min(position, len(self.windows) - 1))
         self._focused_id = self.windows[position].id
         
-        self.layout_windows()
         self.scroll_to_focus()
         
-        print(f"Workspace focus_position: focused_id={self._focused_id}")
+        log_debug("Workspace focus_position", focused_id=self._focused_id)
     
     def move_focus(self, delta: int):
         if not self.windows:
@@ -74,19 +233,17 @@ class Workspace:
             self._focused_id = self.windows[0].id
             return
 
-        indices = {w.id: i for i, w in enumerate(self.windows)}
-        current_index = indices.get(self._focused_id, 0)
+        current_index = self._positions.get(self._focused_id, 0)
         new_index = max(0, min(current_index + delta, len(self.windows) - 1))
         self._focused_id = self.windows[new_index].id
         
-        self.layout_windows()
         self.scroll_to_focus()
         
-        print(f"Workspace move_focus: {current_index} -> {new_index} / {len(self.windows)}, focused_id={self._focused_id}")
+        log_debug("Workspace move_focus: %d -> %d / %d", current_index, new_index, len(self.windows), focused_id=self._focused_id)
     
     def scroll_to_focus(self):
         # If the total width of windows is less than a screen, center them
-        total_width = sum(win.width for win in self.windows)
+        total_width = self._total_width
         if total_width <= 1.0:
             self.scroll_offset = (total_width - 1.0) / 2.0
             return
@@ -102,8 +259,11 @@ class Workspace:
             return
         
         win_start = focused_win.x
-        win_end = focused_win.x + focused_win.width
-        if win_start < self.scroll_offset:
+        win_end = win_start + focused_win.width
+        if win_end - win_start > 1.0:
+            # Can't fit: always show its right edge, rather than flipping between its edges on every call
+            self.scroll_offset = win_end - 1.0
+        elif win_start < self.scroll_offset:
             self.scroll_offset = win_start
         elif win_end > self.scroll_offset + 1.0:
             self.scroll_offset = win_end - 1.0
@@ -167,43 +327,65 @@ Rect.ZERO = Rect(0, 0, 0, 0)
 class Monitor:
     workspaces: List[Workspace]
     rect: Rect = Rect.ZERO
+    # The part of the monitor not covered by the taskbar etc.
+    work_rect: Rect = Rect.ZERO
     _focused_workspace: WorkspaceID
+    # workspace id -> index in `workspaces`
+    _workspace_positions: Dict[WorkspaceID, int]
     
-    def __init__(self, workspaces: Optional[List[Workspace]] = None, rect: Optional[Rect] = None):
+    def __init__(self, workspaces: Optional[List[Workspace]] = None, rect: Optional[Rect] = None, work_rect: Optional[Rect] = None):
         self.workspaces = workspaces if workspaces is not None else []
         for ws in self.workspaces:
             ws.monitor = self
+        self._workspace_positions = {}
+        self._reindex_workspaces()
         
         if rect is not None:
             self.rect = rect
+        self.work_rect = work_rect if work_rect is not None else self.rect
         
         self._focused_workspace = self.workspaces[0].id if self.workspaces else -1
     
+    def _reindex_workspaces(self, start: int = 0):
+        for i in range(start, len(self.workspaces)):
+            self._workspace_positions[self.workspaces[i].id] = i
+    
+    def index_of(self, ws: Workspace) -> Optional[int]:
+        return self._workspace_positions.get(ws.id)
+    
+    def add_workspace(self, ws: Workspace, position: Optional[int] = None):
+        if position is None:
+            position = len(self.workspaces)
+        self.workspaces.insert(position, ws)
+        ws.monitor = self
+        self._reindex_workspaces(position)
+    
     def contains_point(self, x: int, y: int) -> bool:
         return self.rect.contains(x, y)
 
     def current_workspace(self):
-        for ws in self.workspaces:
-            if ws.id == self._focused_workspace:
-                return ws
+        index = self._workspace_positions.get(self._focused_workspace)
+        if index is not None:
+            return self.workspaces[index]
         if self.workspaces:
             self._focused_workspace = self.workspaces[0].id
             return self.workspaces[0]
         
-        self.workspaces.append(Workspace())
+        self.add_workspace(Workspace())
+        self._focused_workspace = self.workspaces[0].id
         return self.workspaces[0]
     
     def ensure_valid_workspaces(self):
         # Ensure at least one workspace
         if not self.workspaces:
-            self.workspaces.append(Workspace())
+            self.add_workspace(Workspace())
         
         # Ensure focused workspace is valid
-        if not any(ws.id == self._focused_workspace for ws in self.workspaces):
+        if self._focused_workspace not in self._workspace_positions:
             self._focused_workspace = self.workspaces[0].id
         
         # Ensure there is a free workspace at the top and bottom
         if self.workspaces[0].windows:
-            self.workspaces.insert(0, Workspace())
+            self.add_workspace(Workspace(), 0)
         if self.workspaces[-1].windows:
-            self.workspaces.append(Workspace())
\ No newline at end of file
+            self.add_workspace(Workspace())
\ No newline at end of file
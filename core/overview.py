@@ -0,0 +1,201 @@
+from dataclasses import dataclass, field
+from typing import Dict, Generic, List, Optional
+
+from core.models import Monitor, Rect, WindowID
+from core.pool import P, ProxyPool
+
+@dataclass(frozen=True)
+class OverviewCell:
+    "One window's thumbnail in the overview"
+    id: WindowID
+    # Which workspace (row) it's in
+    row: int
+    # The part of the window to show, relative to the window
+    source: Rect
+    # Where the thumbnail goes on screen
+    rect: Rect
+
+@dataclass
+class OverviewChanges:
+    "What has to happen to go from one overview frame to the next"
+    shown: List[OverviewCell] = field(default_factory=list)
+    moved: List[OverviewCell] = field(default_factory=list)
+    hidden: List[WindowID] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.shown) + len(self.moved) + len(self.hidden)
+
+class Overview:
+    """
+    A zoomed-out view of every workspace on a monitor: one row per workspace, each row showing its
+    strip at its own scroll offset, scaled down by `scale`. The rows scroll vertically.
+
+    Only cells that are actually on screen are computed. Rows are found arithmetically and the windows
+    in a row come from the workspace's prefix sums (`Workspace.windows_in_view`), so opening the overview
+    or scrolling it costs about the number of visible windows, however many windows there are in total.
+    `update` returns only what changed since the last frame, so thumbnails are created, moved and
+    recycled as cells enter and leave the screen.
+    """
+
+    monitor: Monitor
+    scale: float
+    gap_px: int
+    # Vertical scroll, in pixels from the top of the first row
+    scroll_y: int
+    active: bool
+
+    _shown: Dict[WindowID, OverviewCell]
+
+    def __init__(self, monitor: Monitor, scale: float = 0.25, gap_px: int = 16):
+        self.monitor = monitor
+        self.scale = scale
+        self.gap_px = gap_px
+        self.scroll_y = 0
+        self.active = False
+        self._shown = {}
+
+    @property
+    def row_height(self) -> int:
+        return max(1, round(self.monitor.work_rect.height() * self.scale))
+
+    @property
+    def content_height(self) -> int:
+        rows = len(self.monitor.workspaces)
+        return rows * self.row_height + (rows + 1) * self.gap_px
+
+    def enter(self) -> OverviewChanges:
+        self.active = True
+        # Start with the current workspace in view
+        current = self.monitor.index_of(self.monitor.current_workspace()) if self.monitor.workspaces else None
+        self.scroll_y = 0
+        self._scroll_to_row(current or 0)
+        return self.update()
+
+    def exit(self) -> OverviewChanges:
+        self.active = False
+        changes = OverviewChanges(hidden=list(self._shown))
+        self._shown = {}
+        return changes
+
+    def scroll_by(self, pixels: int) -> OverviewChanges:
+        self.scroll_y = self._clamp_scroll(self.scroll_y + pixels)
+        return self.update()
+
+    def cell_at(self, x: int, y: int) -> Optional[OverviewCell]:
+        "The window under a point, e.g. for picking one with the mouse"
+        for cell in self._shown.values():
+            if cell.rect.contains(x, y):
+                return cell
+        return None
+
+    def visible_cells(self) -> Dict[WindowID, OverviewCell]:
+        mon = self.monitor.rect
+        row_h = self.row_height
+        pitch = row_h + self.gap_px
+        top = mon.top() + self.gap_px - self.scroll_y
+
+        # Rows overlapping the screen
+        first = max(0, (self.scroll_y - self.gap_px) // pitch)
+        last = min(len(self.monitor.workspaces) - 1, (self.scroll_y + mon.height()) // pitch)
+
+        # A screen-width of strip is this many pixels in the overview
+        strip_px = self.monitor.work_rect.width() * self.scale
+        view_width = (mon.width() - 2 * self.gap_px) / strip_px
+        # Full size of a window, for the thumbnail's source rect
+        full_w = self.monitor.work_rect.width()
+        full_h = self.monitor.work_rect.height()
+
+        cells: Dict[WindowID, OverviewCell] = {}
+        for row in range(first, last + 1):
+            ws = self.monitor.workspaces[row]
+            y = top + row * pitch
+            offset = max(0.0, ws.scroll_offset)
+            for win in ws.windows_in_view(offset, view_width):
+                x = mon.left() + self.gap_px + round((win.x - offset) * strip_px)
+                rect = Rect(x, y, x + max(1, round(win.width * strip_px)), y + row_h)
+                if not mon.intersects(rect):
+                    continue
+                source = Rect(0, 0, max(1, round(win.width * full_w)), full_h)
+                cells[win.id] = OverviewCell(win.id, row, source, rect)
+        return cells
+
+    def update(self) -> OverviewChanges:
+        "Recompute what's on screen and return the difference from last time"
+        if not self.active:
+            return OverviewChanges()
+        cells = self.visible_cells()
+        changes = OverviewChanges()
+        for win_id, cell in cells.items():
+            prev = self._shown.get(win_id)
+            if prev is None:
+                changes.shown.append(cell)
+            elif prev != cell:
+                changes.moved.append(cell)
+        changes.hidden = [win_id for win_id in self._shown if win_id not in cells]
+        self._shown = cells
+        return changes
+
+    def _scroll_to_row(self, row: int):
+        pitch = self.row_height + self.gap_px
+        row_top = row * pitch
+        row_bottom = row_top + pitch + self.gap_px
+        if row_bottom > self.scroll_y + self.monitor.rect.height():
+            self.scroll_y = row_bottom - self.monitor.rect.height()
+        if row_top < self.scroll_y:
+            self.scroll_y = row_top
+        self.scroll_y = self._clamp_scroll(self.scroll_y)
+
+    def _clamp_scroll(self, scroll_y: int) -> int:
+        return max(0, min(scroll_y, self.content_height - self.monitor.rect.height()))
+
+class OverviewProxies(Generic[P]):
+    """
+    Turns overview changes into thumbnails: cells that scroll into view take a proxy from the pool,
+    cells that move keep theirs, and cells that scroll out give theirs back for the next one to reuse.
+    Like the pool, it belongs to whichever thread owns the proxy windows.
+    """
+
+    pool: ProxyPool[P]
+    _proxies: Dict[WindowID, P]
+
+    def __init__(self, pool: ProxyPool[P]):
+        self.pool = pool
+        self._proxies = {}
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    def get(self, win_id: WindowID) -> Optional[P]:
+        return self._proxies.get(win_id)
+
+    def ids(self) -> List[WindowID]:
+        return list(self._proxies)
+
+    def apply(self, changes: OverviewChanges) -> List[P]:
+        "Returns the proxies that were newly attached"
+        # Release first so the proxies can be reused for what's coming into view
+        for win_id in changes.hidden:
+            proxy = self._proxies.pop(win_id, None)
+            if proxy is not None:
+                self.pool.release(proxy)
+
+        shown = list(changes.shown)
+        for cell in changes.moved:
+            proxy = self._proxies.get(cell.id)
+            if proxy is None:
+                # It didn't get a proxy when it was shown (the pool was full); try again
+                shown.append(cell)
+                continue
+            self.pool.backend.move(proxy, cell.source, *_geometry(cell))
+
+        attached: List[P] = []
+        for cell in shown:
+            proxy = self.pool.acquire(cell.id, cell.source, *_geometry(cell))
+            if proxy is not None:
+                self._proxies[cell.id] = proxy
+                attached.append(proxy)
+        return attached
+
+def _geometry(cell: OverviewCell) -> tuple[tuple[int, int], tuple[int, int]]:
+    "Position and size of a cell's thumbnail"
+    return (cell.rect.left(), cell.rect.top()), (cell.rect.width(), cell.rect.height())
@@ -0,0 +1,151 @@
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Generic, Optional, TypeVar
+
+from core.models import Rect
+
+P = TypeVar("P")
+
+class ProxyBackend(ABC, Generic[P]):
+    "Creates and drives the proxy windows that stand in for managed windows"
+
+    @abstractmethod
+    def create(self) -> P:
+        "A new, hidden proxy that isn't showing anything yet"
+        pass
+
+    @abstractmethod
+    def attach(self, proxy: P, source: int, src_rect: Rect, pos: tuple[int, int], size: Optional[tuple[int, int]] = None):
+        "Start showing `src_rect` of window `source` at `pos`, scaled to `size` if given"
+        pass
+
+    @abstractmethod
+    def move(self, proxy: P, src_rect: Rect, pos: tuple[int, int], size: Optional[tuple[int, int]] = None):
+        "Change what an attached proxy shows, or where"
+        pass
+
+    @abstractmethod
+    def park(self, proxy: P):
+        "Stop showing anything and hide, ready to be attached again"
+        pass
+
+    @abstractmethod
+    def destroy(self, proxy: P):
+        pass
+
+    @abstractmethod
+    def alive(self, proxy: P) -> bool:
+        "False if the proxy was destroyed behind our back"
+        pass
+
+@dataclass
+class PoolStats:
+    created: int = 0
+    reused: int = 0
+    released: int = 0
+    destroyed: int = 0
+    # Acquires refused because the pool was at max_total
+    refused: int = 0
+
+class ProxyPool(Generic[P]):
+    """
+    Keeps released proxies around, hidden, so the next window that needs one can take it over
+    instead of creating a new one. At most `max_idle` are kept, and any that sit unused for
+    `idle_timeout` seconds are destroyed by `evict_idle`.
+    Not thread safe; call it from the thread that owns the proxy windows.
+    """
+
+    backend: ProxyBackend[P]
+    max_idle: int
+    max_total: int
+    idle_timeout: float
+    stats: PoolStats
+
+    # Oldest first, with when they were released
+    _idle: deque[tuple[float, P]]
+    _in_use: int
+    _clock: Callable[[], float]
+
+    def __init__(self, backend: ProxyBackend[P], max_idle: int = 8, max_total: int = 256,
+                 idle_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.max_idle = max_idle
+        self.max_total = max_total
+        self.idle_timeout = idle_timeout
+        self.stats = PoolStats()
+        self._idle = deque()
+        self._in_use = 0
+        self._clock = clock
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    def prewarm(self, count: int):
+        "Create proxies ahead of time, up to `max_idle`"
+        now = self._clock()
+        while len(self._idle) < min(count, self.max_idle) and self._in_use + len(self._idle) < self.max_total:
+            self._idle.append((now, self.backend.create()))
+            self.stats.created += 1
+
+    def acquire(self, source: int, src_rect: Rect, pos: tuple[int, int], size: Optional[tuple[int, int]] = None) -> Optional[P]:
+        "A proxy showing `source`, or None if we're at `max_total`"
+        proxy = self._take_idle()
+        if proxy is not None:
+            self.stats.reused += 1
+        elif self._in_use + len(self._idle) >= self.max_total:
+            self.stats.refused += 1
+            return None
+        else:
+            proxy = self.backend.create()
+            self.stats.created += 1
+
+        self.backend.attach(proxy, source, src_rect, pos, size)
+        self._in_use += 1
+        return proxy
+
+    def release(self, proxy: P):
+        "Give back a proxy that's no longer needed"
+        self._in_use -= 1
+        self.stats.released += 1
+        if not self.backend.alive(proxy):
+            return
+        if len(self._idle) >= self.max_idle:
+            self._destroy(proxy)
+            return
+        self.backend.park(proxy)
+        self._idle.append((self._clock(), proxy))
+
+    def evict_idle(self) -> int:
+        "Destroy proxies that have been idle too long. Returns how many."
+        cutoff = self._clock() - self.idle_timeout
+        evicted = 0
+        while self._idle and self._idle[0][0] <= cutoff:
+            _, proxy = self._idle.popleft()
+            self._destroy(proxy)
+            evicted += 1
+        return evicted
+
+    def clear(self):
+        "Destroy every idle proxy"
+        while self._idle:
+            _, proxy = self._idle.popleft()
+            self._destroy(proxy)
+
+    def _take_idle(self) -> Optional[P]:
+        # Most recently released first; those are the least likely to have been destroyed under us
+        while self._idle:
+            _, proxy = self._idle.pop()
+            if self.backend.alive(proxy):
+                return proxy
+        return None
+
+    def _destroy(self, proxy: P):
+        self.backend.destroy(proxy)
+        self.stats.destroyed += 1
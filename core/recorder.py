@@ -0,0 +1,96 @@
+import gzip
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List
+
+from core.events import EventKind
+from core.models import Monitor, Rect, WindowID, Workspace
+
+# Captures of what the window manager was fed: the monitor layout, the window events it acted on and
+# the commands it ran, each with when it happened. `bench.replay` feeds a capture back through the
+# fake adapter, so a sequence that's slow or broken on a real desktop can be rerun anywhere.
+#
+# The file is gzipped JSON lines: a header with the monitors, then one entry per line:
+#     ["e", t, kind, hwnd, data]          a window event; data is the monitor for CREATED, the rect for MOVED
+#     ["c", t, [[name, args, repeat]...]] a batch of commands, run together
+#     ["m", t, monitor]                   the cursor moved onto another monitor, which focus follows
+# t is seconds since recording started. Only what changes the window manager's state is recorded;
+# e.g. the foreground window changing only reorders proxies, so it isn't.
+
+CAPTURE_VERSION = 2
+
+@dataclass
+class Capture:
+    # (monitor rect, work area) per monitor
+    monitors: List[tuple[Rect, Rect]] = field(default_factory=list)
+    entries: List[list] = field(default_factory=list)
+
+    def build_monitors(self) -> List[Monitor]:
+        "Fresh monitors like the recording started with; windows come in as CREATED events"
+        return [Monitor(workspaces=[Workspace()], rect=rect, work_rect=work) for rect, work in self.monitors]
+
+class Recorder:
+    """
+    Buffers a capture in memory while `active`, to be saved when we stop.
+    Recording sites check `active` first, so this costs nothing when we're not recording.
+    Like the state it records, it belongs to the asyncio loop.
+    """
+
+    active: bool
+    capture: Capture
+    _clock: Callable[[], float]
+    _start: float
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.active = False
+        self.capture = Capture()
+        self._clock = clock
+        self._start = 0.0
+
+    def start(self):
+        self.capture = Capture()
+        self._start = self._clock()
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def monitors(self, monitors: Iterable[Monitor]):
+        self.capture.monitors = [(mon.rect, mon.work_rect) for mon in monitors]
+
+    def event(self, kind: EventKind, hwnd: WindowID, data: Any = None):
+        self.capture.entries.append(["e", self._now(), kind.name, hwnd, data])
+
+    def commands(self, commands: Iterable[Any]):
+        "Record a batch of `ipc.commands.Command`s"
+        self.capture.entries.append(["c", self._now(), [[cmd.name, cmd.args, cmd.repeat] for cmd in commands]])
+
+    def monitor_entered(self, index: int):
+        self.capture.entries.append(["m", self._now(), index])
+
+    def save(self, path: str):
+        save_capture(self.capture, path)
+
+    def _now(self) -> float:
+        return round(self._clock() - self._start, 6)
+
+def save_capture(capture: Capture, path: str):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        header = {"version": CAPTURE_VERSION, "monitors": [[list(rect), list(work)] for rect, work in capture.monitors]}
+        f.write(json.dumps(header, separators=(",", ":")) + "\n")
+        for entry in capture.entries:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+def load_capture(path: str) -> Capture:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != CAPTURE_VERSION:
+            raise ValueError(f"Unsupported capture version {header.get('version')}")
+        capture = Capture(monitors=[(Rect(*rect), Rect(*work)) for rect, work in header["monitors"]])
+        for line in f:
+            if line.strip():
+                capture.entries.append(json.loads(line))
+    return capture
+
+recorder = Recorder()
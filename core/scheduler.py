@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, Set
+
+DEFAULT_FRAME_INTERVAL = 1 / 60
+
+# Called with the monitor indices that need a relayout, or None for all of them
+FlushCallback = Callable[[Optional[Set[int]]], None]
+
+@dataclass
+class SchedulerStats:
+    requests: int = 0
+    flushes: int = 0
+
+    @property
+    def coalesced(self) -> int:
+        "Requests that didn't cost a layout pass of their own"
+        return self.requests - self.flushes
+
+class RefreshScheduler:
+    """
+    Collects refresh requests and flushes them at most once per frame on the asyncio loop,
+    so a burst of events (e.g. a browser restoring 30 windows) turns into a single layout pass.
+    Requests can come from any thread.
+
+    Until a loop is bound, requests flush immediately; that's what happens during startup and in tests.
+    """
+
+    interval: float
+    stats: SchedulerStats
+
+    _flush_cb: FlushCallback
+    _loop: Optional[asyncio.AbstractEventLoop]
+    _lock: threading.Lock
+    # Monitors waiting for a relayout; None means all of them
+    _dirty: Optional[Set[int]]
+    _pending: bool
+    _scheduled: bool
+    _holds: int
+    _last_flush: float
+
+    def __init__(self, flush: FlushCallback, interval: float = DEFAULT_FRAME_INTERVAL):
+        self.interval = interval
+        self.stats = SchedulerStats()
+        self._flush_cb = flush
+        self._loop = None
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._pending = False
+        self._scheduled = False
+        self._holds = 0
+        self._last_flush = 0.0
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        "Start coalescing requests onto `loop`"
+        with self._lock:
+            self._loop = loop
+            schedule = self._pending and not self._scheduled and self._holds == 0
+            self._scheduled = self._scheduled or schedule
+        if schedule:
+            self._schedule()
+
+    def request(self, monitor: Optional[int] = None):
+        "Mark a monitor (or every monitor) as needing a relayout"
+        with self._lock:
+            self.stats.requests += 1
+            if monitor is None:
+                self._dirty = None
+            elif self._dirty is not None:
+                self._dirty.add(monitor)
+            self._pending = True
+            if self._scheduled or self._holds > 0:
+                return
+            self._scheduled = self._loop is not None
+
+        if self._loop is None:
+            self.flush()
+        else:
+            self._schedule()
+
+    def _schedule(self):
+        loop = self._loop
+        assert loop is not None
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._schedule_on_loop()
+        else:
+            loop.call_soon_threadsafe(self._schedule_on_loop)
+
+    def _schedule_on_loop(self):
+        assert self._loop is not None
+        # Flush on the next frame boundary; if we've been idle that's right away
+        delay = self._last_flush + self.interval - time.perf_counter()
+        if delay <= 0:
+            self._loop.call_soon(self.flush)
+        else:
+            self._loop.call_later(delay, self.flush)
+
+    def flush(self):
+        "Run the pending refresh now, if there is one"
+        with self._lock:
+            self._scheduled = False
+            if not self._pending or self._holds > 0:
+                return
+            dirty = self._dirty
+            self._dirty = set()
+            self._pending = False
+            self.stats.flushes += 1
+            self._last_flush = time.perf_counter()
+
+        self._flush_cb(dirty)
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """
+        Don't flush while inside this block; anything requested in it is flushed once at the end.
+        Used to make a batch of commands cost a single refresh.
+        """
+        with self._lock:
+            self._holds += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._holds -= 1
+                release = self._holds == 0 and self._pending
+            if release:
+                self.flush()
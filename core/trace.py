@@ -0,0 +1,195 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, TypeVar
+
+# Spans along the hot path, from a command arriving to the Win32 calls that carry it out.
+# Tracing is off unless something turns it on (main.py's --trace). While it's off, `span` hands back
+# one shared do-nothing context manager and `traced` functions just check a flag before calling through.
+
+F = TypeVar("F", bound=Callable)
+
+# Durations are bucketed by powers of two of nanoseconds; 2^40ns is about 18 minutes
+BUCKETS = 41
+DEFAULT_MAX_EVENTS = 100_000
+
+_NULL_SPAN = contextlib.nullcontext()
+
+class Histogram:
+    "Durations of one kind of span"
+
+    count: int
+    total_ns: int
+    min_ns: int
+    max_ns: int
+    # buckets[b] counts durations with bit_length b, i.e. in [2^(b-1), 2^b)
+    buckets: list[int]
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, ns: int):
+        if self.count == 0 or ns < self.min_ns:
+            self.min_ns = ns
+        self.max_ns = max(self.max_ns, ns)
+        self.count += 1
+        self.total_ns += ns
+        self.buckets[min(ns.bit_length(), BUCKETS - 1)] += 1
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> int:
+        "An upper bound on the `q`th percentile (0-100), to within a factor of two"
+        if self.count == 0:
+            return 0
+        rank = q / 100 * self.count
+        seen = 0
+        for b, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(self.max_ns, (1 << b) - 1)
+        return self.max_ns
+
+class Span:
+    __slots__ = ("tracer", "name", "detail", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, detail: Optional[str]):
+        self.tracer = tracer
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._record(self.name, self.detail, self.start, time.perf_counter_ns())
+
+class Tracer:
+    """
+    Collects spans into a histogram per span name, and keeps the most recent `max_events`
+    individual spans for a Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+    Spans can be recorded from any thread.
+    """
+
+    enabled: bool
+    histograms: dict[str, Histogram]
+
+    # (name, detail, thread id, start ns, end ns)
+    _events: deque[tuple[str, Optional[str], int, int, int]]
+    _thread_names: dict[int, str]
+    _lock: threading.Lock
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {}
+        self._events = deque(maxlen=DEFAULT_MAX_EVENTS)
+        self._thread_names = {}
+        self._lock = threading.Lock()
+
+    def enable(self, max_events: int = DEFAULT_MAX_EVENTS):
+        with self._lock:
+            if self._events.maxlen != max_events:
+                self._events = deque(self._events, maxlen=max_events)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self._events.clear()
+            self._thread_names.clear()
+
+    def span(self, name: str, detail: Optional[str] = None):
+        """
+        Time a block. `detail` (e.g. which command) is kept with the span in the trace
+        and gets its own histogram as `name:detail`.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, detail)
+
+    def traced(self, name: Optional[str] = None) -> Callable[[F], F]:
+        "Decorator: every call to the function is a span, named after the function unless `name` is given"
+        def decorate(fn: F) -> F:
+            span_name = name or fn.__qualname__
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._record(span_name, None, start, time.perf_counter_ns())
+            return wrapper # type: ignore[return-value]
+        return decorate
+
+    def _record(self, name: str, detail: Optional[str], start: int, end: int):
+        tid = threading.get_ident()
+        key = name if detail is None else f"{name}:{detail}"
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.add(end - start)
+            self._events.append((name, detail, tid, start, end))
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+
+    def chrome_trace(self) -> dict:
+        "The recorded spans in Chrome's trace event format"
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        pid = os.getpid()
+        origin = min((start for _, _, _, start, _ in events), default=0)
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+            for tid, thread_name in thread_names.items()
+        ]
+        for name, detail, tid, start, end in events:
+            event = {
+                "name": name if detail is None else f"{name} {detail}",
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "pid": pid,
+                "tid": tid,
+                "ts": (start - origin) / 1000,
+                "dur": (end - start) / 1000,
+            }
+            trace.append(event)
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self) -> str:
+        "A table of every span, slowest total first"
+        with self._lock:
+            rows = sorted(self.histograms.items(), key=lambda item: item[1].total_ns, reverse=True)
+        width = max([len("span")] + [len(key) for key, _ in rows])
+        lines = [f"{'span':<{width}} {'count':>8} {'total ms':>10} {'mean us':>10} {'p50 us':>10} {'p95 us':>10} {'max us':>10}"]
+        for key, hist in rows:
+            lines.append(
+                f"{key:<{width}} {hist.count:>8} {hist.total_ns / 1e6:>10.2f} {hist.mean_ns / 1e3:>10.1f} "
+                f"{hist.percentile(50) / 1e3:>10.1f} {hist.percentile(95) / 1e3:>10.1f} {hist.max_ns / 1e3:>10.1f}"
+            )
+        return "\n".join(lines)
+
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
@@ -0,0 +1,140 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Optional
+
+from core.layout import WindowPlacement
+from core.models import WindowID
+from log import log_error
+
+class WindowState(Enum):
+    # On screen, wherever the layout put it
+    SHOWN = "shown"
+    # Moved out of sight but not minimized; cheap to bring back
+    PARKED = "parked"
+    MINIMIZED = "minimized"
+
+class VisibilityBackend(ABC):
+    "The platform calls that move a window between states"
+
+    @abstractmethod
+    def probe(self, win_id: WindowID) -> WindowState:
+        "What state a window we haven't touched yet is in"
+        pass
+
+    @abstractmethod
+    def restore(self, win_id: WindowID):
+        "Un-minimize without activating it"
+        pass
+
+    @abstractmethod
+    def park(self, win_id: WindowID):
+        "Move out of sight without minimizing. A minimized window is restored straight to where it's parked."
+        pass
+
+    @abstractmethod
+    def minimize(self, win_id: WindowID):
+        pass
+
+@dataclass
+class VisibilityStats:
+    restored: int = 0
+    parked: int = 0
+    minimized: int = 0
+    # Placements that needed no state change at all
+    unchanged: int = 0
+    failed: int = 0
+
+class VisibilityTracker:
+    """
+    Remembers what state each window was left in, so a placement only costs a platform call
+    when the window actually has to change state. Minimizing and restoring make other applications
+    repaint (and animate), so they're the most expensive thing we do to them.
+
+    Shown windows stay shown (positioning them is the layout's job). A window that has to go
+    out of sight is parked if the placement asks for it (it's just scrolled out of view) and
+    minimized otherwise; one that's already out of sight either way is left alone.
+    Only a minimized window needs restoring to be shown again; a parked one is just moved back.
+
+    Not thread safe; call it from the thread that applies layouts.
+    """
+
+    backend: VisibilityBackend
+    stats: VisibilityStats
+    _states: Dict[WindowID, WindowState]
+
+    def __init__(self, backend: VisibilityBackend):
+        self.backend = backend
+        self.stats = VisibilityStats()
+        self._states = {}
+
+    def state(self, win_id: WindowID) -> Optional[WindowState]:
+        return self._states.get(win_id)
+
+    def observe(self, win_id: WindowID, state: WindowState):
+        "Record a change that happened behind our back, e.g. the user minimizing a window"
+        self._states[win_id] = state
+
+    def forget(self, win_id: WindowID):
+        self._states.pop(win_id, None)
+
+    def transition(self, p: WindowPlacement) -> bool:
+        "Get the window into the state `p` needs. Returns False if that failed."
+        current = self._states.get(p.id)
+        if current is None:
+            current = self.backend.probe(p.id)
+
+        if p.visible:
+            target = WindowState.SHOWN
+            action = self.backend.restore if current is WindowState.MINIMIZED else None
+        elif current is not WindowState.SHOWN:
+            # Out of sight already
+            target, action = current, None
+        elif p.parked:
+            target, action = WindowState.PARKED, self.backend.park
+        else:
+            target, action = WindowState.MINIMIZED, self.backend.minimize
+
+        if action is not None:
+            try:
+                action(p.id)
+            except Exception as e:
+                log_error("Failed to change window %s from %s to %s: %s", p.id, current.value, target.value, e)
+                self.stats.failed += 1
+                self._states[p.id] = current
+                return False
+            self._count(target)
+        else:
+            self.stats.unchanged += 1
+        self._states[p.id] = target
+        return True
+
+    def park_minimized(self, win_id: WindowID) -> bool:
+        """
+        Park a window if it's minimized, e.g. because the overview is about to show its thumbnail:
+        DWM has nothing to draw for a minimized window, but keeps drawing a parked one.
+        Any other window is left alone. Returns False if parking failed.
+        """
+        current = self._states.get(win_id)
+        if current is None:
+            current = self.backend.probe(win_id)
+        self._states[win_id] = current
+        if current is not WindowState.MINIMIZED:
+            return True
+        try:
+            self.backend.park(win_id)
+        except Exception as e:
+            log_error("Failed to park minimized window %s: %s", win_id, e)
+            self.stats.failed += 1
+            return False
+        self._count(WindowState.PARKED)
+        self._states[win_id] = WindowState.PARKED
+        return True
+
+    def _count(self, target: WindowState):
+        if target is WindowState.SHOWN:
+            self.stats.restored += 1
+        elif target is WindowState.PARKED:
+            self.stats.parked += 1
+        else:
+            self.stats.minimized += 1
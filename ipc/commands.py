@@ -0,0 +1,166 @@
+import asyncio
+import subprocess
+import typing
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+from core.recorder import recorder
+from core.trace import span
+from log import log_debug, log_error
+
+if typing.TYPE_CHECKING:
+    from core.manager import WindowManager
+
+# Enough for any realistic burst of key repeats in one read
+READ_CHUNK = 64 * 1024
+
+@dataclass
+class Command:
+    name: str
+    args: list[str]
+    # How many identical commands in a row this stands for
+    repeat: int = 1
+
+    def __str__(self) -> str:
+        text = " ".join([self.name, *self.args])
+        return f"{text} (x{self.repeat})" if self.repeat > 1 else text
+
+@dataclass(frozen=True)
+class CommandSpec:
+    handler: Callable[["WindowManager", Command], None]
+    # Whether consecutive copies can be merged into one call, e.g. focus_right x5 -> focus +5.
+    # Only commands whose effect composes that way (same direction, clamped) are mergeable.
+    mergeable: bool = False
+
+def open_application(args: list[str]):
+    # Open as a disconnected process
+    try:
+        subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, close_fds=True, creationflags=subprocess.DETACHED_PROCESS)
+    except Exception as e:
+        log_error("Failed to open application %s: %s", " ".join(args), e)
+
+def _open(wm: "WindowManager", cmd: Command):
+    if not cmd.args:
+        log_error("No application specified to open.")
+        return
+    open_application(cmd.args)
+
+def _overview_select(wm: "WindowManager", cmd: Command):
+    try:
+        x, y = (int(arg) for arg in cmd.args)
+    except ValueError:
+        log_error("overview_select needs a screen position, got %s", cmd.args)
+        return
+    wm.select_in_overview(x, y)
+
+RESIZE_STEP = 0.1
+
+COMMANDS: dict[str, CommandSpec] = {
+    # Focus
+    "focus_left": CommandSpec(lambda wm, c: wm.move_focus_horizontal(-c.repeat), mergeable=True), # Focus left window in current workspace
+    "focus_right": CommandSpec(lambda wm, c: wm.move_focus_horizontal(c.repeat), mergeable=True), # Focus right window in current workspace
+    "workspace_up": CommandSpec(lambda wm, c: wm.move_workspace_focus(-1)), # Move to previous workspace
+    "workspace_down": CommandSpec(lambda wm, c: wm.move_workspace_focus(1)), # Move to next workspace
+    "focus_first": CommandSpec(lambda wm, c: wm.focus_position(0)), # Focus first window in current workspace
+    "focus_last": CommandSpec(lambda wm, c: wm.focus_position(-1)), # Focus last window in current workspace
+
+    # Moving windows
+    "move_left": CommandSpec(lambda wm, c: wm.move_window_horizontal(-c.repeat), mergeable=True), # Move focused window left
+    "move_right": CommandSpec(lambda wm, c: wm.move_window_horizontal(c.repeat), mergeable=True), # Move focused window right
+    "move_up": CommandSpec(lambda wm, c: wm.move_window_vertical(-1)), # Move focused window up
+    "move_down": CommandSpec(lambda wm, c: wm.move_window_vertical(1)), # Move focused window down
+    "move_first": CommandSpec(lambda wm, c: wm.move_window_to_position(0)), # Move focused window to first position
+    "move_last": CommandSpec(lambda wm, c: wm.move_window_to_position(-1)), # Move focused window to last position
+
+    # Monitors
+    "monitor_left": CommandSpec(lambda wm, c: wm.move_monitor_focus(-1)),
+    "monitor_right": CommandSpec(lambda wm, c: wm.move_monitor_focus(1)),
+    "move_monitor_left": CommandSpec(lambda wm, c: wm.move_window_to_monitor(-1)),
+    "move_monitor_right": CommandSpec(lambda wm, c: wm.move_window_to_monitor(1)),
+
+    # Resizing
+    "resize_inc": CommandSpec(lambda wm, c: wm.resize_window(RESIZE_STEP * c.repeat), mergeable=True), # Increase window size
+    "resize_dec": CommandSpec(lambda wm, c: wm.resize_window(-RESIZE_STEP * c.repeat), mergeable=True), # Decrease window size
+    "maximize_toggle": CommandSpec(lambda wm, c: wm.toggle_maximize_focused_window()),
+    "preset_width_toggle": CommandSpec(lambda wm, c: wm.toggle_preset_width_focused_window()),
+
+    # Overview
+    "overview_toggle": CommandSpec(lambda wm, c: wm.toggle_overview()),
+    "overview_up": CommandSpec(lambda wm, c: wm.scroll_overview(-c.repeat), mergeable=True),
+    "overview_down": CommandSpec(lambda wm, c: wm.scroll_overview(c.repeat), mergeable=True),
+    "overview_select": CommandSpec(_overview_select), # Click in the overview: overview_select <x> <y>
+
+    # Other
+    "close_window": CommandSpec(lambda wm, c: wm.close_focused_window()),
+    "open": CommandSpec(_open),
+    "exit": CommandSpec(lambda wm, c: wm.exit()),
+    "restart_wm": CommandSpec(lambda wm, c: wm.exit(restart=True)),
+}
+
+def parse_command(line: str) -> Optional[Command]:
+    parts = line.split()
+    if not parts:
+        return None
+    return Command(parts[0], parts[1:])
+
+def coalesce(commands: Iterable[Command]) -> list[Command]:
+    "Merge runs of identical mergeable commands into one command with a repeat count"
+    result: list[Command] = []
+    for cmd in commands:
+        prev = result[-1] if result else None
+        spec = COMMANDS.get(cmd.name)
+        if (prev is not None and spec is not None and spec.mergeable
+                and prev.name == cmd.name and prev.args == cmd.args):
+            prev.repeat += cmd.repeat
+        else:
+            result.append(cmd)
+    return result
+
+def dispatch(wm: "WindowManager", cmd: Command) -> bool:
+    "Run a command. Returns False if the command isn't known."
+    spec = COMMANDS.get(cmd.name)
+    if spec is None:
+        log_error("Unknown command: %s", cmd)
+        return False
+    with span("command", cmd.name):
+        spec.handler(wm, cmd)
+    return True
+
+def run_batch(wm: "WindowManager", commands: Iterable[Command]):
+    """
+    Run a batch of commands with a single refresh at the end, stopping early if one of them exits.
+    A command that fails is logged and skipped; the rest of the batch still runs.
+    """
+    commands = list(commands)
+    if recorder.active:
+        recorder.commands(commands)
+    with span("batch"), wm.adapter.scheduler.hold():
+        for cmd in commands:
+            log_debug("> %s", cmd)
+            try:
+                dispatch(wm, cmd)
+            except Exception as e:
+                # Otherwise it ends the command stream, and the keyboard stops working until a restart
+                log_error("Command %s failed: %s", cmd, e)
+            if not wm.running:
+                break
+
+async def read_lines(stream: asyncio.StreamReader) -> AsyncIterator[list[str]]:
+    """
+    Yield every complete line that's available each time the stream wakes us up,
+    rather than one line per wakeup. A held-down key can queue up dozens of lines between reads.
+    """
+    pending = b""
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        if not chunk:
+            if pending.strip():
+                yield [pending.decode("utf-8").strip()]
+            return
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        # we know it's valid UTF-8
+        decoded = [line.decode("utf-8").strip() for line in lines]
+        decoded = [line for line in decoded if line]
+        if decoded:
+            yield decoded
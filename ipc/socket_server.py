@@ -0,0 +1,255 @@
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import socket
+import stat
+import tempfile
+import typing
+from enum import IntEnum
+from typing import Any, Callable, Optional
+
+from core.recorder import recorder
+from ipc.commands import COMMANDS, Command, coalesce, dispatch, parse_command
+from log import log_error, log_info
+
+if typing.TYPE_CHECKING:
+    from core.manager import WindowManager
+
+SOCKET_NAME = "scrollwm.sock"
+# Where a TCP server writes the token clients have to send first
+TOKEN_NAME = "scrollwm.token"
+DEFAULT_TCP_PORT = 47615
+
+# Anyone who can reach the socket can send these, so nothing that starts processes or stops us:
+# those stay with the keyboard front end
+IPC_COMMANDS = {name: spec for name, spec in COMMANDS.items() if name not in ("open", "exit", "restart_wm")}
+
+# Upper bound on a length-prefixed batch, so a bad client can't make us buffer forever
+MAX_BATCH_BYTES = 1024 * 1024
+
+class ErrorCode(IntEnum):
+    # The request couldn't be framed/decoded
+    PROTOCOL = 1
+    # A command in the batch isn't known; nothing in the batch was run
+    UNKNOWN_COMMAND = 2
+    # A command raised while running; commands before it were applied
+    COMMAND_FAILED = 3
+    # A TCP client didn't start with the session's token
+    UNAUTHORIZED = 4
+    # A known command that can't be sent over IPC; nothing in the batch was run
+    NOT_ALLOWED = 5
+
+def user_dir() -> str:
+    """
+    A directory only the current user can get into, for the socket and token.
+    XDG_RUNTIME_DIR (or LOCALAPPDATA on Windows) is already that; otherwise we make one in the shared temp dir
+    and refuse it if someone else owns it or can get in.
+    """
+    if os.name == "nt":
+        path = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "scrollwm")
+        os.makedirs(path, exist_ok=True)
+        return path
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.environ["XDG_RUNTIME_DIR"]
+    path = os.path.join(tempfile.gettempdir(), f"scrollwm-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} isn't a private directory")
+    return path
+
+def _write_private(path: str, text: str):
+    "Write a file only its owner can read, replacing any old one"
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+
+def _state(wm: "WindowManager") -> dict:
+    mon = wm.current_monitor()
+    ws = mon.current_workspace()
+    win = ws.focused_window()
+    return {
+        "monitor": wm.focused_monitor,
+        "workspace": ws.id,
+        "window": win.id if win else None,
+        "windows": [w.id for w in ws.windows],
+    }
+
+# Read-only commands that produce a value for the reply
+QUERIES: dict[str, Callable[["WindowManager"], Any]] = {
+    "state": _state,
+}
+
+def _error(code: ErrorCode, message: str, **extra: Any) -> dict:
+    return {"ok": False, "code": int(code), "error": message, **extra}
+
+def execute_batch(wm: "WindowManager", lines: list[str]) -> dict:
+    """
+    Run a batch of commands. Every command is validated before any of them runs, and the whole batch
+    costs a single refresh, but running it isn't atomic: if one fails, the ones before it stay applied.
+    `ran` in the reply is how many commands actually ran.
+    """
+    commands: list[Command] = []
+    for i, line in enumerate(lines):
+        cmd = parse_command(line)
+        if cmd is None:
+            continue
+        if cmd.name in COMMANDS and cmd.name not in IPC_COMMANDS:
+            return _error(ErrorCode.NOT_ALLOWED, f"Not allowed over IPC: {cmd.name}", index=i)
+        if cmd.name not in IPC_COMMANDS and cmd.name not in QUERIES:
+            return _error(ErrorCode.UNKNOWN_COMMAND, f"Unknown command: {cmd.name}", index=i)
+        commands.append(cmd)
+
+    batch = coalesce(commands)
+    if recorder.active:
+        # Queries don't change anything, so there's nothing to replay
+        recorder.commands(cmd for cmd in batch if cmd.name in IPC_COMMANDS)
+    results = []
+    ran = 0
+    with wm.adapter.scheduler.hold():
+        for cmd in batch:
+            try:
+                if cmd.name in QUERIES:
+                    results.append(QUERIES[cmd.name](wm))
+                else:
+                    dispatch(wm, cmd)
+            except Exception as e:
+                log_error("IPC command %s failed: %s", cmd, e)
+                return _error(ErrorCode.COMMAND_FAILED, str(e), command=str(cmd), ran=ran)
+            ran += cmd.repeat
+            if not wm.running:
+                break
+
+    reply: dict[str, Any] = {"ok": True, "ran": ran}
+    if results:
+        reply["results"] = results
+    return reply
+
+async def _read_batch(reader: asyncio.StreamReader) -> Optional[list[str]]:
+    """
+    Read one batch. Either a single line of `;`-separated commands, or a `#<length>` line
+    followed by exactly that many bytes of newline-separated commands.
+    Returns None at EOF.
+    """
+    header = await reader.readline()
+    if not header:
+        return None
+    text = header.decode("utf-8").strip()
+    if not text.startswith("#"):
+        return [part.strip() for part in text.split(";")]
+
+    length = int(text[1:])
+    if length < 0 or length > MAX_BATCH_BYTES:
+        raise ValueError(f"Batch length {length} out of range")
+    payload = await reader.readexactly(length)
+    return payload.decode("utf-8").splitlines()
+
+class IpcServer:
+    "A local socket server that lets scripts and status bars drive the window manager"
+
+    wm: "WindowManager"
+    address: str
+    # What TCP clients must send as their first line, `auth <token>`. None on a Unix socket,
+    # where the file permissions already keep other users out.
+    token: Optional[str] = None
+    _server: Optional[asyncio.AbstractServer] = None
+    _socket_path: Optional[str] = None
+    _token_path: Optional[str] = None
+    _clients: set[asyncio.StreamWriter]
+
+    def __init__(self, wm: "WindowManager"):
+        self.wm = wm
+        self.address = ""
+        self._clients = set()
+
+    async def start_unix(self, path: Optional[str] = None):
+        "Listen on a socket only the current user can connect to, in `user_dir()` by default"
+        path = path or os.path.join(user_dir(), SOCKET_NAME)
+        if os.path.exists(path):
+            try:
+                _, writer = await asyncio.open_unix_connection(path)
+            except OSError:
+                # Left over from a previous run
+                os.unlink(path)
+            else:
+                writer.close()
+                raise RuntimeError(f"Another instance is already listening on {path}")
+        self._server = await asyncio.start_unix_server(self._handle_client, path)
+        os.chmod(path, 0o600)
+        self.address = path
+        self._socket_path = path
+
+    async def start_tcp(self, port: int = DEFAULT_TCP_PORT, token_path: Optional[str] = None):
+        """
+        Listen on localhost only; pass port 0 to pick a free one.
+        Any local user can connect to that, so clients have to authenticate with a token made for this session.
+        The address and token are written to `token_path` (in `user_dir()` by default) for the current user's scripts.
+        """
+        self._server = await asyncio.start_server(self._handle_client, "127.0.0.1", port)
+        self.address = "127.0.0.1:%d" % self._server.sockets[0].getsockname()[1]
+        self.token = secrets.token_hex(16)
+        self._token_path = token_path or os.path.join(user_dir(), TOKEN_NAME)
+        _write_private(self._token_path, f"{self.address}\n{self.token}\n")
+
+    async def start(self):
+        "Use a Unix socket where there is one, and fall back to TCP on localhost"
+        if hasattr(socket, "AF_UNIX") and hasattr(asyncio, "start_unix_server") and os.name != "nt":
+            await self.start_unix()
+        else:
+            await self.start_tcp()
+        log_info(f"IPC server listening on {self.address}")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        # wait_closed() waits for every connection, and status bars never hang up on their own
+        for writer in list(self._clients):
+            writer.close()
+        await self._server.wait_closed()
+        for path in (self._socket_path, self._token_path):
+            if path and os.path.exists(path):
+                os.unlink(path)
+        self._server = None
+        self._socket_path = None
+        self._token_path = None
+        self.token = None
+
+    async def _authenticate(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        "Check a TCP client's `auth <token>` line, replying either way"
+        assert self.token is not None
+        line = (await reader.readline()).decode("utf-8", "replace").split()
+        ok = len(line) == 2 and line[0] == "auth" and hmac.compare_digest(line[1], self.token)
+        reply = {"ok": True} if ok else _error(ErrorCode.UNAUTHORIZED, "Bad or missing token")
+        writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+        await writer.drain()
+        return ok
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            if self.token is not None and not await self._authenticate(reader, writer):
+                return
+            while True:
+                try:
+                    lines = await _read_batch(reader)
+                except (ValueError, UnicodeDecodeError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                    writer.write(json.dumps(_error(ErrorCode.PROTOCOL, str(e))).encode("utf-8") + b"\n")
+                    await writer.drain()
+                    break
+                if lines is None:
+                    break
+
+                # Batches run synchronously on the loop, so clients never interleave
+                reply = execute_batch(self.wm, lines)
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
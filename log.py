@@ -1,8 +1,174 @@
+import atexit
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Optional, TextIO
+
+# Logging that's safe to leave in hot paths (window drags, key repeats, the hook thread).
+# A record below the current level costs one comparison. Anything else is appended to a bounded buffer
+# as is, message template and arguments unformatted, and a background thread formats and writes it.
+# So the loop and the hook thread never wait on the terminal; if the terminal can't keep up,
+# the oldest records are dropped instead.
+#
+#     log_debug("Moved window %s to %s", hwnd, rect)
+#     log_info("Added window", hwnd=hwnd, workspace=ws.id)
+#
+# Arguments are formatted later, on the writer thread, so pass values rather than things that will change.
+
 ANSI_RESET = "\033[0m"
 ANSI_RED = "\033[91m"
+ANSI_YELLOW = "\033[93m"
+
+DEFAULT_CAPACITY = 4096
+
+class Level(IntEnum):
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+_PREFIXES = {
+    Level.DEBUG: "[DEBUG]",
+    Level.INFO: "[INFO]",
+    Level.WARNING: f"{ANSI_YELLOW}[WARN]{ANSI_RESET}",
+    Level.ERROR: f"{ANSI_RED}[ERROR]{ANSI_RESET}",
+}
+
+@dataclass
+class LogStats:
+    emitted: int = 0
+    written: int = 0
+    # Records that fell out of the buffer before the writer got to them
+    dropped: int = 0
+
+class Record:
+    __slots__ = ("time", "level", "message", "args", "fields", "exc")
+
+    def __init__(self, level: Level, message: str, args: tuple, fields: dict, exc: Optional[tuple]):
+        self.time = time.time()
+        self.level = level
+        self.message = message
+        self.args = args
+        self.fields = fields
+        self.exc = exc
+
+    def format(self) -> str:
+        message = self.message
+        if self.args:
+            try:
+                message = message % self.args
+            except (TypeError, ValueError):
+                message = " ".join(map(str, (message, *self.args)))
+        if self.fields:
+            message += "".join(f" {key}={value}" for key, value in self.fields.items())
+        stamp = time.strftime("%H:%M:%S", time.localtime(self.time)) + f".{int(self.time % 1 * 1000):03d}"
+        line = f"{stamp} {_PREFIXES[self.level]} {message}"
+        if self.exc:
+            line += "\n" + "".join(traceback.format_exception(*self.exc)).rstrip()
+        return line
+
+class Logger:
+    level: Level
+    stats: LogStats
+    # Where records go; stdout (whatever it is at the time) if None
+    stream: Optional[TextIO]
+
+    _pending: deque[Record]
+    _wakeup: threading.Event
+    # Held while writing, so flush() and the writer thread don't interleave
+    _write_lock: threading.Lock
+    _start_lock: threading.Lock
+    _writer: Optional[threading.Thread] = None
+
+    def __init__(self, level: Level = Level.INFO, capacity: int = DEFAULT_CAPACITY, stream: Optional[TextIO] = None):
+        self.level = level
+        self.stats = LogStats()
+        self.stream = stream
+        self._pending = deque(maxlen=capacity)
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def enabled(self, level: Level) -> bool:
+        "For when even building the arguments is too much"
+        return level >= self.level
+
+    def log(self, level: Level, message: str, *args: Any, exc_info: bool = False, **fields: Any):
+        if level < self.level:
+            return
+        # Racy with other threads logging at the same moment, so the count can be off by a few
+        if len(self._pending) == self._pending.maxlen:
+            self.stats.dropped += 1
+        self._pending.append(Record(level, message, args, fields, sys.exc_info() if exc_info else None))
+        self.stats.emitted += 1
+        if self._writer is None:
+            self._start_writer()
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def flush(self):
+        "Write out everything logged so far, on this thread"
+        with self._write_lock:
+            self._write_pending()
+
+    def _start_writer(self):
+        with self._start_lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._writer.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._write_lock:
+                self._write_pending()
+
+    def _write_pending(self):
+        lines = []
+        while self._pending:
+            try:
+                record = self._pending.popleft()
+            except IndexError:
+                break
+            try:
+                lines.append(record.format())
+            except Exception as e:
+                lines.append(f"{_PREFIXES[Level.ERROR]} Couldn't format log message {record.message!r}: {e}")
+        if not lines:
+            return
+        stream = self.stream or sys.stdout
+        try:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+        except (OSError, ValueError):
+            # Nowhere to write to (closed or detached console); nothing useful to do about it
+            return
+        self.stats.written += len(lines)
+
+logger = Logger()
+# Don't lose whatever was still buffered when the process exits
+atexit.register(logger.flush)
+
+def set_level(level: Level):
+    logger.level = level
+
+def log_debug(message: str, *args: Any, **fields: Any):
+    if logger.level <= Level.DEBUG:
+        logger.log(Level.DEBUG, message, *args, **fields)
+
+def log_info(message: str, *args: Any, **fields: Any):
+    if logger.level <= Level.INFO:
+        logger.log(Level.INFO, message, *args, **fields)
 
-def log_error(*args):
-    print(f"{ANSI_RED}[ERROR]{ANSI_RESET} {' '.join(map(str, args))}")
+def log_warning(message: str, *args: Any, **fields: Any):
+    if logger.level <= Level.WARNING:
+        logger.log(Level.WARNING, message, *args, **fields)
 
-def log_info(*args):
-    print(f"[INFO] {' '.join(map(str, args))}")
\ No newline at end of file
+def log_error(message: str, *args: Any, **fields: Any):
+    logger.log(Level.ERROR, message, *args, **fields)
\ No newline at end of file
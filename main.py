@@ -1,22 +1,65 @@
 import asyncio
+import sys
 from adapters.windows.adapter import WindowsAdapter
+from core.animation import DEFAULT_ANIMATION_DURATION
 from core.manager import WindowManager
+from core.recorder import recorder
+from core.trace import tracer
+from ipc.commands import Command, run_batch
 from ipc.server import read_ahk_output, start_ahk
+from ipc.socket_server import IpcServer
+from log import Level, log_error, log_info, set_level
+
+# Where --trace writes its Chrome trace
+TRACE_PATH = "trace.json"
+# Where --record writes its capture, for `python -m bench.replay`
+RECORD_PATH = "capture.jsonl.gz"
 
 async def main():
-    wm = WindowManager(WindowsAdapter())
+    if "--verbose" in sys.argv:
+        set_level(Level.DEBUG)
+    if "--trace" in sys.argv:
+        tracer.enable()
+    if "--record" in sys.argv:
+        # Before the adapter exists, so the windows that are already open get recorded too
+        recorder.start()
+    
+    wm = WindowManager(WindowsAdapter(
+        debug_layout="--debug-layout" in sys.argv,
+        animation_duration=0 if "--no-animations" in sys.argv else DEFAULT_ANIMATION_DURATION,
+    ))
+    
+    # Clicks in the overview go through the same path as commands, so they're recorded with them
+    wm.adapter.on_overview_click = lambda x, y: run_batch(wm, [Command("overview_select", [str(x), str(y)])])
     
     ahk = await start_ahk()
     if not ahk:
-        print("Failed to start AHK process.")
+        log_error("Failed to start AHK process.")
         return
 
+    ipc = IpcServer(wm)
+    try:
+        await ipc.start()
+    except (OSError, RuntimeError) as e:
+        # E.g. another instance has the port. Scripts can't reach us, but the keyboard still works.
+        log_error("IPC server not started: %s", e)
+
     ahk_task = asyncio.create_task(read_ahk_output(ahk, wm))
     wm_task = asyncio.create_task(wm.run())
     
     await asyncio.gather(ahk_task, wm_task)
     
+    await ipc.stop()
     ahk.terminate()
+    
+    if tracer.enabled:
+        tracer.write_chrome_trace(TRACE_PATH)
+        log_info(f"Spans:\n{tracer.summary()}")
+        log_info(f"Trace written to {TRACE_PATH}, open it in chrome://tracing or ui.perfetto.dev")
+    if recorder.active:
+        recorder.stop()
+        recorder.save(RECORD_PATH)
+        log_info(f"Recorded {len(recorder.capture.entries)} events and command batches to {RECORD_PATH}")
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,61 @@
+import asyncio
+import queue
+import threading
+from dataclasses import dataclass
+
+import pytest
+
+from core.actor import Executor, Inbox
+
+@dataclass
+class Ping:
+    n: int
+
+@dataclass
+class Pong:
+    n: int
+
+def test_inbox_delivers_in_order_on_the_loop():
+    handled = []
+    threads = set()
+
+    async def run():
+        inbox = Inbox()
+        inbox.register(Ping, lambda m: (handled.append(m), threads.add(threading.get_ident())))
+        inbox.register(Pong, handled.append)
+        # Posted before the loop is bound
+        inbox.post(Ping(0))
+        inbox.bind(asyncio.get_running_loop())
+
+        def worker():
+            for i in range(1, 50):
+                inbox.post(Ping(i) if i % 2 else Pong(i))
+        await asyncio.to_thread(worker)
+        await asyncio.sleep(0)
+        return inbox
+
+    inbox = asyncio.run(run())
+    assert [m.n for m in handled] == list(range(50))
+    assert threads == {threading.get_ident()}
+    assert inbox.stats.posted == inbox.stats.handled == 50
+    assert inbox.stats.max_depth >= 1
+
+def test_inbox_rejects_unknown_messages():
+    with pytest.raises(TypeError):
+        Inbox().post(Ping(0))
+
+def test_executor_runs_elsewhere_in_order():
+    work: queue.Queue = queue.Queue()
+    ran = []
+    executor = Executor(work.put)
+
+    executor.submit(lambda: ran.append(1))
+    executor.submit(lambda: 1 / 0)
+    executor.submit(lambda: ran.append(2))
+    assert ran == [] and executor.stats.depth == 3
+
+    # The "other thread" catches up; a failure doesn't stop it
+    while not work.empty():
+        work.get()()
+    assert ran == [1, 2]
+    assert (executor.stats.completed, executor.stats.failed, executor.stats.max_depth) == (2, 1, 3)
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from core.animation import Animator, linear
+from core.layout import LayoutPlan, WindowPlacement
+from core.models import Rect
+
+MON = Rect(0, 0, 1000, 1000)
+
+def placement(win_id: int, left: int) -> WindowPlacement:
+    return WindowPlacement(win_id, Rect(left, 0, left + 500, 1000), True, MON)
+
+@pytest.fixture
+def animator():
+    now = [0.0]
+    frames: list[LayoutPlan] = []
+    loop = asyncio.new_event_loop()
+    animator = Animator(frames.append, duration=0.1, frame_interval=0.01, easing=linear, clock=lambda: now[0])
+    # Ticked by hand; the loop only has to exist
+    animator.bind(loop)
+    yield animator, frames, now
+    loop.close()
+
+def test_first_placement_is_immediate_then_slides(animator):
+    animator, frames, now = animator
+    animator.retarget(LayoutPlan([placement(1, 0), placement(2, 500)]))
+    assert len(frames) == 1 and not animator.active
+
+    # Scroll right by 500: both windows slide together, in one batch per frame
+    animator.retarget(LayoutPlan([placement(1, -500), placement(2, 0)]))
+    assert animator.active and len(frames) == 1
+    now[0] = 0.05
+    frame = animator.frame()
+    assert frame.get(1).rect.left() == -250 and frame.get(2).rect.left() == 250
+
+    now[0] = 0.1
+    frame = animator.frame()
+    assert frame.get(1) == placement(1, -500)
+    assert not animator.active
+    assert animator.stats.frames == 2
+
+def test_retarget_mid_animation_starts_from_current_position(animator):
+    animator, frames, now = animator
+    animator.retarget(LayoutPlan([placement(1, 0)]))
+    animator.retarget(LayoutPlan([placement(1, 1000)]))
+    now[0] = 0.05
+    assert animator.frame().get(1).rect.left() == 500
+
+    # Interrupted halfway: heads back from 500, not from either end
+    animator.retarget(LayoutPlan([placement(1, 0)]))
+    now[0] = 0.1
+    assert animator.frame().get(1).rect.left() == 250
+
+def test_hiding_is_not_animated(animator):
+    animator, frames, now = animator
+    animator.retarget(LayoutPlan([placement(1, 0)]))
+    animator.retarget(LayoutPlan([placement(1, 500)]))
+    hidden = WindowPlacement(1, None, False)
+    animator.retarget(LayoutPlan([hidden]))
+    assert frames[-1].get(1) == hidden
+    assert not animator.active
+
+def test_late_and_slow_frames_are_dropped(animator):
+    animator, frames, now = animator
+    animator.retarget(LayoutPlan([placement(1, 0)]))
+    animator.retarget(LayoutPlan([placement(1, 1000)]))
+    now[0] = 0.01
+    animator.frame()
+    # Three intervals late: we jump ahead instead of replaying them
+    now[0] = 0.05
+    assert animator.frame().get(1).rect.left() == 500
+    assert animator.stats.dropped == 3
+
+def test_without_a_loop_everything_is_immediate():
+    frames: list[LayoutPlan] = []
+    animator = Animator(frames.append, clock=lambda: 0.0)
+    animator.retarget(LayoutPlan([placement(1, 0)]))
+    animator.retarget(LayoutPlan([placement(1, 500)]))
+    assert [f.get(1) for f in frames] == [placement(1, 0), placement(1, 500)]
+
+def test_proxy_follows_each_frame():
+    now = [0.0]
+    frames: list[LayoutPlan] = []
+    loop = asyncio.new_event_loop()
+    animator = Animator(frames.append, duration=0.1, frame_interval=0.01, easing=linear, clock=lambda: now[0],
+                        screens=[MON, Rect(1000, 0, 2000, 1000)])
+    animator.bind(loop)
+    crossing = WindowPlacement(1, Rect(700, 0, 1200, 1000), True, MON, proxied=True)
+    animator.retarget(LayoutPlan([crossing]))
+    # Sliding back inside its monitor: still crossing (and proxied) until it's inside
+    animator.retarget(LayoutPlan([placement(1, 0)]))
+    now[0] = 0.01
+    assert animator.frame().get(1).proxied
+    now[0] = 0.05
+    frame = animator.frame().get(1)
+    assert frame.rect.left() == 350 and not frame.proxied
+    loop.close()
@@ -0,0 +1,35 @@
+import copy
+
+from bench.desktop import Desktop
+from bench.suite import OPERATIONS, compare, run
+
+TINY = [Desktop("a", monitors=1, workspaces=2, windows=6), Desktop("b", monitors=2, workspaces=3, windows=24)]
+
+def test_desktops_are_built_as_asked():
+    monitors = Desktop("x", monitors=3, workspaces=4, windows=50).build()
+    assert len(monitors) == 3
+    assert all(len(mon.workspaces) == 4 for mon in monitors)
+    assert sum(len(ws.windows) for mon in monitors for ws in mon.workspaces) == 50
+    assert monitors[1].rect.left() == 1920
+
+def test_every_operation_runs():
+    results = run(TINY, OPERATIONS, repeat=4)
+    for desktop in results["desktops"].values():
+        assert set(desktop["operations"]) == {op.name for op in OPERATIONS}
+        assert all(t["calls"] == 4 for t in desktop["operations"].values())
+    assert results["scaling"]["from"] == "a" and results["scaling"]["to"] == "b"
+
+def test_compare_flags_slowdowns_and_worse_growth():
+    results = {
+        "desktops": {
+            "a": {"windows": 10, "operations": {"op": {"median_us": 100.0}}},
+            "b": {"windows": 100, "operations": {"op": {"median_us": 1000.0}}},
+        },
+        "scaling": {"from": "a", "to": "b", "exponents": {"op": 1.0}},
+    }
+    assert compare(results, results) == []
+
+    slower = copy.deepcopy(results)
+    slower["desktops"]["b"]["operations"]["op"]["median_us"] = 100_000.0
+    slower["scaling"]["exponents"]["op"] = 3.0
+    assert len(compare(slower, results)) == 2
@@ -0,0 +1,75 @@
+import asyncio
+
+from adapters.fake import FakeAdapter
+from core.manager import WindowManager
+from ipc.commands import Command, coalesce, parse_command
+from ipc.server import read_command_stream
+
+def parse_all(lines: list[str]) -> list[Command]:
+    return coalesce(cmd for cmd in map(parse_command, lines) if cmd)
+
+def test_coalesce_merges_runs():
+    commands = parse_all(["focus_right"] * 5 + ["resize_inc"] * 3 + ["focus_right", "focus_left", "focus_left"])
+    assert [(c.name, c.repeat) for c in commands] == [
+        ("focus_right", 5),
+        ("resize_inc", 3),
+        ("focus_right", 1),
+        ("focus_left", 2),
+    ]
+
+def test_coalesce_keeps_unmergeable_commands():
+    commands = parse_all(["workspace_down", "workspace_down", "open wt", "open wt", "open explorer"])
+    assert [(c.name, c.repeat) for c in commands] == [
+        ("workspace_down", 1),
+        ("workspace_down", 1),
+        ("open", 1),
+        ("open", 1),
+        ("open", 1),
+    ]
+
+def test_stream_batches_into_one_relayout():
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    adapter.batches.clear()
+
+    async def run():
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"focus_right\n" * 5 + b"resize_inc\n" * 3 + b"bogus\n")
+        stream.feed_eof()
+        await read_command_stream(stream, wm)
+
+    asyncio.run(run())
+    ws = wm.current_monitor().current_workspace()
+    win = ws.focused_window()
+    assert win and win.id == 3
+    assert round(win.width, 2) == 1.3
+    assert len(adapter.batches) == 1
+
+def test_stream_stops_at_exit():
+    wm = WindowManager(FakeAdapter())
+
+    async def run():
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"focus_right\nexit\nfocus_right\n")
+        await read_command_stream(stream, wm)
+
+    asyncio.run(run())
+    assert not wm.running
+    win = wm.current_monitor().current_workspace().focused_window()
+    assert win and win.id == 2
+
+def test_failing_command_doesnt_end_the_stream(monkeypatch):
+    wm = WindowManager(FakeAdapter())
+    def fail(steps: float):
+        raise ValueError("boom")
+    monkeypatch.setattr(wm, "resize_window", fail)
+
+    async def run():
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"resize_inc\nfocus_right\n")
+        stream.feed_eof()
+        await read_command_stream(stream, wm)
+
+    asyncio.run(run())
+    win = wm.current_monitor().current_workspace().focused_window()
+    assert win and win.id == 2
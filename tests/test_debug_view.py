@@ -0,0 +1,42 @@
+from adapters.fake import FakeAdapter
+from core.debug_view import DebugLayoutView, len_without_ansi, render_layout
+from core.models import Window
+
+def test_render_layout():
+    adapter = FakeAdapter()
+    text = render_layout(adapter.get_monitors(), 0, lambda win: (f"title {win.id}", "class"))
+    assert "Win 22" in text and "title 21" in text and "Monitor 1" in text
+    # Every row of the frame lines up once colors are stripped
+    widths = {len_without_ansi(line) for line in text.splitlines()}
+    assert len(widths) == 1
+
+def test_view_is_throttled_and_cached():
+    adapter = FakeAdapter()
+    now = [0.0]
+    frames = []
+    described = []
+
+    def describe(win: Window) -> tuple[str, str]:
+        described.append(win.id)
+        return f"title {win.id}", "class"
+
+    view = DebugLayoutView(adapter.get_monitors(), describe, max_fps=2, write=frames.append, clock=lambda: now[0])
+    for _ in range(10):
+        view.request(0)
+    assert view.renders == 1
+
+    now[0] += 0.1
+    view.request(0)
+    assert view.renders == 1
+
+    now[0] += 0.5
+    view.request(0)
+    assert view.renders == 2
+    assert len(frames) == 2
+    # Titles were only looked up once per window
+    assert sorted(described) == [1, 2, 3, 21, 22]
+
+    view.forget(2)
+    now[0] += 0.5
+    view.request(0)
+    assert sorted(described) == [1, 2, 2, 3, 21, 22]
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+from core.events import EventKind, EventQueue, WindowEvent, coalesce_events
+
+C, D, M = EventKind.CREATED, EventKind.DESTROYED, EventKind.MOVED
+
+def test_last_move_wins():
+    events = [WindowEvent(M, 1), WindowEvent(M, 2), WindowEvent(M, 1), WindowEvent(EventKind.MINIMIZED, 1), WindowEvent(M, 1)]
+    assert coalesce_events(events, lambda w: True) == [
+        WindowEvent(M, 2), WindowEvent(EventKind.MINIMIZED, 1), WindowEvent(M, 1),
+    ]
+
+def test_short_lived_windows_cancel_out():
+    events = [
+        WindowEvent(C, 5), WindowEvent(C, 5), WindowEvent(M, 5), WindowEvent(EventKind.TITLE_CHANGED, 5), WindowEvent(D, 5),
+        WindowEvent(M, 6),
+    ]
+    assert coalesce_events(events, lambda w: False) == [WindowEvent(M, 6)]
+
+def test_known_windows_are_not_cancelled():
+    # A managed window that's shown and hidden again still has to be removed
+    events = [WindowEvent(C, 5), WindowEvent(D, 5), WindowEvent(C, 7)]
+    assert coalesce_events(events, lambda w: w == 5) == events
+
+def test_hook_thread_handoff():
+    handled: list[list[WindowEvent]] = []
+
+    async def run():
+        queue = EventQueue(handled.append, lambda w: True)
+        # Queued before the loop is bound (startup) ...
+        queue.push(M, 1)
+        queue.bind(asyncio.get_running_loop())
+        await asyncio.sleep(0)
+        assert handled == [[WindowEvent(M, 1)]]
+
+        # ... and a drag from another thread turns into one move per wakeup
+        def drag():
+            for _ in range(200):
+                queue.push(M, 2)
+        thread = threading.Thread(target=drag)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+        return queue
+
+    queue = asyncio.run(run())
+    assert handled[1:] == [[WindowEvent(M, 2)]]
+    assert queue.stats.pushed == 201
+    assert queue.stats.delivered == 2
+    assert queue.stats.max_depth == 200
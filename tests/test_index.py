@@ -0,0 +1,68 @@
+import random
+
+from adapters.fake import FakeAdapter
+from core.models import Window
+
+def test_locate():
+    adapter = FakeAdapter()
+    index = adapter.get_window_index()
+    mon = adapter.get_monitors()[0]
+
+    location = index.locate(22)
+    assert location is not None
+    assert location.monitor_index == 0 and location.monitor is mon
+    assert location.workspace is mon.workspaces[1] and location.position == 1
+    assert index.locate(1234) is None
+    assert index.check_consistency() == []
+
+def test_random_operations_stay_consistent():
+    rng = random.Random(1234)
+    adapter = FakeAdapter()
+    index = adapter.get_window_index()
+    monitors = adapter.get_monitors()
+    next_id = 1000
+
+    for _ in range(2000):
+        mon = rng.choice(monitors)
+        mon.ensure_valid_workspaces()
+        windows = list(index)
+        op = rng.randrange(6)
+
+        if op == 0 or not windows:
+            win = Window(next_id, width=rng.choice([0.4, 0.5, 1.0]))
+            next_id += 1
+            index.add(win)
+            ws = mon.current_workspace()
+            ws.add_window(win, rng.randrange(len(ws.windows) + 1))
+        elif op == 1:
+            win = rng.choice(windows)
+            index.remove(win.id)
+            assert win.workspace is not None
+            win.workspace.remove_window(win)
+        elif op == 2:
+            win = rng.choice(windows)
+            assert win.workspace is not None
+            win.workspace.move_window(win, rng.randrange(len(win.workspace.windows)))
+        elif op == 3:
+            win = rng.choice(windows)
+            assert win.workspace is not None
+            win.workspace.set_window_width(win, rng.choice([0.1, 0.33, 0.5, 1.0]))
+        elif op == 4:
+            # Move a window to a workspace on any monitor, usually not its own
+            win = rng.choice(windows)
+            assert win.workspace is not None
+            target = rng.randrange(len(monitors))
+            win.workspace.remove_window(win)
+            rng.choice(monitors[target].workspaces).add_window(win)
+            location = index.locate(win.id)
+            assert location is not None and location.monitor_index == target
+        else:
+            mon._focused_workspace = rng.choice(mon.workspaces).id
+
+        # Queries shouldn't disturb anything either
+        for win in rng.sample(list(index), min(3, len(index))):
+            assert win.workspace is not None
+            win.workspace.windows_in_view(rng.uniform(-1, 5))
+            win.workspace.scroll_to_focus()
+
+        assert index.check_consistency() == []
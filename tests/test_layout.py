@@ -0,0 +1,114 @@
+import random
+
+from adapters.fake import FakeAdapter
+from core.manager import WindowManager
+from core.layout import WindowPlacement, needs_proxy, plan_layout
+from core.models import Rect, Window
+
+def make_adapter(n_windows: int) -> FakeAdapter:
+    adapter = FakeAdapter()
+    ws = adapter.get_monitors()[1].current_workspace()
+    for i in range(n_windows):
+        ws.add_window(Window(100 + i, width=0.5))
+    return adapter
+
+def applied(adapter: FakeAdapter) -> list[WindowPlacement]:
+    return [p for batch in adapter.batches for p in batch]
+
+def test_refresh_only_applies_changes():
+    adapter = make_adapter(40)
+    adapter.refresh()
+    # Everything goes out in a single batch
+    assert len(adapter.batches) == 1
+    assert len(applied(adapter)) == 45
+    assert sum(p.visible for p in applied(adapter)) == 3
+
+    # Nothing changed, so nothing gets sent
+    adapter.refresh()
+    assert len(adapter.batches) == 1
+
+def test_focus_without_scroll_is_free():
+    adapter = make_adapter(40)
+    ws = adapter.get_monitors()[1].current_workspace()
+    adapter.refresh()
+    adapter.batches.clear()
+
+    # 100 and 101 are both fully on screen
+    ws.move_focus(1)
+    adapter.refresh()
+    assert adapter.batches == []
+
+def test_scroll_moves_only_affected_windows():
+    adapter = make_adapter(40)
+    ws = adapter.get_monitors()[1].current_workspace()
+    adapter.refresh()
+    adapter.batches.clear()
+
+    ws.focus_position(2)
+    adapter.refresh()
+    assert len(adapter.batches) == 1
+    changed = {p.id: p for p in applied(adapter)}
+    # 100 scrolls off, 101 slides over to the left half and 102 scrolls on
+    assert set(changed) == {100, 101, 102}
+    assert not changed[100].visible
+    assert changed[101].rect is not None and changed[101].rect.left() == 1920
+    assert changed[102].rect is not None and changed[102].rect.left() == 1920 + 960
+    assert changed[102].clip == Rect(1920, 0, 3840, 1080)
+
+def test_workspace_switch_hides_previous_workspace():
+    adapter = FakeAdapter()
+    mon = adapter.get_monitors()[0]
+    adapter.refresh()
+    adapter.batches.clear()
+
+    mon._focused_workspace = mon.workspaces[1].id
+    adapter.refresh()
+    changed = {p.id: p.visible for p in applied(adapter)}
+    # 2 and 22 were already hidden, so only 1 and 21 change
+    assert changed == {1: False, 21: True}
+
+def test_only_windows_crossing_onto_another_monitor_need_a_proxy():
+    adapter = FakeAdapter()
+    left, right = adapter.get_monitors()
+    right.current_workspace().add_window(Window(10, width=1.5))
+    plan = plan_layout(adapter.get_monitors(), 0)
+
+    # Fully on its own monitor
+    assert not plan.get(1).proxied
+    # Wider than its monitor, so it reaches back onto the left one
+    wide = plan.get(10)
+    assert wide.rect.left() < right.rect.left() and wide.proxied
+
+def test_overflow_with_no_monitor_there_needs_no_proxy():
+    assert not needs_proxy(Rect(1500, 0, 2500, 1080), Rect(0, 0, 1920, 1080), [Rect(0, 0, 1920, 1080)])
+    assert needs_proxy(Rect(1500, 0, 2500, 1080), Rect(0, 0, 1920, 1080), [Rect(0, 0, 1920, 1080), Rect(1920, 0, 3840, 1080)])
+
+def test_incremental_plans_commit_what_a_full_plan_would():
+    rng = random.Random(4321)
+    adapter = make_adapter(30)
+    wm = WindowManager(adapter)
+    adapter.refresh()
+    next_id = 1000
+    ops = [
+        lambda: wm.move_focus_horizontal(rng.choice([-3, -1, 1, 2])),
+        lambda: wm.move_workspace_focus(rng.choice([-1, 1])),
+        lambda: wm.move_monitor_focus(rng.choice([-1, 1])),
+        lambda: wm.resize_window(rng.choice([-0.2, 0.1, 0.3])),
+        lambda: wm.move_window_horizontal(rng.choice([-1, 1])),
+        lambda: wm.move_window_vertical(rng.choice([-1, 1])),
+        lambda: wm.move_window_to_monitor(rng.choice([-1, 1])),
+        lambda: wm.toggle_maximize_focused_window(),
+    ]
+
+    for step in range(400):
+        if step % 10 == 0:
+            adapter.add_window(Window(next_id, width=rng.choice([0.3, 0.5, 1.0])), rng.randrange(2))
+            next_id += 1
+        elif step % 10 == 5 and len(adapter.get_window_index()):
+            adapter.remove_window(rng.choice(list(adapter.get_window_index())).id)
+        else:
+            rng.choice(ops)()
+
+        full = plan_layout(adapter.get_monitors(), adapter.gap_px)
+        for p in full:
+            assert adapter._committed.get(p.id) == p, (step, p)
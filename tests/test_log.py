@@ -0,0 +1,68 @@
+import io
+import threading
+
+from log import Level, Logger
+
+class Unprintable:
+    "Fails if anything tries to format it"
+    def __str__(self):
+        raise AssertionError("formatted a disabled record")
+
+def make_logger(level: Level = Level.DEBUG, capacity: int = 100):
+    stream = io.StringIO()
+    return Logger(level, capacity, stream), stream
+
+def test_records_are_formatted_on_write():
+    logger, stream = make_logger()
+    logger.log(Level.INFO, "Moved window %s to %d", 42, 7, monitor=1)
+    logger.log(Level.ERROR, "Oops")
+    logger.flush()
+    lines = stream.getvalue().splitlines()
+    assert lines[0].endswith("[INFO] Moved window 42 to 7 monitor=1")
+    assert "[ERROR]" in lines[1] and lines[1].endswith("Oops")
+    assert logger.stats.written == 2
+
+def test_disabled_levels_cost_nothing():
+    logger, stream = make_logger(Level.WARNING)
+    logger.log(Level.DEBUG, "%s", Unprintable())
+    logger.log(Level.INFO, "%s", Unprintable())
+    logger.flush()
+    assert stream.getvalue() == ""
+    assert logger.stats.emitted == 0
+    assert logger._writer is None
+
+def test_buffer_is_bounded():
+    logger, stream = make_logger(capacity=10)
+    # Hold the writer off so nothing drains while we log
+    with logger._write_lock:
+        for i in range(25):
+            logger.log(Level.INFO, "line %d", i)
+    logger.flush()
+    lines = stream.getvalue().splitlines()
+    assert logger.stats.dropped == 15
+    # The newest records survive
+    assert lines[-1].endswith("line 24") and len(lines) == 10
+
+def test_background_writer_flushes():
+    logger, stream = make_logger()
+    written = threading.Event()
+
+    class Stream(io.StringIO):
+        def flush(self):
+            written.set()
+    logger.stream = Stream()
+    logger.log(Level.INFO, "hello")
+    assert written.wait(timeout=5)
+    assert logger.stream.getvalue().rstrip().endswith("hello")
+
+def test_exceptions_and_bad_formats():
+    logger, stream = make_logger()
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.log(Level.ERROR, "Failed", exc_info=True)
+    logger.log(Level.INFO, "%d windows", "not a number")
+    logger.flush()
+    output = stream.getvalue()
+    assert "ValueError: boom" in output
+    assert "%d windows not a number" in output
@@ -1,4 +1,10 @@
+import asyncio
+import signal
+
+from core.input import MonitorSpatialIndex, ScriptedInputSource
+from core.layout import plan_layout
 from core.manager import WindowManager
+from core.models import Rect
 from adapters.fake import FakeAdapter
 
 def test_horizontal_navigation():
@@ -10,3 +16,64 @@ def test_horizontal_navigation():
     wm.move_focus_horizontal(1)
     win = wm.current_monitor().current_workspace().focused_window()
     assert win and win.id == 3
+
+def test_move_to_monitor_lays_out_both_monitors():
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    wm.move_window_to_monitor(1)
+    assert [w.id for w in wm.monitors[1].current_workspace().windows] == [1]
+
+    # What's committed on both monitors is what a full layout would give now
+    plan = plan_layout(wm.monitors, adapter.gap_px)
+    for mon in wm.monitors:
+        for win in mon.current_workspace().windows:
+            assert adapter._committed.get(win.id) == plan.get(win.id), win.id
+
+def test_focus_follows_monitor_crossings():
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    source = wm.input
+    assert isinstance(source, ScriptedInputSource)
+    source.start(MonitorSpatialIndex([mon.rect for mon in wm.monitors]), wm.on_monitor_entered)
+
+    source.play([(10, 10), (500, 500), (1919, 1079)])
+    assert wm.focused_monitor == 0
+
+    source.move_to(1920, 0)
+    assert wm.focused_monitor == 1
+
+    # Off every monitor, so nothing changes
+    source.move_to(5000, 5000)
+    assert wm.focused_monitor == 1
+
+def test_monitor_spatial_index():
+    index = MonitorSpatialIndex([
+        Rect(0, 0, 1920, 1080),
+        Rect(1920, -500, 3000, 1500),
+        Rect(0, 1080, 1920, 2160),
+    ])
+    assert index.monitor_at(0, 0) == 0
+    assert index.monitor_at(1919, 1079) == 0
+    assert index.monitor_at(1920, -500) == 1
+    assert index.monitor_at(2999, 1499) == 1
+    assert index.monitor_at(100, 2000) == 2
+    assert index.monitor_at(100, 2160) is None
+    assert index.monitor_at(-1, 0) is None
+    assert index.monitor_at(3000, 0) is None
+
+def test_run_sleeps_until_exit():
+    wm = WindowManager(FakeAdapter())
+
+    async def run():
+        task = asyncio.create_task(wm.run())
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        wm.exit()
+        await asyncio.wait_for(task, 1)
+
+    handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+    try:
+        asyncio.run(run())
+    finally:
+        signal.signal(signal.SIGINT, handlers[0])
+        signal.signal(signal.SIGTERM, handlers[1])
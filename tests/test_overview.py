@@ -0,0 +1,153 @@
+from adapters.fake import FakeAdapter, FakeProxyBackend
+from core.manager import WindowManager
+from core.models import Monitor, Rect, Window, Workspace
+from core.overview import Overview, OverviewProxies
+from core.pool import ProxyPool
+from core.visibility import WindowState
+from ipc.commands import dispatch, parse_command
+
+def make_monitor(workspaces: int, windows: int) -> Monitor:
+    return Monitor(
+        workspaces=[
+            Workspace(windows=[Window(1000 * w + i, width=0.5) for i in range(windows)])
+            for w in range(workspaces)
+        ],
+        rect=Rect(0, 0, 1920, 1080),
+    )
+
+def test_only_visible_cells_are_computed():
+    mon = make_monitor(workspaces=200, windows=500)
+    overview = Overview(mon, scale=0.25, gap_px=16)
+    changes = overview.enter()
+
+    # Four rows of four screens' worth of half-width windows each, out of 100,000 windows
+    rows = {cell.row for cell in changes.shown}
+    assert rows == {0, 1, 2, 3}
+    assert len(changes.shown) == 4 * 8
+    for cell in changes.shown:
+        assert mon.rect.intersects(cell.rect)
+        assert cell.rect.height() == overview.row_height
+        assert cell.source == Rect(0, 0, 960, 1080)
+
+def test_scrolling_only_reports_differences():
+    mon = make_monitor(workspaces=20, windows=3)
+    overview = Overview(mon)
+    first = overview.enter()
+
+    # Nothing changed, nothing to do
+    assert len(overview.update()) == 0
+
+    changes = overview.scroll_by(overview.row_height + overview.gap_px)
+    shown = {cell.id for cell in changes.shown}
+    assert set(changes.hidden) == {cell.id for cell in first.shown if cell.row == 0}
+    assert all(cell.row == 4 for cell in changes.shown)
+    # Rows that stayed in view just moved up
+    assert {cell.id for cell in changes.moved}.isdisjoint(shown)
+    assert all(cell.row in (1, 2, 3) for cell in changes.moved)
+
+def test_scroll_is_clamped():
+    mon = make_monitor(workspaces=2, windows=1)
+    overview = Overview(mon)
+    overview.enter()
+    overview.scroll_by(10_000)
+    assert overview.scroll_y == 0
+
+def test_enter_scrolls_to_current_workspace():
+    mon = make_monitor(workspaces=20, windows=1)
+    mon._focused_workspace = mon.workspaces[15].id
+    overview = Overview(mon)
+    changes = overview.enter()
+    assert 15 in {cell.row for cell in changes.shown}
+
+def test_proxies_are_recycled_while_scrolling():
+    mon = make_monitor(workspaces=50, windows=3)
+    backend = FakeProxyBackend()
+    proxies = OverviewProxies(ProxyPool(backend))
+    overview = Overview(mon)
+
+    proxies.apply(overview.enter())
+    on_screen = len(proxies)
+    for _ in range(40):
+        proxies.apply(overview.scroll_by(overview.row_height + overview.gap_px))
+        assert len(proxies) == on_screen
+
+    # Scrolling through every row never needed more than a screenful plus one row of proxies
+    assert len(backend.proxies) <= on_screen + 3
+    assert proxies.pool.stats.reused > 0
+
+    proxies.apply(overview.exit())
+    assert len(proxies) == 0
+    assert not any(p.visible for p in backend.proxies)
+
+def test_thumbnails_are_scaled():
+    mon = make_monitor(workspaces=1, windows=1)
+    proxies = OverviewProxies(ProxyPool(FakeProxyBackend()))
+    overview = Overview(mon, scale=0.25)
+    proxies.apply(overview.enter())
+    proxy = proxies.get(0)
+    assert proxy is not None
+    assert proxy.src_rect == Rect(0, 0, 960, 1080)
+    assert proxy.size == (240, 270)
+
+def test_overview_commands():
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    dispatch(wm, parse_command("overview_toggle"))
+    assert len(adapter.overview) == 5
+    dispatch(wm, parse_command("overview_down"))
+    dispatch(wm, parse_command("overview_toggle"))
+    assert len(adapter.overview) == 0
+    assert wm.overview is None
+
+def test_overview_has_a_backdrop_while_open():
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    dispatch(wm, parse_command("overview_toggle"))
+    assert adapter.backdrop == wm.monitors[0].rect
+    dispatch(wm, parse_command("overview_down"))
+    assert adapter.backdrop == wm.monitors[0].rect
+    dispatch(wm, parse_command("overview_toggle"))
+    assert adapter.backdrop is None
+
+def test_clicking_a_thumbnail_selects_its_window():
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    mon = wm.monitors[0]
+    dispatch(wm, parse_command("overview_toggle"))
+    assert wm.overview is not None
+    # 22 is on the monitor's other workspace
+    cell = wm.overview.visible_cells()[22]
+    assert wm.overview.cell_at(cell.rect.left(), cell.rect.top()) == cell
+
+    dispatch(wm, parse_command(f"overview_select {cell.rect.left() + 10} {cell.rect.top() + 10}"))
+    assert wm.overview is None
+    assert len(adapter.overview) == 0
+    assert mon.current_workspace() is mon.workspaces[cell.row]
+    assert mon.current_workspace().focused_window().id == 22
+    placement = adapter._committed.get(22)
+    assert placement is not None and placement.visible
+
+def test_clicking_the_backdrop_closes_the_overview():
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    ws = wm.monitors[0].current_workspace()
+    dispatch(wm, parse_command("overview_toggle"))
+    # In the gap around the first row
+    dispatch(wm, parse_command("overview_select 1 1"))
+    assert wm.overview is None
+    assert wm.monitors[0].current_workspace() is ws
+
+def test_overview_parks_minimized_windows_so_they_have_thumbnails():
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    backend = adapter.visibility.backend
+    # The other workspace's windows were minimized when it was laid out
+    assert backend.states[21] is WindowState.MINIMIZED
+    backend.calls.clear()
+
+    dispatch(wm, parse_command("overview_toggle"))
+    assert sorted(backend.calls) == [("park", 21), ("park", 22)]
+    dispatch(wm, parse_command("overview_toggle"))
+    adapter.refresh()
+    # They're out of sight either way, so closing the overview leaves them parked
+    assert sorted(backend.calls) == [("park", 21), ("park", 22)]
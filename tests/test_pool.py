@@ -0,0 +1,66 @@
+from adapters.fake import FakeProxyBackend
+from core.models import Rect
+from core.pool import ProxyPool
+
+SRC = Rect(0, 0, 800, 600)
+
+def make_pool(**kwargs):
+    now = [0.0]
+    backend = FakeProxyBackend()
+    return ProxyPool(backend, clock=lambda: now[0], **kwargs), backend, now
+
+def test_released_proxies_are_reused():
+    pool, backend, _ = make_pool()
+    a = pool.acquire(1, SRC, (0, 0))
+    pool.release(a)
+    assert a.visible is False and a.source == 0
+
+    b = pool.acquire(2, SRC, (10, 10))
+    assert b is a
+    assert (b.source, b.pos, b.visible) == (2, (10, 10), True)
+    assert len(backend.proxies) == 1
+    assert (pool.stats.created, pool.stats.reused) == (1, 1)
+
+def test_prewarmed_proxies_skip_creation():
+    pool, backend, _ = make_pool(max_idle=3)
+    pool.prewarm(10)
+    assert pool.idle == 3
+    for source in range(3):
+        pool.acquire(source, SRC, (0, 0))
+    assert len(backend.proxies) == 3 and pool.stats.reused == 3
+
+def test_size_limits():
+    pool, backend, _ = make_pool(max_idle=1, max_total=2)
+    a = pool.acquire(1, SRC, (0, 0))
+    b = pool.acquire(2, SRC, (0, 0))
+    assert pool.acquire(3, SRC, (0, 0)) is None
+    assert pool.stats.refused == 1
+
+    # Only one is kept around
+    pool.release(a)
+    pool.release(b)
+    assert pool.idle == 1
+    assert not b.alive and a.alive
+
+def test_idle_eviction():
+    pool, backend, now = make_pool(idle_timeout=30.0)
+    a, b = pool.acquire(1, SRC, (0, 0)), pool.acquire(2, SRC, (0, 0))
+    pool.release(a)
+    now[0] = 20.0
+    pool.release(b)
+
+    now[0] = 35.0
+    assert pool.evict_idle() == 1
+    assert not a.alive and b.alive
+    now[0] = 50.0
+    assert pool.evict_idle() == 1
+    assert pool.idle == 0
+
+def test_dead_proxies_are_skipped():
+    pool, backend, _ = make_pool()
+    a = pool.acquire(1, SRC, (0, 0))
+    pool.release(a)
+    # Destroyed behind the pool's back
+    a.alive = False
+    b = pool.acquire(2, SRC, (0, 0))
+    assert b is not a and b.alive
@@ -0,0 +1,66 @@
+import itertools
+
+from bench.replay import Replayer
+from core.events import EventKind
+from core.models import Monitor, Rect
+from core.recorder import Recorder, load_capture
+from ipc.commands import Command
+
+def record() -> Recorder:
+    ticks = itertools.count()
+    recorder = Recorder(clock=lambda: next(ticks) * 0.001)
+    recorder.start()
+    recorder.monitors([
+        Monitor(rect=Rect(0, 0, 1920, 1080), work_rect=Rect(0, 0, 1920, 1040)),
+        Monitor(rect=Rect(1920, 0, 3840, 1080), work_rect=Rect(1920, 0, 3840, 1040)),
+    ])
+    for hwnd in (1, 2, 3):
+        recorder.event(EventKind.CREATED, hwnd, 0)
+    recorder.event(EventKind.CREATED, 4, 1)
+    recorder.commands([Command("focus_right", [], repeat=2), Command("open", ["notepad.exe"]), Command("move_monitor_right", [])])
+    recorder.event(EventKind.MOVED, 1, [5, 5, 500, 500])
+    recorder.event(EventKind.MINIMIZED, 2)
+    recorder.event(EventKind.RESTORED, 2)
+    recorder.event(EventKind.DESTROYED, 4)
+    # Back to the first monitor, where the next command applies
+    recorder.monitor_entered(0)
+    recorder.commands([Command("move_monitor_right", [])])
+    recorder.stop()
+    return recorder
+
+def test_capture_round_trips(tmp_path):
+    recorder = record()
+    path = str(tmp_path / "capture.jsonl.gz")
+    recorder.save(path)
+    capture = load_capture(path)
+    assert capture.monitors == recorder.capture.monitors
+    assert capture.entries == recorder.capture.entries
+    assert capture.entries[0] == ["e", 0.001, "CREATED", 1, 0]
+    assert capture.entries[4][0] == "c" and capture.entries[4][2][0] == ["focus_right", [], 2]
+
+def test_replay_drives_the_manager(tmp_path):
+    recorder = record()
+    path = str(tmp_path / "capture.jsonl.gz")
+    recorder.save(path)
+    replayer = Replayer(load_capture(path))
+    report = replayer.run()
+
+    assert report.events == 9 and report.commands == 3
+    # `open` isn't replayed
+    assert report.skipped == 1
+    assert {"event:CREATED", "event:MOVED", "command:focus_right", "refresh"} <= set(report.costs)
+    assert report.costs["event:CREATED"].count == 4
+
+    # The focused window was moved to the second monitor, and the window there went away.
+    # Then, back on the first monitor, another one followed it
+    wm = replayer.wm
+    assert len(wm.monitors[0].current_workspace().windows) == 1
+    assert len(wm.monitors[1].current_workspace().windows) == 2
+    assert report.platform_calls["move"] > 0 and report.platform_calls["focus"] > 0
+    assert "Platform calls" in report.summary()
+
+def test_realtime_replay_keeps_the_gaps():
+    recorder = record()
+    report = Replayer(recorder.capture).run(realtime=True, speed=2.0)
+    # The last entry was recorded 11ms in, so at double speed the replay takes at least 5.5ms
+    assert report.wall_time >= 0.0055
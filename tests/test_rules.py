@@ -0,0 +1,66 @@
+import json
+import os
+
+from adapters.windows.rules import ClassificationCache, RecordedWindow, compile_rules
+
+OWN_PID = 100
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "windows.json")
+
+def load_fixtures() -> list[tuple[RecordedWindow, str | None]]:
+    with open(FIXTURES) as f:
+        records = json.load(f)
+    return [(RecordedWindow(**{k: v for k, v in r.items() if k != "expect"}), r["expect"]) for r in records]
+
+def test_recorded_windows():
+    rules = compile_rules(OWN_PID)
+    for window, expected in load_fixtures():
+        verdict = rules.classify(window)
+        assert verdict.manageable == (expected is None), window
+        assert verdict.rule == expected, window
+
+def test_cheap_rules_run_first():
+    class Probe:
+        "Records which attributes were read"
+        def __init__(self, window: RecordedWindow):
+            self.window = window
+            self.read: list[str] = []
+
+        def __getattr__(self, name):
+            self.read.append(name)
+            return getattr(self.window, name)
+
+    probe = Probe(RecordedWindow(visible=False, title="Hidden", cloaked=True))
+    assert compile_rules(OWN_PID).classify(probe).rule == "hidden"
+    assert probe.read == ["exists", "visible"]
+
+def test_cache_counts_and_invalidates():
+    windows = {1: RecordedWindow(title="Notepad"), 2: RecordedWindow(title="")}
+    probed = []
+
+    def probe(hwnd: int) -> RecordedWindow:
+        probed.append(hwnd)
+        return windows[hwnd]
+
+    cache = ClassificationCache(compile_rules(OWN_PID), probe)
+    assert cache.is_manageable(1)
+    assert not cache.is_manageable(2)
+    assert cache.is_manageable(1)
+    assert not cache.is_manageable(2)
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert probed == [1, 2]
+
+    # Getting a title makes it manageable, once we're told
+    windows[2] = RecordedWindow(title="Loaded")
+    assert not cache.is_manageable(2)
+    cache.invalidate(2)
+    assert cache.is_manageable(2)
+    assert probed == [1, 2, 2]
+
+def test_probe_errors_are_not_cached():
+    def probe(hwnd: int) -> RecordedWindow:
+        raise OSError("invalid window handle")
+
+    cache = ClassificationCache(compile_rules(OWN_PID), probe)
+    assert cache.classify(5).rule == "error"
+    cache.classify(5)
+    assert cache.misses == 2
@@ -0,0 +1,58 @@
+import asyncio
+
+from adapters.fake import FakeAdapter
+from core.scheduler import RefreshScheduler
+
+def test_bursts_coalesce_into_one_flush():
+    flushes = []
+
+    async def run():
+        scheduler = RefreshScheduler(flushes.append, interval=0.01)
+        scheduler.bind(asyncio.get_running_loop())
+
+        for _ in range(30):
+            scheduler.request(0)
+        scheduler.request(1)
+        await asyncio.sleep(0.05)
+
+        # Requesting everything wins over single monitors
+        scheduler.request(1)
+        scheduler.request(None)
+        await asyncio.sleep(0.05)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert flushes == [{0, 1}, None]
+    assert scheduler.stats.requests == 33
+    assert scheduler.stats.flushes == 2
+    assert scheduler.stats.coalesced == 31
+
+def test_requests_from_other_threads():
+    flushes = []
+
+    async def run():
+        scheduler = RefreshScheduler(flushes.append, interval=0.01)
+        scheduler.bind(asyncio.get_running_loop())
+        await asyncio.gather(*(asyncio.to_thread(scheduler.request, i % 2) for i in range(10)))
+        await asyncio.sleep(0.05)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    # Nothing was lost, however the requests interleaved with the flushes
+    assert set().union(*flushes) == {0, 1}
+    assert scheduler.stats.requests == 10
+    assert scheduler.stats.flushes == len(flushes)
+
+def test_hold_batches_into_one_commit():
+    adapter = FakeAdapter()
+    ws = adapter.get_monitors()[0].current_workspace()
+    adapter.refresh()
+    adapter.batches.clear()
+
+    with adapter.scheduler.hold():
+        ws.move_focus(1)
+        adapter.refresh(0)
+        ws.move_focus(1)
+        adapter.refresh(0)
+        assert adapter.batches == []
+    assert len(adapter.batches) == 1
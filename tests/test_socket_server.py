@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import socket
+import stat
+import tempfile
+
+import pytest
+
+from adapters.fake import FakeAdapter
+from core.manager import WindowManager
+from ipc.socket_server import ErrorCode, IpcServer, execute_batch
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, data: bytes) -> dict:
+    writer.write(data)
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+async def connect_tcp(server: IpcServer) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    host, port = server.address.split(":")
+    reader, writer = await asyncio.open_connection(host, int(port))
+    assert await request(reader, writer, b"auth %s\n" % server.token.encode()) == {"ok": True}
+    return reader, writer
+
+def test_batches_over_tcp(tmp_path):
+    token_path = str(tmp_path / "token")
+    adapter = FakeAdapter()
+    wm = WindowManager(adapter)
+    adapter.batches.clear()
+
+    async def run():
+        server = IpcServer(wm)
+        await server.start_tcp(0, token_path=token_path)
+        reader, writer = await connect_tcp(server)
+
+        reply = await request(reader, writer, b"focus_right; focus_right; resize_inc; state\n")
+        assert reply["ok"] and reply["ran"] == 4
+        assert reply["results"] == [{"monitor": 0, "workspace": wm.current_monitor().current_workspace().id, "window": 3, "windows": [1, 2, 3]}]
+        # One transaction, one commit
+        assert len(adapter.batches) == 1
+
+        # Nothing runs if any command is unknown
+        reply = await request(reader, writer, b"focus_left; frobnicate\n")
+        assert reply == {"ok": False, "code": ErrorCode.UNKNOWN_COMMAND, "error": "Unknown command: frobnicate", "index": 1}
+
+        # Length-prefixed batches can span lines
+        payload = b"focus_left\nfocus_left\n"
+        reply = await request(reader, writer, b"#%d\n" % len(payload) + payload)
+        assert reply == {"ok": True, "ran": 2}
+
+        # Nothing that starts processes or stops us
+        reply = await request(reader, writer, b"focus_left; open calc.exe\n")
+        assert reply == {"ok": False, "code": ErrorCode.NOT_ALLOWED, "error": "Not allowed over IPC: open", "index": 1}
+
+        reply = await request(reader, writer, b"#nonsense\n")
+        assert reply["code"] == ErrorCode.PROTOCOL
+
+        writer.close()
+        await server.stop()
+
+    asyncio.run(run())
+    win = wm.current_monitor().current_workspace().focused_window()
+    assert win and win.id == 1
+
+def test_concurrent_unix_clients():
+    wm = WindowManager(FakeAdapter())
+
+    async def client(path: str, n: int) -> list[dict]:
+        reader, writer = await asyncio.open_unix_connection(path)
+        replies = [await request(reader, writer, b"focus_right; focus_left\n") for _ in range(n)]
+        writer.close()
+        return replies
+
+    async def run():
+        server = IpcServer(wm)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "scrollwm.sock")
+            await server.start_unix(path)
+            results = await asyncio.gather(*(client(path, 10) for _ in range(5)))
+            await server.stop()
+            assert not os.path.exists(path)
+        return results
+
+    results = asyncio.run(run())
+    assert all(reply == {"ok": True, "ran": 2} for replies in results for reply in replies)
+
+def test_unix_socket_is_private_and_not_stolen(tmp_path):
+    wm = WindowManager(FakeAdapter())
+    path = str(tmp_path / "scrollwm.sock")
+
+    async def run():
+        server = IpcServer(wm)
+        await server.start_unix(path)
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        # A second instance leaves the running one alone
+        with pytest.raises(RuntimeError):
+            await IpcServer(wm).start_unix(path)
+        assert os.path.exists(path)
+        await server.stop()
+
+        # A socket nobody is listening on is left over from a crash and gets replaced
+        stale = socket.socket(socket.AF_UNIX)
+        stale.bind(path)
+        stale.close()
+        await server.start_unix(path)
+        await server.stop()
+
+    asyncio.run(run())
+
+def test_tcp_clients_need_the_token(tmp_path):
+    token_path = tmp_path / "token"
+    wm = WindowManager(FakeAdapter())
+
+    async def run():
+        server = IpcServer(wm)
+        await server.start_tcp(0, token_path=str(token_path))
+        assert token_path.read_text().split() == [server.address, server.token]
+        host, port = server.address.split(":")
+        reader, writer = await asyncio.open_connection(host, int(port))
+        reply = await request(reader, writer, b"auth wrong\n")
+        assert reply["code"] == ErrorCode.UNAUTHORIZED
+        assert await reader.read() == b""
+        await server.stop()
+        assert not token_path.exists()
+
+    asyncio.run(run())
+
+def test_failed_command_reports_what_ran(monkeypatch):
+    wm = WindowManager(FakeAdapter())
+    def fail(steps: int):
+        raise ValueError("boom")
+    monkeypatch.setattr(wm, "resize_window", fail)
+
+    reply = execute_batch(wm, ["focus_left", "focus_left", "resize_inc", "focus_right"])
+    assert reply == {"ok": False, "code": ErrorCode.COMMAND_FAILED, "error": "boom", "command": "resize_inc", "ran": 2}
+
+def test_stop_with_idle_client_connected(tmp_path):
+    token_path = str(tmp_path / "token")
+    wm = WindowManager(FakeAdapter())
+
+    async def run():
+        server = IpcServer(wm)
+        await server.start_tcp(0, token_path=token_path)
+        reader, writer = await connect_tcp(server)
+        await request(reader, writer, b"state\n")
+        await asyncio.wait_for(server.stop(), 1)
+        assert await reader.read() == b""
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+import json
+
+from adapters.fake import FakeAdapter
+from core.manager import WindowManager
+from core.trace import Histogram, Tracer, tracer
+from ipc.commands import parse_command, run_batch
+
+def test_disabled_tracer_records_nothing():
+    t = Tracer()
+    calls = []
+
+    @t.traced()
+    def work(x):
+        calls.append(x)
+        return x * 2
+
+    with t.span("outer"):
+        assert work(21) == 42
+    # One shared do-nothing context, nothing allocated per span
+    assert t.span("a") is t.span("b")
+    assert calls == [21] and t.histograms == {} and t.chrome_trace()["traceEvents"] == []
+
+def test_spans_are_aggregated_and_exported():
+    t = Tracer()
+    t.enable()
+
+    @t.traced("work")
+    def work():
+        with t.span("inner", "detail"):
+            pass
+
+    for _ in range(3):
+        work()
+    assert t.histograms["work"].count == 3
+    assert t.histograms["inner:detail"].count == 3
+
+    trace = json.loads(json.dumps(t.chrome_trace()))
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert len(spans) == 6
+    assert {e["name"] for e in spans} == {"work", "inner detail"}
+    assert all(e["dur"] >= 0 and e["ts"] >= 0 for e in spans)
+    # Every thread that recorded something is named
+    assert any(e["ph"] == "M" for e in trace["traceEvents"])
+
+    summary = t.summary().splitlines()
+    assert len(summary) == 3 and summary[0].startswith("span")
+
+def test_events_are_bounded():
+    t = Tracer()
+    t.enable(max_events=10)
+    for _ in range(100):
+        with t.span("x"):
+            pass
+    assert len(t.chrome_trace()["traceEvents"]) == 10 + 1
+    assert t.histograms["x"].count == 100
+
+def test_histogram_percentiles():
+    hist = Histogram()
+    for ns in [1_000] * 90 + [1_000_000] * 10:
+        hist.add(ns)
+    assert hist.min_ns == 1_000 and hist.max_ns == 1_000_000
+    assert 1_000 <= hist.percentile(50) < 2_000
+    assert 1_000_000 // 2 <= hist.percentile(95) <= 1_000_000
+
+def test_commands_are_traced_end_to_end():
+    wm = WindowManager(FakeAdapter())
+    tracer.reset()
+    tracer.enable()
+    try:
+        run_batch(wm, [parse_command("focus_right"), parse_command("move_left")])
+    finally:
+        tracer.disable()
+    names = set(tracer.histograms)
+    tracer.reset()
+    assert {"batch", "command:focus_right", "WindowManager.move_focus_horizontal",
+            "WindowManager.move_window_horizontal", "Workspace.layout_windows", "plan_layout"} <= names
@@ -0,0 +1,98 @@
+from adapters.fake import FakeAdapter, FakeVisibilityBackend
+from core.layout import WindowPlacement
+from core.models import Rect, Window
+from core.visibility import VisibilityTracker, WindowState
+
+SHOWN = WindowPlacement(1, Rect(0, 0, 100, 100), True)
+MOVED = WindowPlacement(1, Rect(100, 0, 200, 100), True)
+PARKED = WindowPlacement(1, None, False, parked=True)
+HIDDEN = WindowPlacement(1, None, False)
+
+def make_tracker():
+    backend = FakeVisibilityBackend()
+    return VisibilityTracker(backend), backend
+
+def test_transitions_only_when_state_changes():
+    tracker, backend = make_tracker()
+    for p in [SHOWN, MOVED, SHOWN, PARKED, PARKED, SHOWN, HIDDEN, HIDDEN, PARKED, SHOWN]:
+        assert tracker.transition(p)
+    assert backend.calls == [
+        ("park", 1),
+        ("minimize", 1),
+        # Already out of sight, so parking a minimized window does nothing
+        ("restore", 1),
+    ]
+    assert tracker.state(1) is WindowState.SHOWN
+    assert tracker.stats.unchanged == 7
+
+def test_unknown_windows_are_probed():
+    tracker, backend = make_tracker()
+    backend.states[1] = WindowState.MINIMIZED
+    tracker.transition(HIDDEN)
+    assert backend.calls == []
+    tracker.transition(SHOWN)
+    assert backend.calls == [("restore", 1)]
+
+def test_observed_changes_are_respected():
+    tracker, backend = make_tracker()
+    tracker.transition(SHOWN)
+    # The user minimized it themselves
+    tracker.observe(1, WindowState.MINIMIZED)
+    tracker.transition(HIDDEN)
+    assert backend.calls == []
+
+def test_failed_transitions_keep_the_old_state():
+    tracker, backend = make_tracker()
+    tracker.transition(SHOWN)
+
+    def fail(win_id):
+        raise OSError("access denied")
+    backend.minimize = fail
+    assert not tracker.transition(HIDDEN)
+    assert tracker.state(1) is WindowState.SHOWN
+    assert tracker.stats.failed == 1
+
+def test_switching_workspaces_back_and_forth():
+    adapter = FakeAdapter()
+    mon = adapter.get_monitors()[0]
+    calls = adapter.visibility.backend.calls
+    adapter.refresh()
+    # Everything starts out shown; 2 and 3 are scrolled out of view, 21 and 22 are on another workspace
+    assert sorted(calls) == [("minimize", 21), ("minimize", 22), ("park", 2), ("park", 3)]
+    calls.clear()
+
+    for _ in range(3):
+        mon._focused_workspace = mon.workspaces[1].id
+        adapter.refresh()
+        mon._focused_workspace = mon.workspaces[0].id
+        adapter.refresh()
+    # Only the window that's actually shown each time changes state, and 2 and 3 are never touched
+    assert calls == [("minimize", 1), ("restore", 21), ("minimize", 21), ("restore", 1)] * 3
+
+def test_scrolling_parks_instead_of_minimizing():
+    adapter = FakeAdapter()
+    ws = adapter.get_monitors()[1].current_workspace()
+    for i in range(4):
+        ws.add_window(Window(100 + i, width=0.5))
+    adapter.refresh()
+    calls = adapter.visibility.backend.calls
+    calls.clear()
+
+    ws.focus_position(3)
+    adapter.refresh()
+    assert sorted(calls) == [("park", 100), ("park", 101)]
+    assert adapter.visibility.stats.restored == 0
+
+def test_minimized_windows_are_parked_for_their_thumbnails():
+    tracker, backend = make_tracker()
+    tracker.transition(SHOWN)
+    assert tracker.park_minimized(1)
+    # Shown windows have something to draw already
+    assert backend.calls == []
+
+    tracker.transition(HIDDEN)
+    assert tracker.park_minimized(1)
+    assert tracker.state(1) is WindowState.PARKED
+    # Parked, it comes back with a move rather than a restore
+    tracker.transition(SHOWN)
+    assert backend.calls == [("minimize", 1), ("park", 1)]
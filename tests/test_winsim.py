@@ -0,0 +1,210 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.models import Rect
+from ipc.commands import Command, run_batch
+from winsim import constants as c
+from winsim.api import install, win32gui
+from winsim.desktop import CostModel, SimDesktop, Win32Error
+
+MONITORS = [Rect(0, 0, 1920, 1080), Rect(1920, 0, 3840, 1080)]
+
+def test_calls_are_counted_and_charged():
+    desktop = SimDesktop(MONITORS, CostModel(default_us=1, per_call_us={"SetWindowPos": 100}, per_item_us={"EndDeferWindowPos": 10}))
+    a = desktop.open_window("A")
+    b = desktop.open_window("B")
+    with install(desktop):
+        win32gui.SetWindowPos(a, c.HWND_TOP, 0, 0, 500, 500, c.SWP_NOACTIVATE)
+        hdwp = win32gui.BeginDeferWindowPos(2)
+        for hwnd in (a, b):
+            hdwp = win32gui.DeferWindowPos(hdwp, hwnd, c.HWND_TOP, 10, 10, 300, 300, c.SWP_NOZORDER | c.SWP_NOACTIVATE)
+        win32gui.EndDeferWindowPos(hdwp)
+        with pytest.raises(Win32Error):
+            win32gui.ShowWindow(12345, c.SW_SHOW)
+    assert desktop.windows[b].rect == Rect(10, 10, 310, 310)
+    # SetWindowPos without NOZORDER brought A to the front
+    assert desktop.z_order[0] == a
+    assert desktop.stats.calls["DeferWindowPos"] == 2
+    assert desktop.stats.cost_us["SetWindowPos"] == 100
+    assert desktop.stats.cost_us["EndDeferWindowPos"] == 1 + 2 * 10
+    assert desktop.stats.total_calls == 6
+
+def test_windows_can_only_be_destroyed_by_their_thread():
+    desktop = SimDesktop(MONITORS)
+    with install(desktop):
+        wc = win32gui.WNDCLASS()
+        wc.lpszClassName = "Test"
+        wc.lpfnWndProc = {}
+        win32gui.RegisterClass(wc)
+        hwnd = win32gui.CreateWindowEx(0, "Test", "mine", c.WS_POPUP, 0, 0, 10, 10, 0, 0, 0, None)
+        errors = []
+        def destroy():
+            try:
+                win32gui.DestroyWindow(hwnd)
+            except Win32Error as e:
+                errors.append(e.winerror)
+        thread = threading.Thread(target=destroy)
+        thread.start()
+        thread.join()
+        assert errors == [5] and hwnd in desktop.windows
+        win32gui.DestroyWindow(hwnd)
+    assert hwnd not in desktop.windows
+
+def test_windows_adapter_runs_headless():
+    desktop = SimDesktop(MONITORS)
+    existing = [desktop.open_window(f"Window {i}", Rect(100 * i, 100, 100 * i + 800, 700)) for i in range(4)]
+    watchers = []
+
+    async def run():
+        from adapters.windows.adapter import WindowsAdapter
+        from core.manager import WindowManager
+        wm = WindowManager(WindowsAdapter(animation_duration=0))
+        watchers.append(wm.adapter._watcher)
+        task = asyncio.create_task(wm.run())
+        await desktop.settle()
+        assert {w.id for w in wm.windows} == set(existing)
+        # Every window was laid out (or parked) by us
+        assert all(desktop.windows[hwnd].rect != Rect(100 * i, 100, 100 * i + 800, 700) for i, hwnd in enumerate(existing))
+
+        opened = desktop.open_window("New", Rect(2000, 100, 2600, 700))
+        await desktop.settle()
+        assert opened in wm.windows and wm.windows.locate(opened).monitor_index == 1
+
+        # Ten key repeats in one read cost a single focus change and at most one layout batch
+        desktop.stats.reset()
+        run_batch(wm, [Command("focus_right", [], repeat=10)])
+        await desktop.settle()
+        assert desktop.stats.calls["SetForegroundWindow"] == 1
+        assert desktop.stats.calls["EndDeferWindowPos"] <= 1
+
+        run_batch(wm, [Command("close_window", [])])
+        await desktop.settle()
+        assert len(wm.windows) == 4
+
+        wm.exit()
+        await task
+
+    with install(desktop):
+        asyncio.run(run())
+    watchers[0].join(timeout=2)
+    assert not watchers[0].is_alive()
+    # Every proxy thumbnail was cleaned up
+    assert not desktop.thumbnails
+    assert all(win.pid != desktop.pid for win in desktop.windows.values())
+
+def test_startup_admits_every_window_in_one_pass():
+    desktop = SimDesktop(MONITORS)
+    existing = [desktop.open_window(f"Window {i}", Rect(60 * i, 100, 60 * i + 800, 700), process=f"app{i % 3}.exe")
+                for i in range(40)]
+    submitted = []
+
+    async def run():
+        from adapters.windows.adapter import WindowsAdapter
+        from core.manager import WindowManager
+        wm = WindowManager(WindowsAdapter(animation_duration=0))
+        submitted.append(wm.adapter.effects.stats.submitted)
+        task = asyncio.create_task(wm.run())
+        await desktop.settle()
+        assert {w.id for w in wm.windows} == set(existing)
+        assert set(wm.adapter.startup_phases) == {"enumerate", "metadata", "register", "layout"}
+        wm.exit()
+        await task
+
+    with install(desktop):
+        asyncio.run(run())
+    # What classifying a window read about it is all we read
+    for name in ("GetClassName", "GetWindowThreadProcessId", "InternalGetWindowText"):
+        assert desktop.stats.calls[name] <= len(desktop.windows) + 1, name
+    assert desktop.stats.calls["EndDeferWindowPos"] <= 2
+    # Prewarming, the layout, every proxy, the note that it's all been applied, and focusing the first window
+    assert submitted[0] <= 5
+
+def test_proxy_goes_back_to_the_pool_when_its_window_is_gone():
+    desktop = SimDesktop(MONITORS)
+    hwnd = desktop.open_window("Crossing", Rect(1500, 100, 2300, 700))
+    with install(desktop):
+        from adapters.windows.thumbnail.cloak import create_cloaking_thumbnail, remove_cloaking_thumbnail
+        from adapters.windows.thumbnail.pool import ThumbnailBackend
+        from core.pool import ProxyPool
+        pool = ProxyPool(ThumbnailBackend())
+        thumbnail = create_cloaking_thumbnail(hwnd, Rect(0, 0, 420, 600), (1500, 100), pool)
+        assert thumbnail is not None and pool.in_use == 1
+        desktop.close_window(hwnd)
+        remove_cloaking_thumbnail(hwnd, thumbnail, pool)
+        assert pool.in_use == 0
+        pool.clear()
+
+def test_focus_only_restores_minimized_windows():
+    desktop = SimDesktop(MONITORS)
+    a, b = (desktop.open_window(f"Window {i}", Rect(100, 100, 900, 700)) for i in range(2))
+
+    async def run():
+        from adapters.windows.adapter import WindowsAdapter
+        from core.manager import WindowManager
+        from core.visibility import WindowState
+        wm = WindowManager(WindowsAdapter(animation_duration=0))
+        task = asyncio.create_task(wm.run())
+        await desktop.settle()
+
+        desktop.stats.reset()
+        wm.adapter.focus_window(wm.windows[a])
+        await desktop.settle()
+        assert desktop.stats.calls["ShowWindow"] == 0
+
+        desktop.user_minimize(b)
+        await desktop.settle()
+        wm.adapter.focus_window(wm.windows[b])
+        await desktop.settle()
+        assert not desktop.windows[b].iconic
+        assert wm.adapter._visibility.state(b) is WindowState.SHOWN
+
+        wm.exit()
+        await task
+
+    with install(desktop):
+        asyncio.run(run())
+
+def test_overview_click_selects_a_window():
+    desktop = SimDesktop(MONITORS)
+    a, b = (desktop.open_window(f"Window {i}", Rect(100, 100, 900, 700)) for i in range(2))
+
+    async def run():
+        from adapters.windows.adapter import WindowsAdapter
+        from core.manager import WindowManager
+        wm = WindowManager(WindowsAdapter(animation_duration=0))
+        wm.adapter.on_overview_click = lambda x, y: run_batch(wm, [Command("overview_select", [str(x), str(y)])])
+        task = asyncio.create_task(wm.run())
+        await desktop.settle()
+
+        # Put the focused window on the next workspace, then go back; it's minimized there
+        moved = wm.current_monitor().current_workspace().focused_window().id
+        run_batch(wm, [Command("move_down", []), Command("workspace_up", [])])
+        await desktop.settle()
+        assert desktop.windows[moved].iconic
+
+        run_batch(wm, [Command("overview_toggle", [])])
+        await desktop.settle()
+        # Restored straight to where parked windows go, so there's something for its thumbnail to show
+        assert not desktop.windows[moved].iconic
+        assert desktop.windows[moved].rect.left() == -32000
+        backdrop = [w for w in desktop.windows.values() if w.class_name == "OverviewBackdropClass"]
+        assert len(backdrop) == 1 and backdrop[0].visible and backdrop[0].rect == MONITORS[0]
+
+        # Through the thumbnail, which lets the click through to the backdrop
+        cell = wm.overview.visible_cells()[moved]
+        desktop.user_click(cell.rect.left() + 10, cell.rect.top() + 10)
+        await desktop.settle()
+        assert wm.overview is None
+        assert not backdrop[0].visible
+        assert desktop.foreground == moved
+        assert MONITORS[0].contains_rect(desktop.windows[moved].rect)
+
+        wm.exit()
+        await task
+
+    with install(desktop):
+        asyncio.run(run())
+    # The backdrop went with the thumbnails
+    assert all(win.pid != desktop.pid for win in desktop.windows.values())
@@ -0,0 +1,56 @@
+from core.models import Window, Workspace
+
+def make_workspace(widths):
+    return Workspace(windows=[Window(i + 1, width=w) for i, w in enumerate(widths)])
+
+def test_prefix_sums_follow_mutations():
+    ws = make_workspace([0.5, 0.5, 1.0, 0.25])
+    assert [w.x for w in ws.windows] == [0.0, 0.5, 1.0, 2.0]
+
+    ws.set_window_width(ws.windows[1], 0.75)
+    assert [w.x for w in ws.windows] == [0.0, 0.5, 1.25, 2.25]
+    assert ws.total_width() == 2.5
+
+    moved = ws.windows[3]
+    assert ws.move_window(moved, 0)
+    assert [w.id for w in ws.windows] == [4, 1, 2, 3]
+    assert [ws.index_of(w.id) for w in ws.windows] == [0, 1, 2, 3]
+    assert moved.x == 0.0 and ws.windows[1].x == 0.25
+
+    ws.remove_window(ws.windows[1])
+    assert [w.id for w in ws.windows] == [4, 2, 3]
+    assert [w.x for w in ws.windows] == [0.0, 0.25, 1.0]
+    assert ws.index_of(1) is None
+
+    ws.add_window(Window(5, width=0.5), 1)
+    assert [w.id for w in ws.windows] == [4, 5, 2, 3]
+    assert [w.x for w in ws.windows] == [0.0, 0.25, 0.75, 1.5]
+    assert ws.total_width() == 2.5
+
+    ws.add_windows([Window(6, width=0.5), Window(7, width=0.25)])
+    assert [ws.index_of(w.id) for w in ws.windows] == [0, 1, 2, 3, 4, 5]
+    assert [w.x for w in ws.windows][4:] == [2.5, 3.0]
+    assert ws.total_width() == 3.25 and ws.windows[-1].workspace is ws
+
+def test_windows_in_view():
+    ws = make_workspace([0.5] * 10)
+    assert [w.id for w in ws.windows_in_view(0.0)] == [1, 2]
+    assert [w.id for w in ws.windows_in_view(0.25)] == [1, 2, 3]
+    assert [w.id for w in ws.windows_in_view(4.5)] == [10]
+    assert ws.windows_in_view(5.0) == []
+
+    # centered workspaces have a negative offset
+    small = make_workspace([0.25, 0.25])
+    small.layout_windows()
+    assert small.scroll_offset == -0.25
+    assert [w.id for w in small.windows_in_view()] == [1, 2]
+
+def test_scroll_follows_focus():
+    ws = make_workspace([0.5] * 6)
+    ws.focus_position(-1)
+    assert ws.focused_window().id == 6
+    assert ws.scroll_offset == 2.0
+
+    ws.move_focus(-3)
+    assert ws.focused_window().id == 3
+    assert ws.scroll_offset == 1.0
@@ -0,0 +1,75 @@
+"""
+Runs the real Windows adapter headless against a simulated desktop and reports every Win32 call it made,
+with what those calls would have cost. For seeing how batching, caching and diffing change the number
+of expensive calls without a Windows machine.
+
+    python -m winsim                        # 2 monitors, 12 windows, a scripted session
+    python -m winsim --windows 60 --sleep   # actually wait out each call's latency
+"""
+import argparse
+import asyncio
+import sys
+
+from core.models import Rect
+from winsim.api import install
+from winsim.desktop import CostModel, SimDesktop
+
+# What the simulated user does once everything has been laid out, one batch per line
+SESSION = [
+    ["focus_right"] * 5,
+    ["focus_left"] * 3,
+    ["move_right", "move_right"],
+    ["resize_inc"],
+    ["workspace_down"],
+    ["workspace_up"],
+    ["monitor_right"],
+    ["move_monitor_left"],
+    ["maximize_toggle"],
+    ["maximize_toggle"],
+    ["overview_toggle"],
+    ["overview_down"],
+    ["overview_toggle"],
+    ["close_window"],
+]
+
+async def session(desktop: SimDesktop, windows: int, animations: bool):
+    from adapters.windows.adapter import WindowsAdapter
+    from core.animation import DEFAULT_ANIMATION_DURATION
+    from core.manager import WindowManager
+    from ipc.commands import coalesce, parse_command, run_batch
+
+    wm = WindowManager(WindowsAdapter(animation_duration=DEFAULT_ANIMATION_DURATION if animations else 0))
+    task = asyncio.create_task(wm.run())
+    await desktop.settle()
+    print(f"Startup ({len(wm.windows)} windows):\n{desktop.stats.summary()}\n")
+
+    desktop.stats.reset()
+    for i in range(windows // 4):
+        desktop.open_window(f"Opened {i}", Rect(200, 200, 1000, 800), process="opened.exe")
+    await desktop.settle()
+    for lines in SESSION:
+        run_batch(wm, coalesce(cmd for cmd in map(parse_command, lines) if cmd))
+        await desktop.settle()
+    print(f"Session:\n{desktop.stats.summary()}")
+
+    wm.exit()
+    await task
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m winsim", description="Run the Windows adapter against a simulated desktop")
+    parser.add_argument("--monitors", type=int, default=2)
+    parser.add_argument("--windows", type=int, default=12, help="Windows open at startup")
+    parser.add_argument("--sleep", action="store_true", help="Actually take as long as each call would have")
+    parser.add_argument("--animations", action="store_true", help="Animate layout changes, as the real thing does by default")
+    args = parser.parse_args()
+
+    desktop = SimDesktop([Rect(1920 * i, 0, 1920 * (i + 1), 1080) for i in range(args.monitors)], CostModel(sleep=args.sleep))
+    for i in range(args.windows):
+        mon = desktop.monitors[i % args.monitors].rect
+        desktop.open_window(f"Window {i}", Rect(mon.left() + 50 * i, 100, mon.left() + 50 * i + 900, 800), process=f"app{i % 5}.exe")
+    with install(desktop):
+        asyncio.run(session(desktop, args.windows, args.animations))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
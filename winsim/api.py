@@ -0,0 +1,439 @@
+import contextlib
+import ctypes
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Iterator, Optional
+
+from core.models import Rect
+from winsim import constants as c
+from winsim.desktop import (
+    E_HANDLE, E_INVALIDARG, ERROR_ACCESS_DENIED, ERROR_CANNOT_FIND_WND_CLASS, ERROR_CLASS_ALREADY_EXISTS,
+    ERROR_INVALID_PARAMETER, ICONIC_RECT, SimDesktop, SimThumbnail, Win32Error, _MouseHook, _WinEventHook,
+)
+
+# pywin32 and ctypes.windll as far as our code uses them, backed by whichever SimDesktop is installed.
+#
+#     desktop = SimDesktop([Rect(0, 0, 1920, 1080)])
+#     with install(desktop):
+#         from adapters.windows.adapter import WindowsAdapter
+#         ...
+#     print(desktop.stats.summary())
+#
+# adapters.windows.* is imported afresh inside every install(), since those modules hold on to
+# the Win32 functions and module state (registered classes, the classification cache) they started with.
+
+_desktop: Optional[SimDesktop] = None
+# The desktop each thread last called into, so threads that are still winding down
+# (e.g. unhooking after their message loop quit) can finish once the block has ended
+_thread = threading.local()
+
+def _current() -> SimDesktop:
+    desktop = _desktop or getattr(_thread, "desktop", None)
+    if desktop is None:
+        raise RuntimeError("No simulated desktop is installed")
+    _thread.desktop = desktop
+    return desktop
+
+class _Call:
+    "One exported function: counted, charged to the cost model and run with the desktop locked"
+
+    def __init__(self, name: str, impl: Callable[..., Any], items: Optional[Callable[..., int]] = None, blocking: bool = False):
+        self.name = name
+        self.impl = impl
+        self.items = items
+        self.blocking = blocking
+        # ctypes callers set these on DLL functions; nothing reads them here
+        self.argtypes: Any = None
+        self.restype: Any = None
+
+    def __call__(self, *args: Any) -> Any:
+        desktop = _current()
+        with desktop.lock:
+            us = desktop.charge(self.name, self.items(desktop, *args) if self.items else 0)
+            if not self.blocking:
+                result = self.impl(desktop, *args)
+        if self.blocking:
+            # Waits for other threads, so it can't hold the lock
+            result = self.impl(desktop, *args)
+        if desktop.cost.sleep and us:
+            time.sleep(us / 1e6)
+        return result
+
+class Handle(int):
+    "pywin32's PyHANDLE, which compares equal to the raw handle"
+
+    @property
+    def handle(self) -> int:
+        return int(self)
+
+def _value(arg: Any) -> Any:
+    "The number inside a ctypes argument"
+    return getattr(arg, "value", arg)
+
+def _target(pointer: Any) -> Any:
+    "What a ctypes.byref() points to"
+    return pointer._obj
+
+def _tid() -> int:
+    return threading.get_native_id()
+
+# -------------------------
+# win32gui
+# -------------------------
+
+class WNDCLASS:
+    hInstance: int = 0
+    lpszClassName: str = ""
+    style: int = 0
+    hbrBackground: int = 0
+    hCursor: int = 0
+    lpfnWndProc: Any = None
+
+def _register_class(d: SimDesktop, wc: WNDCLASS) -> int:
+    if wc.lpszClassName in d.classes:
+        raise Win32Error(ERROR_CLASS_ALREADY_EXISTS, "RegisterClass", "Class already exists.")
+    d.classes[wc.lpszClassName] = wc.lpfnWndProc
+    return 0xC000 + len(d.classes)
+
+def _create_window(d: SimDesktop, ex_style: int, class_name: str, title: str, style: int, x: int, y: int, width: int, height: int,
+                   parent: int, menu: int, instance: int, param: Any) -> int:
+    if class_name not in d.classes:
+        raise Win32Error(ERROR_CANNOT_FIND_WND_CLASS, "CreateWindowEx", "Cannot find window class.")
+    return d._create(title, class_name, d.pid, _tid(), Rect(x, y, x + width, y + height), style, ex_style, parent=parent)
+
+def _destroy_window(d: SimDesktop, hwnd: int):
+    win = d._window(hwnd, "DestroyWindow")
+    if win.tid != _tid():
+        # Only the thread that created a window can destroy it
+        raise Win32Error(ERROR_ACCESS_DENIED, "DestroyWindow", "Access is denied.")
+    d._destroy(hwnd)
+
+def _get_window_long(d: SimDesktop, hwnd: int, index: int) -> int:
+    win = d._window(hwnd, "GetWindowLong")
+    if index == c.GWL_STYLE:
+        return win.style
+    if index == c.GWL_EXSTYLE:
+        return win.ex_style
+    raise Win32Error(ERROR_INVALID_PARAMETER, "GetWindowLong", "The parameter is incorrect.")
+
+def _set_window_long(d: SimDesktop, hwnd: int, index: int, value: int) -> int:
+    win = d._window(hwnd, "SetWindowLong")
+    old = _get_window_long(d, hwnd, index)
+    if index == c.GWL_STYLE:
+        win.style = value
+    else:
+        win.ex_style = value
+    return old
+
+def _set_layered_attributes(d: SimDesktop, hwnd: int, key: int, alpha: int, flags: int):
+    win = d._window(hwnd, "SetLayeredWindowAttributes")
+    if not win.ex_style & c.WS_EX_LAYERED:
+        raise Win32Error(ERROR_INVALID_PARAMETER, "SetLayeredWindowAttributes", "The parameter is incorrect.")
+    if flags & c.LWA_ALPHA:
+        win.alpha = alpha
+
+def _get_window_rect(d: SimDesktop, hwnd: int) -> tuple[int, int, int, int]:
+    win = d._window(hwnd, "GetWindowRect")
+    return tuple(ICONIC_RECT if win.iconic else win.rect)
+
+def _set_window_pos(d: SimDesktop, hwnd: int, after: int, x: int, y: int, cx: int, cy: int, flags: int):
+    d._place(d._window(hwnd, "SetWindowPos"), after, x, y, cx, cy, flags)
+
+def _begin_defer(d: SimDesktop, count: int) -> int:
+    hdwp = next(d._handles)
+    d._defers[hdwp] = []
+    return hdwp
+
+def _defer(d: SimDesktop, hdwp: int, hwnd: int, after: int, x: int, y: int, cx: int, cy: int, flags: int) -> int:
+    if hdwp not in d._defers:
+        raise Win32Error(ERROR_INVALID_PARAMETER, "DeferWindowPos", "The parameter is incorrect.")
+    if hwnd not in d.windows:
+        # Windows throws the whole batch away
+        del d._defers[hdwp]
+        d._window(hwnd, "DeferWindowPos")
+    d._defers[hdwp].append((hwnd, after, x, y, cx, cy, flags))
+    return hdwp
+
+def _end_defer(d: SimDesktop, hdwp: int):
+    moves = d._defers.pop(hdwp, None)
+    if moves is None:
+        raise Win32Error(ERROR_INVALID_PARAMETER, "EndDeferWindowPos", "The parameter is incorrect.")
+    for hwnd, *place in moves:
+        win = d.windows.get(hwnd)
+        if win is not None:
+            d._place(win, *place)
+
+def _show_window(d: SimDesktop, hwnd: int, cmd: int) -> int:
+    return int(d._show(d._window(hwnd, "ShowWindow"), cmd))
+
+def _set_foreground(d: SimDesktop, hwnd: int):
+    d._window(hwnd, "SetForegroundWindow")
+    d._activate(hwnd)
+
+def _post_message(d: SimDesktop, hwnd: int, message: int, wparam: int, lparam: int):
+    win = d._window(hwnd, "PostMessage")
+    if message == c.WM_CLOSE and win.pid != d.pid:
+        # The application takes the hint
+        d._destroy(hwnd)
+
+def _get_window_placement(d: SimDesktop, hwnd: int) -> tuple:
+    win = d._window(hwnd, "GetWindowPlacement")
+    cmd = c.SW_SHOWMINIMIZED if win.iconic else c.SW_SHOWNORMAL
+    # The rect is where it'd be restored to, even while it's minimized
+    return 0, cmd, (-1, -1), (-1, -1), tuple(win.rect)
+
+def _set_window_placement(d: SimDesktop, hwnd: int, placement: tuple):
+    win = d._window(hwnd, "SetWindowPlacement")
+    _, cmd, _, _, normal = placement
+    d._move(win, Rect(*normal))
+    d._show(win, cmd)
+
+def _client_to_screen(d: SimDesktop, hwnd: int, point: tuple[int, int]) -> tuple[int, int]:
+    # Only our own undecorated windows ask, so the client area is the whole window
+    win = d._window(hwnd, "ClientToScreen")
+    return win.rect.left() + point[0], win.rect.top() + point[1]
+
+def _enum_windows(d: SimDesktop, callback: Callable[[int, Any], bool], extra: Any):
+    for hwnd in list(d.z_order):
+        if hwnd in d.windows and not callback(hwnd, extra):
+            break
+
+def _get_window(d: SimDesktop, hwnd: int, cmd: int) -> int:
+    win = d._window(hwnd, "GetWindow")
+    return win.owner if cmd == c.GW_OWNER else 0
+
+win32gui = types.ModuleType("win32gui")
+win32gui.__dict__.update(
+    WNDCLASS=WNDCLASS,
+    RegisterClass=_Call("RegisterClass", _register_class),
+    CreateWindowEx=_Call("CreateWindowEx", _create_window),
+    DestroyWindow=_Call("DestroyWindow", _destroy_window),
+    GetModuleHandle=_Call("GetModuleHandle", lambda d, name: 0x400000),
+    GetClassName=_Call("GetClassName", lambda d, hwnd: d._window(hwnd, "GetClassName").class_name),
+    GetWindowLong=_Call("GetWindowLong", _get_window_long),
+    SetWindowLong=_Call("SetWindowLong", _set_window_long),
+    SetLayeredWindowAttributes=_Call("SetLayeredWindowAttributes", _set_layered_attributes),
+    GetWindowRect=_Call("GetWindowRect", _get_window_rect),
+    SetWindowPos=_Call("SetWindowPos", _set_window_pos),
+    BeginDeferWindowPos=_Call("BeginDeferWindowPos", _begin_defer),
+    DeferWindowPos=_Call("DeferWindowPos", _defer),
+    EndDeferWindowPos=_Call("EndDeferWindowPos", _end_defer, items=lambda d, hdwp: len(d._defers.get(hdwp, ()))),
+    ShowWindow=_Call("ShowWindow", _show_window),
+    SetForegroundWindow=_Call("SetForegroundWindow", _set_foreground),
+    PostMessage=_Call("PostMessage", _post_message),
+    PostThreadMessage=_Call("PostThreadMessage", lambda d, tid, message, wparam, lparam: d.post(tid, message, wparam, lparam)),
+    PostQuitMessage=_Call("PostQuitMessage", lambda d, code: d.post(_tid(), c.WM_QUIT, code)),
+    EnumWindows=_Call("EnumWindows", _enum_windows, items=lambda d, *_: len(d.z_order)),
+    IsWindow=_Call("IsWindow", lambda d, hwnd: int(hwnd in d.windows)),
+    IsWindowVisible=_Call("IsWindowVisible", lambda d, hwnd: int(hwnd in d.windows and d.windows[hwnd].visible)),
+    IsIconic=_Call("IsIconic", lambda d, hwnd: int(hwnd in d.windows and d.windows[hwnd].iconic)),
+    GetWindow=_Call("GetWindow", _get_window),
+    GetParent=_Call("GetParent", lambda d, hwnd: d._window(hwnd, "GetParent").parent),
+    GetWindowPlacement=_Call("GetWindowPlacement", _get_window_placement),
+    SetWindowPlacement=_Call("SetWindowPlacement", _set_window_placement),
+    ClientToScreen=_Call("ClientToScreen", _client_to_screen),
+    CreateSolidBrush=_Call("CreateSolidBrush", lambda d, color: next(d._handles)),
+    LoadCursor=_Call("LoadCursor", lambda d, instance, name: next(d._handles)),
+)
+
+# -------------------------
+# win32api, win32process, pywintypes
+# -------------------------
+
+def _monitor_from_window(d: SimDesktop, hwnd: int, flags: int) -> Handle:
+    win = d.windows.get(hwnd)
+    mon = d.monitor_for(win.rect) if win is not None else d.monitors[0]
+    return Handle(mon.handle)
+
+def _monitor_info(d: SimDesktop, handle: int) -> dict:
+    for i, mon in enumerate(d.monitors):
+        if mon.handle == handle:
+            return {"Monitor": tuple(mon.rect), "Work": tuple(mon.work), "Flags": 1 if i == 0 else 0, "Device": mon.device}
+    raise Win32Error(ERROR_INVALID_PARAMETER, "GetMonitorInfo", "The parameter is incorrect.")
+
+win32api = types.ModuleType("win32api")
+win32api.__dict__.update(
+    EnumDisplayMonitors=_Call("EnumDisplayMonitors", lambda d, hdc, clip: [(Handle(mon.handle), Handle(0), tuple(mon.rect)) for mon in d.monitors]),
+    GetMonitorInfo=_Call("GetMonitorInfo", _monitor_info),
+    MonitorFromWindow=_Call("MonitorFromWindow", _monitor_from_window),
+    GetCurrentThreadId=_Call("GetCurrentThreadId", lambda d: _tid()),
+    GetCurrentProcessId=_Call("GetCurrentProcessId", lambda d: d.pid),
+    RGB=lambda r, g, b: r | (g << 8) | (b << 16),
+)
+
+def _thread_process_id(d: SimDesktop, hwnd: int) -> tuple[int, int]:
+    win = d.windows.get(hwnd)
+    return (win.tid, win.pid) if win is not None else (0, 0)
+
+win32process = types.ModuleType("win32process")
+win32process.__dict__.update(
+    GetWindowThreadProcessId=_Call("GetWindowThreadProcessId", _thread_process_id),
+)
+
+pywintypes = types.ModuleType("pywintypes")
+pywintypes.__dict__.update(error=Win32Error, HANDLE=Handle)
+
+win32con = types.ModuleType("win32con")
+win32con.__dict__.update({name: value for name, value in vars(c).items() if name.isupper()})
+
+# -------------------------
+# ctypes.windll
+# -------------------------
+
+def _set_win_event_hook(d: SimDesktop, event_min: int, event_max: int, module: int, proc: Callable, pid: int, tid: int, flags: int) -> int:
+    handle = next(d._handles)
+    d._hooks[handle] = _WinEventHook(handle, event_min, event_max, proc, flags, d.pid, _tid())
+    return handle
+
+def _unhook_win_event(d: SimDesktop, handle: int) -> int:
+    return int(d._hooks.pop(_value(handle), None) is not None)
+
+def _set_windows_hook(d: SimDesktop, kind: int, proc: Callable, module: int, tid: int) -> int:
+    if kind != c.WH_MOUSE_LL:
+        return 0
+    handle = next(d._handles)
+    d._mouse_hooks[handle] = _MouseHook(handle, proc, _tid())
+    return handle
+
+def _get_message(d: SimDesktop, pmsg: Any, hwnd: int, first: int, last: int) -> int:
+    return d.get_message(_target(pmsg))
+
+def _window_text(d: SimDesktop, hwnd: int, buf: Any, size: int) -> int:
+    win = d.windows.get(hwnd)
+    if win is None or size <= 0:
+        return 0
+    text = win.title[:size - 1]
+    buf.value = text
+    return len(text)
+
+def _open_process(d: SimDesktop, access: int, inherit: bool, pid: int) -> int:
+    if pid not in d.processes:
+        return 0
+    handle = next(d._handles)
+    d._process_handles[handle] = pid
+    return handle
+
+def _process_image_name(d: SimDesktop, handle: int, flags: int, buf: Any, psize: Any) -> int:
+    pid = d._process_handles.get(handle)
+    if pid is None:
+        return 0
+    path = f"C:\\Program Files\\{d.processes[pid]}"
+    buf.value = path
+    _target(psize).value = len(path)
+    return 1
+
+def _register_thumbnail(d: SimDesktop, dest: Any, source: Any, pid_out: Any) -> int:
+    dest, source = _value(dest), _value(source)
+    dest_win, source_win = d.windows.get(dest), d.windows.get(source)
+    # The destination has to belong to us
+    if dest_win is None or source_win is None or dest_win.pid != d.pid:
+        return E_INVALIDARG
+    thumb = SimThumbnail(next(d._handles), dest, source)
+    d.thumbnails[thumb.id] = thumb
+    _target(pid_out).value = thumb.id
+    return 0
+
+DWM_TNP_RECTDESTINATION = 0x01
+DWM_TNP_RECTSOURCE = 0x02
+DWM_TNP_OPACITY = 0x04
+DWM_TNP_VISIBLE = 0x08
+
+def _update_thumbnail(d: SimDesktop, thumb_id: Any, pprops: Any) -> int:
+    thumb = d.thumbnails.get(_value(thumb_id))
+    if thumb is None:
+        return E_HANDLE
+    props = _target(pprops)
+    if props.dwFlags & DWM_TNP_RECTDESTINATION:
+        r = props.rcDestination
+        thumb.dest_rect = Rect(r.left, r.top, r.right, r.bottom)
+    if props.dwFlags & DWM_TNP_RECTSOURCE:
+        r = props.rcSource
+        thumb.source_rect = Rect(r.left, r.top, r.right, r.bottom)
+    if props.dwFlags & DWM_TNP_OPACITY:
+        thumb.opacity = props.opacity & 0xFF
+    if props.dwFlags & DWM_TNP_VISIBLE:
+        thumb.visible = bool(props.fVisible)
+    return 0
+
+def _unregister_thumbnail(d: SimDesktop, thumb_id: Any) -> int:
+    return 0 if d.thumbnails.pop(_value(thumb_id), None) is not None else E_HANDLE
+
+def _window_attribute(d: SimDesktop, hwnd: Any, attribute: Any, pvalue: Any, size: Any) -> int:
+    win = d.windows.get(_value(hwnd))
+    if win is None:
+        return E_HANDLE
+    if _value(attribute) != c.DWMWA_CLOAKED:
+        return E_INVALIDARG
+    _target(pvalue).value = int(win.cloaked)
+    return 0
+
+user32 = types.SimpleNamespace(
+    SetWinEventHook=_Call("SetWinEventHook", _set_win_event_hook),
+    UnhookWinEvent=_Call("UnhookWinEvent", _unhook_win_event),
+    SetWindowsHookExW=_Call("SetWindowsHookExW", _set_windows_hook),
+    UnhookWindowsHookEx=_Call("UnhookWindowsHookEx", lambda d, handle: int(d._mouse_hooks.pop(_value(handle), None) is not None)),
+    CallNextHookEx=_Call("CallNextHookEx", lambda d, hook, code, wparam, lparam: 0),
+    GetMessageW=_Call("GetMessageW", _get_message, blocking=True),
+    TranslateMessage=_Call("TranslateMessage", lambda d, pmsg: 0),
+    DispatchMessageW=_Call("DispatchMessageW", lambda d, pmsg: 0),
+    PostThreadMessageW=_Call("PostThreadMessageW", lambda d, tid, message, wparam, lparam: d.post(tid, message, wparam, lparam) or 1),
+    InternalGetWindowText=_Call("InternalGetWindowText", _window_text),
+)
+kernel32 = types.SimpleNamespace(
+    GetCurrentThreadId=_Call("GetCurrentThreadId", lambda d: _tid()),
+    GetModuleHandleW=_Call("GetModuleHandleW", lambda d, name: 0x400000),
+    OpenProcess=_Call("OpenProcess", _open_process),
+    QueryFullProcessImageNameW=_Call("QueryFullProcessImageNameW", _process_image_name),
+    CloseHandle=_Call("CloseHandle", lambda d, handle: int(d._process_handles.pop(handle, None) is not None)),
+)
+ole32 = types.SimpleNamespace(
+    CoInitializeEx=_Call("CoInitializeEx", lambda d, flags: 0),
+)
+dwmapi = types.SimpleNamespace(
+    DwmRegisterThumbnail=_Call("DwmRegisterThumbnail", _register_thumbnail),
+    DwmUpdateThumbnailProperties=_Call("DwmUpdateThumbnailProperties", _update_thumbnail),
+    DwmUnregisterThumbnail=_Call("DwmUnregisterThumbnail", _unregister_thumbnail),
+    DwmGetWindowAttribute=_Call("DwmGetWindowAttribute", _window_attribute),
+)
+windll = types.SimpleNamespace(user32=user32, kernel32=kernel32, ole32=ole32, dwmapi=dwmapi)
+
+MODULES = {
+    "win32gui": win32gui,
+    "win32api": win32api,
+    "win32con": win32con,
+    "win32process": win32process,
+    "pywintypes": pywintypes,
+}
+
+_MISSING = object()
+
+def _is_adapter_module(name: str) -> bool:
+    return name == "adapters.windows" or name.startswith("adapters.windows.")
+
+@contextlib.contextmanager
+def install(desktop: SimDesktop) -> Iterator[SimDesktop]:
+    "Make pywin32 and ctypes.windll the simulation of `desktop` until the block ends"
+    global _desktop
+    if _desktop is not None:
+        raise RuntimeError("A simulated desktop is already installed")
+    saved_modules = {name: sys.modules.pop(name) for name in list(sys.modules) if name in MODULES or _is_adapter_module(name)}
+    saved_ctypes = {name: getattr(ctypes, name, _MISSING) for name in ("windll", "WINFUNCTYPE")}
+    sys.modules.update(MODULES)
+    ctypes.windll = windll # type: ignore[attr-defined]
+    # Callbacks are plain C functions here; on 64-bit Windows stdcall is the same thing
+    ctypes.WINFUNCTYPE = ctypes.CFUNCTYPE # type: ignore[attr-defined]
+    _desktop = desktop
+    try:
+        yield desktop
+    finally:
+        _desktop = None
+        for name in [name for name in sys.modules if name in MODULES or _is_adapter_module(name)]:
+            del sys.modules[name]
+        sys.modules.update(saved_modules)
+        for name, value in saved_ctypes.items():
+            if value is _MISSING:
+                delattr(ctypes, name)
+            else:
+                setattr(ctypes, name, value)
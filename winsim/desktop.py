@@ -0,0 +1,552 @@
+import asyncio
+import ctypes
+import ctypes.wintypes
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from core.models import Rect
+from winsim import constants as c
+
+# Rough latencies (µs) of the calls that matter, as seen from a Python process on a busy desktop.
+# Anything that makes another process or DWM do work is expensive; reading our own window data is cheap.
+DEFAULT_COSTS: dict[str, float] = {
+    "SetWindowPos": 150,
+    "ShowWindow": 120,
+    "SetForegroundWindow": 250,
+    "BeginDeferWindowPos": 2,
+    "DeferWindowPos": 2,
+    "EndDeferWindowPos": 80,
+    "CreateWindowEx": 400,
+    "DestroyWindow": 200,
+    "SetLayeredWindowAttributes": 60,
+    "SetWindowLong": 20,
+    "PostMessage": 5,
+    "EnumWindows": 50,
+    "DwmRegisterThumbnail": 60,
+    "DwmUpdateThumbnailProperties": 25,
+    "DwmUnregisterThumbnail": 20,
+    "DwmGetWindowAttribute": 15,
+    "OpenProcess": 15,
+    "QueryFullProcessImageNameW": 20,
+    # The message pump only waits
+    "GetMessageW": 0,
+    "TranslateMessage": 0,
+    "DispatchMessageW": 0,
+}
+# Extra per item for calls that work on many windows at once
+DEFAULT_ITEM_COSTS: dict[str, float] = {
+    "EndDeferWindowPos": 40,
+    "EnumWindows": 1,
+}
+
+# Where Windows reports minimized windows to be
+ICONIC_RECT = Rect(-32000, -32000, -31840, -31972)
+
+class Win32Error(Exception):
+    "What pywin32 raises (as pywintypes.error) when a call fails"
+
+    def __init__(self, winerror: int, funcname: str, strerror: str):
+        super().__init__(winerror, funcname, strerror)
+        self.winerror = winerror
+        self.funcname = funcname
+        self.strerror = strerror
+
+ERROR_ACCESS_DENIED = 5
+ERROR_INVALID_PARAMETER = 87
+ERROR_INVALID_WINDOW_HANDLE = 1400
+ERROR_CLASS_ALREADY_EXISTS = 1410
+ERROR_CANNOT_FIND_WND_CLASS = 1407
+E_HANDLE = -2147024890
+E_INVALIDARG = -2147024809
+
+@dataclass
+class CostModel:
+    "How long each call would have taken, in microseconds"
+
+    default_us: float = 1.0
+    per_call_us: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_COSTS))
+    per_item_us: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_ITEM_COSTS))
+    # Actually take that long, so timings on the calling thread (and queues behind it) include it
+    sleep: bool = False
+
+    def cost(self, name: str, items: int = 0) -> float:
+        return self.per_call_us.get(name, self.default_us) + items * self.per_item_us.get(name, 0.0)
+
+class CallStats:
+    "Every call made into the simulation, and what it would have cost"
+
+    calls: Counter[str]
+    cost_us: Counter[str]
+    # Calls made on each thread, by thread name
+    threads: Counter[str]
+
+    def __init__(self):
+        self.calls = Counter()
+        self.cost_us = Counter()
+        self.threads = Counter()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    @property
+    def total_cost_us(self) -> float:
+        return sum(self.cost_us.values())
+
+    def reset(self):
+        self.calls.clear()
+        self.cost_us.clear()
+        self.threads.clear()
+
+    def summary(self) -> str:
+        "A table of every call, most expensive in total first"
+        rows = sorted(self.calls, key=lambda name: (self.cost_us[name], self.calls[name]), reverse=True)
+        width = max([len("call")] + [len(name) for name in rows])
+        lines = [f"{'call':<{width}} {'count':>8} {'total ms':>10}"]
+        for name in rows:
+            lines.append(f"{name:<{width}} {self.calls[name]:>8} {self.cost_us[name] / 1000:>10.2f}")
+        lines.append(f"{'total':<{width}} {self.total_calls:>8} {self.total_cost_us / 1000:>10.2f}")
+        return "\n".join(lines)
+
+@dataclass
+class SimWindow:
+    hwnd: int
+    title: str
+    class_name: str
+    pid: int
+    # Thread that created it; only that thread may destroy it
+    tid: int
+    rect: Rect
+    style: int = c.WS_OVERLAPPEDWINDOW | c.WS_VISIBLE
+    ex_style: int = 0
+    owner: int = 0
+    parent: int = 0
+    iconic: bool = False
+    # DWM cloaking (other virtual desktops, suspended UWP apps)
+    cloaked: bool = False
+    # Set by SetLayeredWindowAttributes
+    alpha: int = 255
+
+    @property
+    def visible(self) -> bool:
+        return bool(self.style & c.WS_VISIBLE)
+
+    @property
+    def topmost(self) -> bool:
+        return bool(self.ex_style & c.WS_EX_TOPMOST)
+
+@dataclass
+class SimMonitor:
+    handle: int
+    rect: Rect
+    work: Rect
+    device: str
+
+@dataclass
+class SimThumbnail:
+    id: int
+    dest: int
+    source: int
+    dest_rect: Rect = Rect.ZERO
+    source_rect: Rect = Rect.ZERO
+    opacity: int = 255
+    visible: bool = False
+
+@dataclass
+class _WinEventHook:
+    handle: int
+    event_min: int
+    event_max: int
+    proc: Callable
+    flags: int
+    pid: int
+    tid: int
+
+@dataclass
+class _MouseHook:
+    handle: int
+    proc: Callable
+    tid: int
+
+class MSLLHOOKSTRUCT(ctypes.Structure):
+    _fields_ = [
+        ("pt", ctypes.wintypes.POINT),
+        ("mouseData", ctypes.wintypes.DWORD),
+        ("flags", ctypes.wintypes.DWORD),
+        ("time", ctypes.wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_void_p),
+    ]
+
+class SimDesktop:
+    """
+    A simulated Windows desktop: monitors, top-level windows with styles, rects and z-order, DWM thumbnails,
+    WinEvent hooks and per-thread message queues. `winsim.api` exposes it as win32gui, ctypes.windll and friends,
+    so the real Windows adapter can run against it.
+
+    Everything our code calls is counted and charged to `cost` in `stats`. The scenario methods
+    (`open_window`, `user_move`, ...) stand in for the user and other applications, and aren't counted.
+    WinEvents are delivered like Windows delivers out-of-context ones: queued to the hooking thread
+    and run from inside its GetMessageW.
+    """
+
+    monitors: list[SimMonitor]
+    windows: dict[int, SimWindow]
+    # Top-level windows, front to back
+    z_order: list[int]
+    foreground: int
+    thumbnails: dict[int, SimThumbnail]
+    # Registered window classes and their window procedures (pywin32 message maps)
+    classes: dict[str, Any]
+    # Executable name of every process that owns a window
+    processes: dict[int, str]
+    cost: CostModel
+    stats: CallStats
+    # The process our code runs as
+    pid: int
+    # Held by every call, so our threads see consistent state
+    lock: threading.RLock
+
+    _hooks: dict[int, _WinEventHook]
+    _mouse_hooks: dict[int, _MouseHook]
+    _defers: dict[int, list[tuple]]
+    # Open process handles, to the pid
+    _process_handles: dict[int, int]
+    _queues: dict[int, queue.Queue]
+    # Threads in a message loop, and whether each is waiting in GetMessageW
+    _waiting: dict[int, bool]
+
+    def __init__(self, monitors: Iterable[Rect | tuple[Rect, Rect]] = (Rect(0, 0, 1920, 1080),), cost: Optional[CostModel] = None):
+        "`monitors` are monitor rects, or (monitor, work area) pairs"
+        self.monitors = []
+        for i, mon in enumerate(monitors):
+            rect, work = mon if isinstance(mon[0], tuple) else (mon, mon)
+            self.monitors.append(SimMonitor(0x10001 + i, Rect(*rect), Rect(*work), f"\\\\.\\DISPLAY{i + 1}"))
+        self.windows = {}
+        self.z_order = []
+        self.foreground = 0
+        self.thumbnails = {}
+        self.classes = {}
+        self.processes = {os.getpid(): "python.exe"}
+        self.cost = cost or CostModel()
+        self.stats = CallStats()
+        self.pid = os.getpid()
+        self.lock = threading.RLock()
+        self._hwnds = itertools.count(0x20010, 2)
+        self._pids = itertools.count(5000, 4)
+        self._handles = itertools.count(0x7000)
+        self._hooks = {}
+        self._mouse_hooks = {}
+        self._defers = {}
+        self._process_handles = {}
+        self._queues = {}
+        self._waiting = {}
+
+    # -------------------------
+    # The user and other applications
+    # -------------------------
+
+    def open_window(self, title: str, rect: Optional[Rect] = None, class_name: str = "SimApp", process: str = "",
+                    pid: Optional[int] = None, style: int = c.WS_OVERLAPPEDWINDOW | c.WS_VISIBLE, ex_style: int = 0,
+                    owner: int = 0) -> int:
+        "Another application opens a window, which comes up in front and active"
+        with self.lock:
+            pid = pid if pid is not None else next(self._pids)
+            self.processes.setdefault(pid, process or f"app{pid}.exe")
+            hwnd = self._create(title, class_name, pid, pid + 1, rect or Rect(100, 100, 900, 700), style, ex_style, owner)
+            if self.windows[hwnd].visible:
+                self._activate(hwnd)
+            return hwnd
+
+    def close_window(self, hwnd: int):
+        with self.lock:
+            if hwnd in self.windows:
+                self._destroy(hwnd)
+
+    def user_move(self, hwnd: int, rect: Rect):
+        "The user drags or resizes a window"
+        with self.lock:
+            win = self._window(hwnd, "user_move")
+            self._move(win, Rect(*rect))
+
+    def user_minimize(self, hwnd: int):
+        with self.lock:
+            self._show(self._window(hwnd, "user_minimize"), c.SW_MINIMIZE)
+
+    def user_restore(self, hwnd: int):
+        with self.lock:
+            self._show(self._window(hwnd, "user_restore"), c.SW_RESTORE)
+            self._activate(hwnd)
+
+    def user_activate(self, hwnd: int):
+        "The user clicks on a window"
+        with self.lock:
+            self._window(hwnd, "user_activate")
+            self._activate(hwnd)
+
+    def user_click(self, x: int, y: int):
+        """
+        The user clicks at a screen position. Our windows get WM_LBUTTONDOWN on their own thread;
+        anyone else's window is activated. Like Windows, a window that hit-tests as transparent
+        passes the click on to the windows of its thread underneath.
+        """
+        with self.lock:
+            transparent_tid = None
+            for hwnd in self.z_order:
+                win = self.windows[hwnd]
+                if not win.visible or win.iconic or not win.rect.contains(x, y):
+                    continue
+                if transparent_tid is not None and win.tid != transparent_tid:
+                    return
+                handlers = self.classes.get(win.class_name)
+                handlers = handlers if isinstance(handlers, dict) else {}
+                hit_test = handlers.get(c.WM_NCHITTEST)
+                if hit_test is not None and hit_test(hwnd, c.WM_NCHITTEST, 0, 0) == c.HTTRANSPARENT:
+                    transparent_tid = win.tid
+                    continue
+                handler = handlers.get(c.WM_LBUTTONDOWN)
+                if handler is not None:
+                    lparam = ((y - win.rect.top()) & 0xFFFF) << 16 | ((x - win.rect.left()) & 0xFFFF)
+                    def deliver(handler=handler, hwnd=hwnd, lparam=lparam):
+                        handler(hwnd, c.WM_LBUTTONDOWN, 0, lparam)
+                    self._queue(win.tid).put(("call", deliver))
+                elif win.pid != self.pid:
+                    self._activate(hwnd)
+                return
+
+    def set_title(self, hwnd: int, title: str):
+        with self.lock:
+            self._window(hwnd, "set_title").title = title
+            self._emit(c.EVENT_OBJECT_NAMECHANGE, hwnd)
+
+    def move_cursor(self, x: int, y: int):
+        "Runs every low-level mouse hook, on the thread that installed it"
+        with self.lock:
+            hooks = list(self._mouse_hooks.values())
+        for hook in hooks:
+            info = MSLLHOOKSTRUCT()
+            info.pt.x, info.pt.y = x, y
+            def call(hook=hook, info=info):
+                hook.proc(0, c.WM_MOUSEMOVE, ctypes.addressof(info))
+            self._queue(hook.tid).put(("call", call))
+
+    def idle(self) -> bool:
+        "Whether every message loop is waiting for something to do"
+        with self.lock:
+            return all(q.empty() for q in self._queues.values()) and all(self._waiting.values())
+
+    async def settle(self, timeout: float = 2.0, quiet: float = 0.03):
+        """
+        Let the asyncio loop and our threads run until nothing has happened for `quiet` seconds:
+        every message loop is waiting and no call has been made.
+        """
+        deadline = time.monotonic() + timeout
+        calls = -1
+        while time.monotonic() < deadline:
+            if self.idle() and self.stats.total_calls == calls:
+                return
+            calls = self.stats.total_calls
+            await asyncio.sleep(quiet)
+
+    # -------------------------
+    # Lookups for tests
+    # -------------------------
+
+    def top_level(self) -> list[SimWindow]:
+        "Every window, front to back"
+        return [self.windows[hwnd] for hwnd in self.z_order]
+
+    def thumbnails_of(self, source: int) -> list[SimThumbnail]:
+        return [thumb for thumb in self.thumbnails.values() if thumb.source == source]
+
+    def monitor_for(self, rect: Rect) -> SimMonitor:
+        "The monitor a rect is mostly on, or the nearest one"
+        def overlap(mon: SimMonitor) -> int:
+            area = mon.rect.intersection(rect)
+            return area.width() * area.height() if area else 0
+        best = max(self.monitors, key=overlap)
+        if overlap(best) > 0:
+            return best
+        cx, cy = (rect.left() + rect.right()) // 2, (rect.top() + rect.bottom()) // 2
+        def distance(mon: SimMonitor) -> int:
+            x, y = mon.rect.clamp_pos(cx, cy)
+            return (x - cx) ** 2 + (y - cy) ** 2
+        return min(self.monitors, key=distance)
+
+    # -------------------------
+    # Accounting, used by winsim.api
+    # -------------------------
+
+    def charge(self, name: str, items: int = 0) -> float:
+        "Count a call; returns its cost in µs"
+        us = self.cost.cost(name, items)
+        self.stats.calls[name] += 1
+        self.stats.cost_us[name] += us
+        self.stats.threads[threading.current_thread().name] += 1
+        return us
+
+    # -------------------------
+    # Window state, with the lock held
+    # -------------------------
+
+    def _window(self, hwnd: Any, funcname: str) -> SimWindow:
+        win = self.windows.get(hwnd)
+        if win is None:
+            raise Win32Error(ERROR_INVALID_WINDOW_HANDLE, funcname, "Invalid window handle.")
+        return win
+
+    def _create(self, title: str, class_name: str, pid: int, tid: int, rect: Rect, style: int, ex_style: int, owner: int = 0,
+                parent: int = 0) -> int:
+        hwnd = next(self._hwnds)
+        win = SimWindow(hwnd, title, class_name, pid, tid, rect, style, ex_style, owner, parent)
+        self.windows[hwnd] = win
+        self._raise(win)
+        self._emit(c.EVENT_OBJECT_CREATE, hwnd)
+        if win.visible:
+            self._emit(c.EVENT_OBJECT_SHOW, hwnd)
+        return hwnd
+
+    def _destroy(self, hwnd: int):
+        win = self.windows[hwnd]
+        # Windows (and so pywin32's message map) gets WM_DESTROY while the handle is still valid
+        proc = self.classes.get(win.class_name)
+        handler = proc.get(c.WM_DESTROY) if isinstance(proc, dict) else None
+        if handler is not None:
+            handler(hwnd, c.WM_DESTROY, 0, 0)
+        if win.visible:
+            self._emit(c.EVENT_OBJECT_HIDE, hwnd)
+        self._emit(c.EVENT_OBJECT_DESTROY, hwnd)
+        del self.windows[hwnd]
+        self.z_order.remove(hwnd)
+        if self.foreground == hwnd:
+            self.foreground = 0
+        # DWM drops thumbnails whose windows went away
+        for thumb in [t for t in self.thumbnails.values() if hwnd in (t.dest, t.source)]:
+            del self.thumbnails[thumb.id]
+
+    def _move(self, win: SimWindow, rect: Rect):
+        if rect != win.rect:
+            win.rect = rect
+            self._emit(c.EVENT_OBJECT_LOCATIONCHANGE, win.hwnd)
+
+    def _place(self, win: SimWindow, after: int, x: int, y: int, cx: int, cy: int, flags: int):
+        "SetWindowPos and each window of an EndDeferWindowPos"
+        left, top = (win.rect.left(), win.rect.top()) if flags & c.SWP_NOMOVE else (x, y)
+        width, height = (win.rect.width(), win.rect.height()) if flags & c.SWP_NOSIZE else (cx, cy)
+        self._move(win, Rect(left, top, left + width, top + height))
+        if flags & c.SWP_SHOWWINDOW:
+            self._show(win, c.SW_SHOWNA)
+        elif flags & c.SWP_HIDEWINDOW:
+            self._show(win, c.SW_HIDE)
+        if not flags & c.SWP_NOZORDER:
+            self._reorder(win, after)
+        if not flags & c.SWP_NOACTIVATE and win.visible:
+            self._activate(win.hwnd)
+
+    def _show(self, win: SimWindow, cmd: int) -> bool:
+        "ShowWindow; returns whether the window was visible before"
+        was_visible = win.visible
+        if cmd == c.SW_HIDE:
+            win.style &= ~c.WS_VISIBLE
+            if was_visible:
+                self._emit(c.EVENT_OBJECT_HIDE, win.hwnd)
+            return was_visible
+        if cmd in (c.SW_MINIMIZE, c.SW_SHOWMINNOACTIVE, c.SW_SHOWMINIMIZED) and not win.iconic:
+            win.iconic = True
+            self._emit(c.EVENT_SYSTEM_MINIMIZESTART, win.hwnd)
+        elif cmd in (c.SW_RESTORE, c.SW_SHOWNOACTIVATE, c.SW_SHOWNORMAL, c.SW_SHOWMAXIMIZED) and win.iconic:
+            win.iconic = False
+            self._emit(c.EVENT_SYSTEM_MINIMIZEEND, win.hwnd)
+        win.style |= c.WS_VISIBLE
+        if not was_visible:
+            self._emit(c.EVENT_OBJECT_SHOW, win.hwnd)
+        return was_visible
+
+    def _reorder(self, win: SimWindow, after: int):
+        if after == c.HWND_TOPMOST:
+            win.ex_style |= c.WS_EX_TOPMOST
+        elif after == c.HWND_NOTOPMOST:
+            win.ex_style &= ~c.WS_EX_TOPMOST
+        if after in (c.HWND_TOP, c.HWND_TOPMOST, c.HWND_NOTOPMOST):
+            self._raise(win)
+        elif after == c.HWND_BOTTOM:
+            self.z_order.remove(win.hwnd)
+            self.z_order.append(win.hwnd)
+        elif after in self.windows and after != win.hwnd:
+            self.z_order.remove(win.hwnd)
+            self.z_order.insert(self.z_order.index(after) + 1, win.hwnd)
+
+    def _raise(self, win: SimWindow):
+        "To the front of its band: topmost windows stay above everything else"
+        if win.hwnd in self.z_order:
+            self.z_order.remove(win.hwnd)
+        if win.topmost:
+            self.z_order.insert(0, win.hwnd)
+            return
+        index = 0
+        while index < len(self.z_order) and self.windows[self.z_order[index]].topmost:
+            index += 1
+        self.z_order.insert(index, win.hwnd)
+
+    def _activate(self, hwnd: int):
+        self._raise(self.windows[hwnd])
+        if self.foreground != hwnd:
+            self.foreground = hwnd
+            self._emit(c.EVENT_SYSTEM_FOREGROUND, hwnd)
+
+    def _emit(self, event: int, hwnd: int):
+        win = self.windows.get(hwnd)
+        pid = win.pid if win else 0
+        stamp = int(time.monotonic() * 1000) & 0xFFFFFFFF
+        for hook in self._hooks.values():
+            if not hook.event_min <= event <= hook.event_max:
+                continue
+            if hook.flags & c.WINEVENT_SKIPOWNPROCESS and pid == hook.pid:
+                continue
+            def deliver(hook=hook):
+                hook.proc(hook.handle, event, hwnd, 0, 0, 0, stamp)
+            self._queue(hook.tid).put(("call", deliver))
+
+    # -------------------------
+    # Message queues
+    # -------------------------
+
+    def _queue(self, tid: int) -> queue.Queue:
+        with self.lock:
+            q = self._queues.get(tid)
+            if q is None:
+                q = self._queues[tid] = queue.Queue()
+            return q
+
+    def post(self, tid: int, message: int, wparam: int = 0, lparam: int = 0):
+        # Windows only queues messages for threads that have made a USER call, but all of ours have by then
+        self._queue(tid).put(("post", message, wparam, lparam))
+
+    def get_message(self, msg: ctypes.wintypes.MSG) -> int:
+        """
+        GetMessageW for the calling thread: runs hook callbacks and other work queued for it
+        until a posted message arrives. Returns 0 for WM_QUIT.
+        """
+        tid = threading.get_native_id()
+        q = self._queue(tid)
+        while True:
+            with self.lock:
+                self._waiting[tid] = True
+            item = q.get()
+            with self.lock:
+                self._waiting[tid] = False
+            if item[0] == "call":
+                item[1]()
+                continue
+            _, message, wparam, lparam = item
+            msg.message, msg.wParam, msg.lParam = message, wparam, lparam
+            if message == c.WM_QUIT:
+                with self.lock:
+                    self._waiting.pop(tid, None)
+                return 0
+            return 1